@@ -2,15 +2,25 @@ import os
 import redis
 from flask import Flask, jsonify, redirect, request, abort, make_response
 
-from . import logger
+from . import bulk, logger
+from .cache import ResponseCache, make_etag
 from .error import SozeError
-from .resource import Led, Lcd, STATUSES
+from .feed import EventFeed
+from .resource import STATUSES, make_resources
+from .subscription import Subscription
 
 
 app = Flask(__name__)
 # This will NOT initiate a connection to Redis yet
 redis_client = redis.from_url(os.environ["REDIS_HOST"])
-resources = {res.name: res for res in [Led(redis_client), Lcd(redis_client)]}
+resources = make_resources(redis_client)
+palettes = resources["led"].palettes
+cache = ResponseCache()
+feed = EventFeed(resources)
+# One subscription per process, which keeps the cache and feed up to date
+subscription = Subscription(redis_client)
+subscription.add_listener(cache)
+subscription.add_listener(feed)
 
 
 @app.before_first_request
@@ -20,6 +30,7 @@ def init_settings():
     for resource in resources.values():
         resource.init_redis()
     logger.info("Redis initialized")
+    subscription.start()
 
 
 def validate_resource(resource_name):
@@ -46,14 +57,71 @@ def validate_status(status):
         abort(make_response(jsonify(message=f"Unknown status: {status}"), 404))
 
 
+def cached_response(resource_name, key, load):
+    """
+    Serves a GET response from the cache if possible, otherwise loads and
+    caches it. Either way, the response has an ETag, so a client that already
+    has it gets a 304 instead.
+
+    resource_name should be None if the response covers every resource. load
+    should return the response data and its ETag.
+    """
+    cached = cache.get(resource_name, key)
+    if cached is None:
+        generation = cache.generation
+        data, etag = load()
+        body = jsonify(data).get_data()
+        cache.put(resource_name, key, generation, etag, body)
+    else:
+        etag, body = cached
+    response = app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+# Get or update any/all statuses for all resources, in one round trip
+@app.route("/", methods=["GET", "POST"])
+def root_route():
+    if request.method == "GET":
+
+        def load():
+            all_statuses = bulk.get_all(redis_client, resources.values())
+            data = {
+                name: {status: settings for status, (settings, _) in s.items()}
+                for name, s in all_statuses.items()
+            }
+            etag = make_etag(
+                version
+                for statuses in all_statuses.values()
+                for _, version in statuses.values()
+            )
+            return (data, etag)
+
+        return cached_response(None, None, load)
+
+    try:
+        data = bulk.update_all(redis_client, resources, request.get_json())
+    except SozeError as e:
+        return jsonify(detail=str(e)), 400
+    # See resource_status_route
+    for resource_name in data:
+        cache.invalidate(resource_name)
+    return jsonify(data)
+
+
 # Get all statuses for a resource
 @app.route(f"/<resource_name>", methods=["GET"])
 def resource_route(resource_name):
     resource = validate_resource(resource_name)
 
-    # Get data for all statuses, and put them in a dict
-    data = {status: resource.get(status) for status in STATUSES}
-    return jsonify(data)
+    def load():
+        # Get data for all statuses, and put them in a dict
+        statuses = resource.get_all_versioned()
+        data = {status: settings for status, (settings, _) in statuses.items()}
+        etag = make_etag(version for _, version in statuses.values())
+        return (data, etag)
+
+    return cached_response(resource.name, None, load)
 
 
 # One route handles GET/POST for all resource/status pairs
@@ -63,15 +131,59 @@ def resource_status_route(resource_name, status):
     validate_status(status)  # Check that it's a valid status
 
     if request.method == "GET":
-        data = resource.get(status)
+
+        def load():
+            data, version = resource.get_versioned(status)
+            return (data, make_etag([version]))
+
+        return cached_response(resource.name, status, load)
     elif request.method == "POST":
         try:
             data = resource.update(status, request.get_json())
         except SozeError as e:
             return jsonify(detail=str(e)), 400
+        # Don't wait for the pub to come back around before dropping what's
+        # cached, or this client could read its old settings right back
+        cache.invalidate(resource.name)
     return jsonify(data)
 
 
+# List all saved LED palettes. These aren't part of the LED settings, so
+# they're not cached, and changing them doesn't wake up the reducer.
+@app.route("/led/palettes", methods=["GET"])
+def palettes_route():
+    return jsonify(palettes.get_all())
+
+
+# Load, save, or delete one saved LED palette
+@app.route("/led/palettes/<palette_name>", methods=["GET", "POST", "DELETE"])
+def palette_route(palette_name):
+    if request.method == "GET":
+        colors = palettes.get(palette_name)
+        if colors is None:
+            return jsonify(message=f"Unknown palette: {palette_name}"), 404
+        return jsonify(colors)
+    elif request.method == "POST":
+        try:
+            return jsonify(palettes.save(palette_name, request.get_json()))
+        except SozeError as e:
+            return jsonify(detail=str(e)), 400
+    if not palettes.delete(palette_name):
+        return jsonify(message=f"Unknown palette: {palette_name}"), 404
+    return "", 204
+
+
+# Stream settings changes for all resources, as server-sent events
+@app.route("/events", methods=["GET"])
+def events_route():
+    response = app.response_class(feed.stream(), mimetype="text/event-stream")
+    # Keep proxies (nginx, the dev server) from buffering or compressing the
+    # stream
+    response.headers["Cache-Control"] = "no-cache, no-transform"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
 @app.route("/xkcd")
 def xkcd():
     return redirect("https://c.xkcd.com/random/comic")
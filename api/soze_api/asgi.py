@@ -0,0 +1,265 @@
+"""
+ASGI version of the API in api.py. It serves the same routes with the same
+resource logic, but on one asyncio event loop, with a bounded pool of Redis
+connections. Run it with:
+
+    uvicorn soze_api.asgi:app --host 0.0.0.0 --port 5000
+"""
+
+import json
+import os
+
+import redis
+import redis.asyncio
+from starlette.applications import Starlette
+from starlette.responses import (
+    JSONResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
+from starlette.routing import Route
+
+from . import bulk, logger
+from .cache import ResponseCache, make_etag
+from .error import SozeError
+from .feed import EventFeed
+from .palettes import AsyncPalettes
+from .resource import STATUSES, AsyncResource, make_resources
+from .subscription import Subscription
+
+# Requests wait for a free connection instead of opening more than this
+MAX_REDIS_CONNECTIONS = int(os.environ.get("REDIS_MAX_CONNECTIONS", 32))
+REDIS_POOL_TIMEOUT = 5.0  # Seconds to wait for a free connection
+
+redis_url = os.environ["REDIS_HOST"]
+# Neither of these will initiate a connection to Redis yet. The blocking
+# client is only used at startup, and by the subscription thread.
+redis_client = redis.from_url(redis_url)
+async_redis_client = redis.asyncio.Redis(
+    connection_pool=redis.asyncio.BlockingConnectionPool.from_url(
+        redis_url,
+        max_connections=MAX_REDIS_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+    )
+)
+resources = make_resources(redis_client)
+async_resources = {
+    name: AsyncResource(res, async_redis_client)
+    for name, res in resources.items()
+}
+palettes = AsyncPalettes(resources["led"].palettes, async_redis_client)
+cache = ResponseCache()
+feed = EventFeed(resources)
+# One subscription per process, which keeps the cache and feed up to date
+subscription = Subscription(redis_client)
+subscription.add_listener(cache)
+subscription.add_listener(feed)
+
+
+def init_settings():
+    # Initialize Redis for each resource. This will insert any missing keys.
+    logger.info("Initializing Redis data...")
+    for resource in resources.values():
+        resource.init_redis()
+    logger.info("Redis initialized")
+    subscription.start()
+
+
+def error_response(status_code, **kwargs):
+    return JSONResponse(kwargs, status_code=status_code)
+
+
+def validate_resource(request):
+    """
+    Validates the resource name in the request. If it's valid, returns the
+    resource object. If not, returns None.
+    """
+    return async_resources.get(request.path_params["resource_name"])
+
+
+def etag_matches(request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, same as Flask
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in header.split(",")
+    )
+
+
+async def cached_response(request, resource_name, key, load):
+    """
+    Same as api.cached_response. load is a coroutine function.
+    """
+    cached = cache.get(resource_name, key)
+    if cached is None:
+        generation = cache.generation
+        data, etag = await load()
+        body = JSONResponse(data).body
+        cache.put(resource_name, key, generation, etag, body)
+    else:
+        etag, body = cached
+
+    etag = f'"{etag}"'
+    headers = {"ETag": etag}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+async def read_json(request):
+    """
+    Reads the request body as JSON.
+
+    @return     (value, size of the body)
+    """
+    body = await request.body()
+    try:
+        return (json.loads(body), len(body))
+    except ValueError:
+        raise SozeError("Request body must be JSON")
+
+
+# Get or update any/all statuses for all resources, in one round trip
+async def root_route(request):
+    if request.method == "GET":
+
+        async def load():
+            all_statuses = await bulk.get_all_async(
+                async_redis_client, resources.values()
+            )
+            data = {
+                name: {status: settings for status, (settings, _) in s.items()}
+                for name, s in all_statuses.items()
+            }
+            etag = make_etag(
+                version
+                for statuses in all_statuses.values()
+                for _, version in statuses.values()
+            )
+            return (data, etag)
+
+        return await cached_response(request, None, None, load)
+
+    try:
+        value, size = await read_json(request)
+        data = await bulk.update_all_async(
+            async_redis_client, async_resources, value, size
+        )
+    except SozeError as e:
+        return error_response(400, detail=str(e))
+    # See api.resource_status_route
+    for resource_name in data:
+        cache.invalidate(resource_name)
+    return JSONResponse(data)
+
+
+# Get all statuses for a resource
+async def resource_route(request):
+    resource = validate_resource(request)
+    if resource is None:
+        name = request.path_params["resource_name"]
+        return error_response(404, message=f"Unknown resource: {name}")
+
+    async def load():
+        statuses = await resource.get_all_versioned()
+        data = {status: settings for status, (settings, _) in statuses.items()}
+        etag = make_etag(version for _, version in statuses.values())
+        return (data, etag)
+
+    return await cached_response(request, resource.name, None, load)
+
+
+# One route handles GET/POST for all resource/status pairs
+async def resource_status_route(request):
+    resource = validate_resource(request)
+    if resource is None:
+        name = request.path_params["resource_name"]
+        return error_response(404, message=f"Unknown resource: {name}")
+    status = request.path_params["status"]
+    if status not in STATUSES:
+        return error_response(404, message=f"Unknown status: {status}")
+
+    if request.method == "GET":
+
+        async def load():
+            data, version = await resource.get_versioned(status)
+            return (data, make_etag([version]))
+
+        return await cached_response(request, resource.name, status, load)
+
+    try:
+        value, size = await read_json(request)
+        data = await resource.update(status, value, size)
+    except SozeError as e:
+        return error_response(400, detail=str(e))
+    # See api.resource_status_route
+    cache.invalidate(resource.name)
+    return JSONResponse(data)
+
+
+# See api.palettes_route
+async def palettes_route(request):
+    return JSONResponse(await palettes.get_all())
+
+
+# See api.palette_route
+async def palette_route(request):
+    name = request.path_params["palette_name"]
+    if request.method == "GET":
+        colors = await palettes.get(name)
+        if colors is None:
+            return error_response(404, message=f"Unknown palette: {name}")
+        return JSONResponse(colors)
+    elif request.method == "POST":
+        try:
+            value, _ = await read_json(request)
+            return JSONResponse(await palettes.save(name, value))
+        except SozeError as e:
+            return error_response(400, detail=str(e))
+    if not await palettes.delete(name):
+        return error_response(404, message=f"Unknown palette: {name}")
+    return Response(status_code=204)
+
+
+# Stream settings changes for all resources, as server-sent events
+async def events_route(request):
+    return StreamingResponse(
+        feed.stream_async(),
+        media_type="text/event-stream",
+        # See api.events_route
+        headers={
+            "Cache-Control": "no-cache, no-transform",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+async def xkcd(request):
+    return RedirectResponse("https://c.xkcd.com/random/comic", 302)
+
+
+app = Starlette(
+    routes=[
+        Route("/events", events_route, methods=["GET"]),
+        Route("/xkcd", xkcd),
+        Route("/", root_route, methods=["GET", "POST"]),
+        # These have to come before the generic resource routes
+        Route("/led/palettes", palettes_route, methods=["GET"]),
+        Route(
+            "/led/palettes/{palette_name}",
+            palette_route,
+            methods=["GET", "POST", "DELETE"],
+        ),
+        Route("/{resource_name}", resource_route, methods=["GET"]),
+        Route(
+            "/{resource_name}/{status}",
+            resource_status_route,
+            methods=["GET", "POST"],
+        ),
+    ],
+    on_startup=[init_settings],
+)
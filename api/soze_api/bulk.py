@@ -0,0 +1,169 @@
+"""
+Reads and updates that cover several resources and statuses at once, e.g. a
+"sleep scene" that changes both resources for both statuses. Each one is a
+single round trip for the reads, and a single transaction for the writes,
+with one pub per affected resource.
+"""
+
+from contextlib import AsyncExitStack
+
+from .error import SozeError
+from .resource import STATUSES, run_conversion
+
+
+def _get_keys(resources):
+    return [key for res in resources for key in res.get_all_redis_keys()]
+
+
+def _decode(resources, values):
+    """
+    Decode the values of _get_keys() into a dict of
+    resource name: {status: (settings, version)}.
+    """
+    n = 2 * len(STATUSES)
+    return {
+        res.name: res.decode_all(values[n * i : n * (i + 1)])
+        for i, res in enumerate(resources)
+    }
+
+
+def _convert(resources, value):
+    """
+    Validate a bulk update, formatted as resource name: {status: settings},
+    and convert each settings value for Redis.
+
+    Returns a list of (resource, status, converted value).
+    """
+    if not isinstance(value, dict):
+        raise SozeError("Value must be a dict of resources")
+    updates = []
+    for name, statuses in value.items():
+        try:
+            res = resources[name]
+        except KeyError:
+            raise SozeError(f"Unknown resource: {name}")
+        if not isinstance(statuses, dict):
+            raise SozeError(f"Value for {name} must be a dict of statuses")
+        for status, settings in statuses.items():
+            if status not in STATUSES:
+                raise SozeError(f"Unknown status: {status}")
+            updates.append((res, status, res.settings.to_redis(settings)))
+    return updates
+
+
+def _get_update_keys(updates):
+    return [
+        key for res, status, _ in updates for key in res.get_redis_keys(status)
+    ]
+
+
+def _merge(updates, values):
+    """
+    Merge each update into the current value and version for it, from the
+    values of _get_update_keys(). Returns a (new value, new version) for each
+    update.
+    """
+    return [
+        res.merge(values[2 * i], values[2 * i + 1], converted)
+        for i, (res, _, converted) in enumerate(updates)
+    ]
+
+
+def _queue_writes(pipe, updates, merged):
+    versions = {}  # Resource -> {status: new version}
+    for (res, status, _), (new_value, version) in zip(updates, merged):
+        res.queue_write(pipe, status, new_value, version)
+        versions.setdefault(res, {})[status] = version
+    # One pub per resource, so subscribers reload all of its changes at once
+    for res, res_versions in versions.items():
+        res.queue_publish(pipe, res_versions)
+
+
+def _format(updates, merged):
+    rv = {}
+    for (res, status, _), (new_value, _) in zip(updates, merged):
+        settings = res.settings.from_redis(new_value)
+        rv.setdefault(res.name, {})[status] = settings
+    return rv
+
+
+def get_all(redis_client, resources):
+    """
+    Get the settings and version for every status of every given resource,
+    with one MGET.
+
+    Returns a dict of resource name: {status: (settings, version)}.
+    """
+    resources = list(resources)
+    return _decode(resources, redis_client.mget(_get_keys(resources)))
+
+
+def update_all(redis_client, resources, value):
+    """
+    Update any number of resources and statuses, in one transaction. Each
+    update is merged into the current settings, the same as Resource.update.
+
+    @param      resources  Dict of resource name: Resource
+    @param      value      Dict of resource name: {status: settings}
+
+    @return     The new settings, as resource name: {status: settings}, for
+                each status that was updated
+    """
+    updates = _convert(resources, value)
+    if not updates:
+        return {}
+    keys = _get_update_keys(updates)
+
+    def merge(pipe):
+        # See Resource._write
+        merged = _merge(updates, pipe.mget(keys))
+        pipe.multi()
+        _queue_writes(pipe, updates, merged)
+        return merged
+
+    merged = redis_client.transaction(merge, *keys, value_from_callable=True)
+    return _format(updates, merged)
+
+
+async def get_all_async(redis_client, resources):
+    """
+    Same as get_all, for an asyncio Redis client.
+    """
+    resources = list(resources)
+    values = await redis_client.mget(_get_keys(resources))
+    size = sum(len(value or b"") for value in values)
+    return await run_conversion(size, _decode, resources, values)
+
+
+async def update_all_async(redis_client, async_resources, value, size):
+    """
+    Same as update_all, for an asyncio Redis client.
+
+    @param      async_resources  Dict of resource name: AsyncResource
+    @param      size             Rough size of the value, e.g. the length of
+                                 the request body
+    """
+    resources = {name: res.resource for name, res in async_resources.items()}
+    updates = await run_conversion(size, _convert, resources, value)
+    if not updates:
+        return {}
+    keys = _get_update_keys(updates)
+
+    async def merge(pipe):
+        values = await pipe.mget(keys)
+        merge_size = size + sum(len(value or b"") for value in values)
+        merged = await run_conversion(merge_size, _merge, updates, values)
+        pipe.multi()
+        _queue_writes(pipe, updates, merged)
+        return merged
+
+    # Take every status's lock (see AsyncResource), in a consistent order so
+    # that two bulk updates can't deadlock
+    async with AsyncExitStack() as stack:
+        for name, status in sorted((res.name, s) for res, s, _ in updates):
+            lock = async_resources[name].get_update_lock(status)
+            await stack.enter_async_context(lock)
+        merged = await redis_client.transaction(
+            merge, *keys, value_from_callable=True
+        )
+    return await run_conversion(size, _format, updates, merged)
@@ -0,0 +1,81 @@
+from threading import Lock
+
+
+def make_etag(versions):
+    """
+    @brief      Makes an ETag for a response, out of the versions of all the
+                settings in it.
+    """
+    return "-".join(str(version) for version in versions)
+
+
+class ResponseCache:
+    """
+    In-memory cache of serialized GET responses, keyed by route. This listens
+    to a Subscription, and drops a resource's entries whenever its settings
+    change, so the cache stays correct even when another API worker is the
+    one doing the update.
+
+    Nothing is cached while we're not subscribed, since we could miss
+    invalidations then. Responses are tagged with the generation (number of
+    invalidations) from before their data was read, so that a response that
+    was read before an invalidation never gets cached after it.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        # (resource name, route args) -> (ETag, body). The resource name is
+        # None for responses that cover every resource.
+        self._entries = {}
+        self._generation = 0
+        self._subscribed = False
+
+    def get(self, resource_name, key):
+        """
+        @brief      Gets a cached response.
+
+        @return     (ETag, body), or None if the response isn't cached
+        """
+        return self._entries.get((resource_name, key))
+
+    @property
+    def generation(self):
+        """
+        @brief      The current generation. Grab this BEFORE reading the data
+                    for put().
+        """
+        return self._generation
+
+    def put(self, resource_name, key, generation, etag, body):
+        """
+        @brief      Caches a response, unless anything has been invalidated
+                    since its data was read.
+        """
+        with self._lock:
+            if self._subscribed and generation == self._generation:
+                self._entries[(resource_name, key)] = (etag, body)
+
+    def invalidate(self, resource_name):
+        """
+        @brief      Drops every cached response that covers the given resource.
+        """
+        with self._lock:
+            self._generation += 1
+            self._entries = {
+                k: v
+                for k, v in self._entries.items()
+                if k[0] is not None and k[0] != resource_name
+            }
+
+    def on_subscribe(self):
+        with self._lock:
+            self._subscribed = True
+
+    def on_pub(self, resource_name, data):
+        self.invalidate(resource_name)
+
+    def on_unsubscribe(self):
+        with self._lock:
+            self._subscribed = False
+            self._generation += 1
+            self._entries = {}
@@ -0,0 +1,120 @@
+"""
+Write coalescing for bursty updates, e.g. dragging a color picker. Updates to
+one status that arrive within a window of the last write are merged in memory
+and written together, so there's at most one Redis write (and one reducer
+wakeup) per window, no matter how fast clients send. The first update after a
+quiet period is written right away, so lone updates aren't delayed.
+
+Every caller in a batch gets the result of the batch's write, which includes
+its own update and everything merged after it.
+"""
+
+import asyncio
+import time
+from threading import Event, Lock
+
+
+class _Batch:
+    def __init__(self, converted):
+        self.converted = converted  # Merged update, converted for Redis
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class Coalescer:
+    """
+    Coalesces updates to one status, for threaded servers. The first caller
+    in a batch waits out the window and does the write, for everyone.
+    """
+
+    def __init__(self, window, merge, write):
+        """
+        @param      window  Seconds to keep between writes
+        @param      merge   Function to merge two converted updates, with the
+                            second taking precedence
+        @param      write   Function to write a converted update, returning
+                            the new value
+        """
+        self._window = window
+        self._merge = merge
+        self._write = write
+        self._lock = Lock()
+        self._batch = None  # The batch that's still taking updates, if any
+        self._next_write_time = 0.0
+
+    def update(self, converted):
+        with self._lock:
+            batch = self._batch
+            if batch is not None:
+                batch.converted = self._merge(batch.converted, converted)
+                is_writer = False
+            else:
+                batch = self._batch = _Batch(converted)
+                is_writer = True
+                now = time.monotonic()
+                delay = max(self._next_write_time - now, 0.0)
+                self._next_write_time = now + delay + self._window
+
+        if is_writer:
+            time.sleep(delay)
+            with self._lock:
+                # Anything after this goes in the next batch
+                self._batch = None
+            try:
+                batch.result = self._write(batch.converted)
+            except Exception as e:
+                batch.error = e
+            batch.done.set()
+        else:
+            batch.done.wait()
+
+        if batch.error is not None:
+            raise batch.error
+        return batch.result
+
+
+class AsyncCoalescer:
+    """
+    Coalesces updates to one status, for an event loop. Each batch is
+    written by its own task, so a caller that gets cancelled (e.g. the client
+    disconnected) doesn't take everyone else's update down with it.
+    """
+
+    def __init__(self, window, merge, write):
+        """
+        Same as Coalescer, but write is a coroutine function.
+        """
+        self._window = window
+        self._merge = merge
+        self._write = write
+        self._batch = None  # (merged update, future), if still taking updates
+        self._next_write_time = 0.0
+        self._tasks = set()
+
+    async def update(self, converted):
+        if self._batch is not None:
+            merged, future = self._batch
+            self._batch = (self._merge(merged, converted), future)
+        else:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._batch = (converted, future)
+            now = loop.time()
+            delay = max(self._next_write_time - now, 0.0)
+            self._next_write_time = now + delay + self._window
+            # Keep a reference, so the task doesn't get garbage collected
+            task = loop.create_task(self._write_batch(future, delay))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return await asyncio.shield(future)
+
+    async def _write_batch(self, future, delay):
+        await asyncio.sleep(delay)
+        # Anything after this goes in the next batch
+        converted, _ = self._batch
+        self._batch = None
+        try:
+            future.set_result(await self._write(converted))
+        except Exception as e:
+            future.set_exception(e)
@@ -56,6 +56,16 @@ class Color:
 
         raise SozeError(f"Invalid format for color data: {data!r}")
 
+    @classmethod
+    def unpack_int(cls, data):
+        # Same as int(cls.unpack(data)), without building a Color for the
+        # common case of a string hexcode
+        if isinstance(data, str):
+            m = __class__._HEXCODE_RGX.match(data)
+            if m:
+                return int(m.group(1), 16)
+        return int(cls.unpack(data))
+
     @property
     def red(self):
         return self._r
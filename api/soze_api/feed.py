@@ -0,0 +1,180 @@
+import asyncio
+import json
+import queue
+from threading import Lock
+
+import msgpack
+
+
+class _Client:
+    """
+    A client that's streamed to from its own thread
+    """
+
+    def __init__(self, max_queued_events):
+        self._queue = queue.Queue(maxsize=max_queued_events)
+        self.closed = False
+
+    def send(self, event):
+        """
+        @brief      Queues an event, from any thread.
+
+        @return     False if the client is too far behind to take it
+        """
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+    def close(self):
+        self.closed = True
+        try:
+            self._queue.put_nowait(None)  # Wake it up
+        except queue.Full:
+            pass
+
+    def get(self, timeout):
+        # Raises queue.Empty on timeout
+        return self._queue.get(timeout=timeout)
+
+
+class _AsyncClient:
+    """
+    A client that's streamed to from an event loop. Events are sent from the
+    subscription thread, so they're handed over to the loop.
+    """
+
+    def __init__(self, max_queued_events):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()  # Bounded in send()
+        self._max_queued_events = max_queued_events
+        self.closed = False
+
+    def send(self, event):
+        if self._queue.qsize() >= self._max_queued_events:
+            return False
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+        return True
+
+    def close(self):
+        self.closed = True
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, None)
+
+    async def get(self, timeout):
+        # Raises asyncio.TimeoutError on timeout
+        return await asyncio.wait_for(self._queue.get(), timeout)
+
+
+class EventFeed:
+    """
+    Fans settings changes out to every connected event stream, as
+    server-sent events. This listens to a Subscription, so however many
+    clients are connected, there's one subscription per process and each
+    change is only read from Redis once.
+
+    Each event has the full settings for the status that changed, along with
+    their version. Clients should refetch everything whenever they
+    (re)connect, since they may have missed events while disconnected.
+    """
+
+    _MAX_QUEUED_EVENTS = 32
+    _KEEPALIVE_INTERVAL = 15.0  # Seconds
+    _RETRY_INTERVAL = 5000  # Milliseconds for clients to wait to reconnect
+
+    def __init__(self, resources):
+        self._resources = resources  # Resource name -> Resource
+        self._lock = Lock()
+        self._clients = set()
+
+    @property
+    def num_clients(self):
+        return len(self._clients)
+
+    def stream(self):
+        """
+        @brief      Generates events for one client, until the client
+                    disconnects or falls too far behind.
+        """
+        client = _Client(__class__._MAX_QUEUED_EVENTS)
+        self._add(client)
+        try:
+            yield f"retry: {__class__._RETRY_INTERVAL}\n\n"
+            while not client.closed:
+                try:
+                    event = client.get(__class__._KEEPALIVE_INTERVAL)
+                except queue.Empty:
+                    # Keeps proxies from timing out the connection, and lets
+                    # us notice when the client has gone away
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield event
+        finally:
+            self._remove(client)
+
+    async def stream_async(self):
+        """
+        @brief      Same as stream(), for an event loop.
+        """
+        client = _AsyncClient(__class__._MAX_QUEUED_EVENTS)
+        self._add(client)
+        try:
+            yield f"retry: {__class__._RETRY_INTERVAL}\n\n"
+            while not client.closed:
+                try:
+                    event = await client.get(__class__._KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield event
+        finally:
+            self._remove(client)
+
+    def _add(self, client):
+        with self._lock:
+            self._clients.add(client)
+
+    def _remove(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+    def _broadcast(self, event):
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            if not client.send(event):
+                # This client can't keep up, so cut it off. It'll reconnect
+                # and refetch.
+                client.close()
+                self._remove(client)
+
+    def on_subscribe(self):
+        pass
+
+    def on_pub(self, resource_name, data):
+        resource = self._resources.get(resource_name)
+        if resource is None or not self._clients:
+            return
+        for status in msgpack.loads(data):
+            settings, version = resource.get_versioned(status)
+            event = json.dumps(
+                {
+                    "resource": resource_name,
+                    "status": status,
+                    "version": version,
+                    "settings": settings,
+                },
+                separators=(",", ":"),
+            )
+            self._broadcast(f"event: update\ndata: {event}\n\n")
+
+    def on_unsubscribe(self):
+        # We could miss changes from here on, so make everyone reconnect
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            client.close()
@@ -0,0 +1,107 @@
+"""
+Saved color palettes, e.g. for the LED fade mode. These live in their own
+Redis hash of name: msgpacked list of colors, instead of in a resource's
+settings blob. The reducer reads the whole blob every time the settings
+change, and never needs the palettes, so they'd only make every change slower
+as the library grows. Palette changes aren't published for the same reason.
+"""
+
+import msgpack
+
+from .error import SozeError
+from .setting import ColorSetting, ListSetting
+
+_SETTING = ListSetting(ColorSetting())
+_to_redis = _SETTING.compile_to_redis()
+_from_redis = _SETTING.compile_from_redis()
+
+
+def _validate_name(name):
+    if not isinstance(name, str) or not name:
+        raise SozeError("Palette name must be a non-empty string")
+
+
+def _encode(colors):
+    """
+    Validate a list of colors and convert it for Redis. Returns the converted
+    list and its msgpacked form.
+    """
+    converted = _to_redis(colors)
+    return (converted, msgpack.dumps(converted))
+
+
+def _decode(redis_value):
+    return _from_redis(msgpack.loads(redis_value))
+
+
+def _decode_all(values):
+    return {name.decode(): _decode(value) for name, value in values.items()}
+
+
+class Palettes:
+    def __init__(self, redis_client, resource_name):
+        self._redis = redis_client
+        self._key = f"user:{resource_name}:palettes"
+
+    @property
+    def key(self):
+        """
+        The Redis hash that holds the palettes.
+        """
+        return self._key
+
+    def get_all(self):
+        """
+        Get every palette, as a dict of name: colors.
+        """
+        return _decode_all(self._redis.hgetall(self._key))
+
+    def get(self, name):
+        """
+        Get the colors for one palette, or None if there's no palette with
+        that name.
+        """
+        redis_value = self._redis.hget(self._key, name)
+        return _decode(redis_value) if redis_value is not None else None
+
+    def save(self, name, colors):
+        """
+        Save a palette, replacing any palette with the same name. Returns the
+        saved colors.
+        """
+        _validate_name(name)
+        converted, redis_value = _encode(colors)
+        self._redis.hset(self._key, name, redis_value)
+        return _from_redis(converted)
+
+    def delete(self, name):
+        """
+        Delete a palette. Returns whether it existed.
+        """
+        return bool(self._redis.hdel(self._key, name))
+
+
+class AsyncPalettes:
+    """
+    The same as Palettes, for an asyncio Redis client (see asgi.py).
+    """
+
+    def __init__(self, palettes, redis_client):
+        self._key = palettes.key
+        self._redis = redis_client
+
+    async def get_all(self):
+        return _decode_all(await self._redis.hgetall(self._key))
+
+    async def get(self, name):
+        redis_value = await self._redis.hget(self._key, name)
+        return _decode(redis_value) if redis_value is not None else None
+
+    async def save(self, name, colors):
+        _validate_name(name)
+        converted, redis_value = _encode(colors)
+        await self._redis.hset(self._key, name, redis_value)
+        return _from_redis(converted)
+
+    async def delete(self, name):
+        return bool(await self._redis.hdel(self._key, name))
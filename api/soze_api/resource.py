@@ -1,99 +1,161 @@
+import asyncio
+import functools
+import os
+
 import msgpack
 
+from . import logger
+from .coalesce import AsyncCoalescer, Coalescer
 from .error import SozeError
+from .palettes import Palettes
 from .setting import (
     Setting,
     EnumSetting,
     ColorSetting,
     FloatSetting,
     ListSetting,
-    DictSetting,
 )
 
-
 STATUSES = ("normal", "sleep")
 
 
+def _compile_merge(settings_obj):
+    """
+    Compiles a settings dict into a function that merges a list of value
+    dicts, with later values taking precedence.
+    """
+    # For each field, a merge function if it's a dict, or None if it's a
+    # setting (for which we just take the last value)
+    fields = [
+        (k, None if isinstance(v, Setting) else _compile_merge(v))
+        for k, v in settings_obj.items()
+    ]
+
+    def merge(subvals):
+        rv = {}
+        for k, merge_field in fields:
+            # Only recur down for values that have this field. If no values
+            # have this field, then don't include it in the output at all
+            next_subvals = [sv[k] for sv in subvals if k in sv]
+            if next_subvals:
+                rv[k] = (
+                    next_subvals[-1]
+                    if merge_field is None
+                    else merge_field(next_subvals)
+                )
+        return rv
+
+    return merge
+
+
+def _compile_from_redis(settings_obj):
+    """
+    Compiles a settings dict into a function that converts a value dict from
+    Redis into something consumable by the user. Missing values get their
+    defaults.
+    """
+    # For each field, a function to convert it and its default value (which
+    # is only used for settings, since missing dicts are converted as empty)
+    fields = []
+    for k, v in settings_obj.items():
+        if isinstance(v, Setting):
+            fields.append((k, v.compile_from_redis(), v.default_value, True))
+        else:
+            fields.append((k, _compile_from_redis(v), None, False))
+
+    def from_redis(value_obj):
+        if value_obj is None:
+            value_obj = {}
+        rv = {}
+        for k, convert, default_value, is_setting in fields:
+            v = value_obj.get(k)
+            if is_setting and v is None:
+                rv[k] = default_value
+            else:
+                rv[k] = convert(v)
+        return rv
+
+    return from_redis
+
+
+def _compile_to_redis(settings_obj):
+    """
+    Compiles a settings dict into a function that validates a value dict and
+    converts it to something consumable by Redis. Fields that are in the
+    settings but not in the value are ignored.
+    """
+    fields = {
+        k: (
+            v.compile_to_redis()
+            if isinstance(v, Setting)
+            else _compile_to_redis(v)
+        )
+        for k, v in settings_obj.items()
+    }
+
+    def to_redis(value_obj):
+        if not isinstance(value_obj, dict):
+            raise SozeError(
+                "Value must be a valid setting or a dict of settings"
+            )
+        rv = {}
+        for k, v in value_obj.items():
+            try:
+                convert = fields[k]
+            except KeyError as e:
+                raise SozeError(f"Unknown key: {e}")
+            rv[k] = convert(v)
+        return rv
+
+    return to_redis
+
+
 class Settings:
     """
     Stateless class used to convert value objects to/from Redis representation.
     This defines the structure of the data for a resource.
+
+    The settings dict is compiled into plain functions up front, so that
+    requests don't pay for walking it.
     """
 
     def __init__(self, settings):
         self._settings = settings
+        self._merge = _compile_merge(settings)
+        self._from_redis = _compile_from_redis(settings)
+        self._to_redis = _compile_to_redis(settings)
 
     def merge(self, *vals):
-        def helper(settings_obj, subvals):
-            if isinstance(settings_obj, Setting):
-                # Get the last subval, because later values take prescedence
-                return subvals[-1]
-
-            # Recur down to each dict field and convert their values
-            rv = {}
-            for k, v in settings_obj.items():
-                # Only recur down for values that have this field. If no values
-                # have this field, then don't include it in the output at all
-                next_subvals = [sv[k] for sv in subvals if k in sv]
-                if next_subvals:
-                    rv[k] = helper(v, next_subvals)
-            return rv
-
-        # It's easier to write logic that prioritizes the first element.
-        # Reverse the input so it it prioritizes the last element from the
-        # caller's perspective.
-        return helper(self._settings, vals)
+        # Later values take precedence
+        return self._merge(vals)
 
     def from_redis(self, val):
-        def helper(settings_obj, value_obj):
-            """
-            Recursively converts each value in the given value dict to something
-            consumable by the user, using the given settings dict.
-            """
-            if isinstance(settings_obj, Setting):
-                return settings_obj.from_redis(value_obj)
-            # settings_obj is a dict. Recur down to each dict field and
-            # convert their values
-            if value_obj is None:
-                value_obj = {}
-            return {
-                k: helper(v, value_obj.get(k)) for k, v in settings_obj.items()
-            }
-
-        # Use a recursive helper to convert each nested value
-        return helper(self._settings, val)
+        return self._from_redis(val)
 
     def to_redis(self, val):
-        def helper(settings_obj, value_obj):
-            """
-            Recursively converts each value in the given value dict to something
-            consumable by Redis, using the given settings dict.
-            """
-            if isinstance(settings_obj, Setting):
-                return settings_obj.to_redis(value_obj)
-            if not isinstance(value_obj, dict):
-                raise SozeError(
-                    "Value must be a valid setting or a dict of settings"
-                )
-            # Recur down to each dict field and convert their values
-            # This iterates over the value, so fields that are in the settings
-            # but not in the value will be ignored.
-            try:
-                return {
-                    k: helper(settings_obj[k], v) for k, v in value_obj.items()
-                }
-            except KeyError as e:
-                raise SozeError(f"Unknown key: {e}")
-
-        # Use a recursive helper to convert each nested value
-        return helper(self._settings, val)
+        return self._to_redis(val)
 
 
 class Resource:
-    def __init__(self, redis_client, name, settings):
+    def __init__(self, redis_client, name, settings, coalesce_window=0.0):
+        """
+        coalesce_window is the minimum number of seconds between writes for
+        each status. Updates that come in faster are merged and written
+        together (see coalesce.py). 0 means every update is written right
+        away.
+        """
         self._redis = redis_client
         self._name = name
         self._settings = Settings(settings)
+        self._coalesce_window = coalesce_window
+        self._coalescers = {
+            status: Coalescer(
+                coalesce_window,
+                self._settings.merge,
+                functools.partial(self._write, status),
+            )
+            for status in STATUSES
+        }
 
         # The channel we publish to after changing the settings for any status
         self._pub_channel = f"a2r:{self._name}"
@@ -102,14 +164,31 @@ class Resource:
     def name(self):
         return self._name
 
+    @property
+    def coalesce_window(self):
+        return self._coalesce_window
+
+    @property
+    def settings(self):
+        """
+        The Settings that convert this resource's values to and from Redis.
+        """
+        return self._settings
+
     def init_redis(self):
         """
         Initializes the Redis store for this resource. For each status, this
         this will insert any missing keys into the blob, with their default
-        values.
+        values. Statuses that already have every key aren't written, so this
+        doesn't wake up subscribers for nothing.
         """
         for status in STATUSES:
-            self.update(status, self.get(status))
+            current_value = self._redis_get(status)
+            converted = self._settings.to_redis(
+                self._settings.from_redis(current_value)
+            )
+            if self._settings.merge(current_value, converted) != current_value:
+                self._write(status, converted)
 
     def _get_redis_key(self, status):
         """
@@ -118,33 +197,226 @@ class Resource:
         """
         return f"user:{self._name}:{status}"
 
+    def _get_version_redis_key(self, status):
+        """
+        Get the key that holds the version of this resource's settings for
+        the given status. This is incremented on every write.
+        """
+        return f"user:{self._name}:{status}:version"
+
+    def get_redis_keys(self, status):
+        """
+        Get the settings key and version key for the given status.
+        """
+        return (
+            self._get_redis_key(status),
+            self._get_version_redis_key(status),
+        )
+
+    def get_all_redis_keys(self):
+        # Settings and version keys for every status, in order
+        return [
+            key for status in STATUSES for key in self.get_redis_keys(status)
+        ]
+
     def _redis_get(self, status):
         redis_value = self._redis.get(self._get_redis_key(status))
         return msgpack.loads(redis_value) if redis_value else {}
 
-    def _redis_set(self, status, val):
-        # Msgpack the value and push it to Redis
-        self._redis.set(self._get_redis_key(status), msgpack.dumps(val))
-        self._redis.publish(self._pub_channel, b"")
+    def decode(self, redis_value, version):
+        """
+        Convert a value and version, as read from Redis, into user-friendly
+        settings and a version number (0 if they've never been written).
+        """
+        value = msgpack.loads(redis_value) if redis_value else {}
+        return (self._settings.from_redis(value), int(version or 0))
+
+    def decode_all(self, values):
+        """
+        Decode the values of get_all_redis_keys() into a dict of
+        status: (settings, version).
+        """
+        return {
+            status: self.decode(*values[2 * i : 2 * i + 2])
+            for i, status in enumerate(STATUSES)
+        }
+
+    def merge(self, redis_value, version, converted):
+        """
+        Merge a converted update into a value and version read from Redis.
+        Returns the new value and version.
+        """
+        current_value = msgpack.loads(redis_value) if redis_value else {}
+        new_value = self._settings.merge(current_value, converted)
+        return (new_value, int(version or 0) + 1)
+
+    def queue_write(self, pipe, status, value, version):
+        """
+        Queue the commands to push a merged value and its new version onto a
+        transaction.
+        """
+        key, version_key = self.get_redis_keys(status)
+        pipe.set(key, msgpack.dumps(value))
+        pipe.set(version_key, version)
+
+    def queue_publish(self, pipe, versions):
+        """
+        Queue a pub that tells subscribers which statuses changed, as a dict
+        of status: new version, so they only reload those.
+        """
+        pipe.publish(self._pub_channel, msgpack.dumps(versions))
 
     def get(self, status):
         # Convert the Redis values to user-friendly values using the settings
         return self._settings.from_redis(self._redis_get(status))
 
+    def get_versioned(self, status):
+        """
+        Get the settings for the given status, along with their version.
+        """
+        return self.decode(*self._redis.mget(self.get_redis_keys(status)))
+
+    def get_all_versioned(self):
+        """
+        Get the settings and version for every status, in one round trip.
+        Returns a dict of status: (settings, version).
+        """
+        return self.decode_all(self._redis.mget(self.get_all_redis_keys()))
+
     def update(self, status, value):
         # Coerce the value to something consumable by Redis. This will also
         # validate each nested value.
         converted = self._settings.to_redis(value)
-
-        # Pull the current value, merge the converted new value into it,
-        # then push that back to Redis
-        current_value = self._redis_get(status)
-        new_value = self._settings.merge(current_value, converted)
-        self._redis_set(status, new_value)
+        if self._coalesce_window:
+            new_value = self._coalescers[status].update(converted)
+        else:
+            new_value = self._write(status, converted)
 
         # Convert the merged value back to something user friendly
         return self._settings.from_redis(new_value)
 
+    def _write(self, status, converted):
+        """
+        Merge a converted update into the current value for the given status,
+        and write it. Returns the new value.
+        """
+        keys = self.get_redis_keys(status)
+
+        def merge(pipe):
+            # Both keys are WATCHed here, so if anyone else writes them before
+            # we EXEC, the transaction fails and redis-py calls this again
+            # with fresh values. That way concurrent updates never clobber
+            # each other.
+            new_value, version = self.merge(*pipe.mget(keys), converted)
+            pipe.multi()
+            self.queue_write(pipe, status, new_value, version)
+            self.queue_publish(pipe, {status: version})
+            return new_value
+
+        return self._redis.transaction(merge, *keys, value_from_callable=True)
+
+
+# Values bigger than this (in bytes) are converted in a thread. Anything
+# smaller converts faster than it takes to hand it off.
+_THREAD_THRESHOLD = 4096
+
+
+async def run_conversion(size, func, *args):
+    """
+    Run a conversion for a value of the given (rough) size, in a thread if
+    it's big enough to hold up the event loop.
+    """
+    if size > _THREAD_THRESHOLD:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
+
+
+class AsyncResource:
+    """
+    The same Redis access as a Resource, for an asyncio Redis client (see
+    asgi.py). Converting large values can take a while, so that's done in a
+    thread instead of on the event loop.
+    """
+
+    def __init__(self, resource, redis_client):
+        self._resource = resource
+        self._redis = redis_client
+        # Updates in this process take turns for each status. Otherwise they
+        # all interleave on the event loop, and keep failing each other's
+        # transactions. The WATCH still covers other processes.
+        self._update_locks = {status: asyncio.Lock() for status in STATUSES}
+        self._coalescers = {
+            status: AsyncCoalescer(
+                resource.coalesce_window,
+                resource.settings.merge,
+                functools.partial(self._write, status),
+            )
+            for status in STATUSES
+        }
+
+    @property
+    def name(self):
+        return self._resource.name
+
+    @property
+    def resource(self):
+        return self._resource
+
+    def get_update_lock(self, status):
+        return self._update_locks[status]
+
+    async def get_versioned(self, status):
+        res = self._resource
+        redis_value, version = await self._redis.mget(
+            res.get_redis_keys(status)
+        )
+        return await run_conversion(
+            len(redis_value or b""), res.decode, redis_value, version
+        )
+
+    async def get_all_versioned(self):
+        res = self._resource
+        values = await self._redis.mget(res.get_all_redis_keys())
+        size = sum(len(value or b"") for value in values)
+        return await run_conversion(size, res.decode_all, values)
+
+    async def update(self, status, value, size):
+        """
+        Same as Resource.update. size is a rough size of the value, e.g. the
+        length of the request body.
+        """
+        res = self._resource
+        converted = await run_conversion(size, res.settings.to_redis, value)
+        if res.coalesce_window:
+            new_value = await self._coalescers[status].update(converted)
+        else:
+            new_value = await self._write(status, converted)
+        return await run_conversion(size, res.settings.from_redis, new_value)
+
+    async def _write(self, status, converted):
+        # See Resource._write
+        res = self._resource
+        keys = res.get_redis_keys(status)
+
+        async def merge(pipe):
+            redis_value, version = await pipe.mget(keys)
+            new_value, version = await run_conversion(
+                len(redis_value or b""),
+                res.merge,
+                redis_value,
+                version,
+                converted,
+            )
+            pipe.multi()
+            res.queue_write(pipe, status, new_value, version)
+            res.queue_publish(pipe, {status: version})
+            return new_value
+
+        async with self._update_locks[status]:
+            return await self._redis.transaction(
+                merge, *keys, value_from_callable=True
+            )
+
 
 class Led(Resource):
     SETTINGS = {
@@ -152,15 +424,96 @@ class Led(Resource):
         "static": {"color": ColorSetting()},
         "fade": {
             "colors": ListSetting(ColorSetting()),
-            "saved": DictSetting(ListSetting(ColorSetting())),
             "fade_time": FloatSetting(5.0, 1.0, 30.0),
+            "interpolation": EnumSetting(["linear", "gamma"], "linear"),
         },
     }
 
-    def __init__(self, redis_client):
+    def __init__(self, redis_client, **kwargs):
         super().__init__(
-            redis_client=redis_client, name="led", settings=__class__.SETTINGS
+            redis_client=redis_client,
+            name="led",
+            settings=__class__.SETTINGS,
+            **kwargs,
         )
+        # Saved fade palettes, which are kept out of the settings
+        self._palettes = Palettes(redis_client, self.name)
+
+    @property
+    def palettes(self):
+        return self._palettes
+
+    def init_redis(self):
+        # This has to go first, because any update drops the old palettes
+        # from the settings, since they're not in the settings anymore
+        self._migrate_saved_palettes()
+        super().init_redis()
+
+    def _migrate_saved_palettes(self):
+        """
+        Saved palettes used to be in the settings for each status, under
+        fade.saved. Move any that are still there into the palettes hash. If
+        the hash already has a different palette with the same name (e.g.
+        both statuses had one), it's kept under a name with the status added,
+        e.g. "warm (sleep)", so that nothing is lost.
+        """
+        palettes_key = self._palettes.key
+
+        def migrate(status, keys, pipe):
+            redis_value, version = pipe.mget(keys)
+            value = msgpack.loads(redis_value) if redis_value else {}
+            saved = value.get("fade", {}).pop("saved", None)
+            if saved is None:
+                return []
+            existing = {
+                name.decode(): colors
+                for name, colors in pipe.hgetall(palettes_key).items()
+            }
+            renamed = []
+            pipe.multi()
+            # These were already converted for Redis
+            for name, colors in saved.items():
+                redis_colors = msgpack.dumps(colors)
+                current = existing.get(name)
+                if current == redis_colors:
+                    continue  # Already there
+                if current is not None:
+                    new_name = _get_free_name(existing, f"{name} ({status})")
+                    renamed.append((name, new_name))
+                    name = new_name
+                existing[name] = redis_colors
+                pipe.hset(palettes_key, name, redis_colors)
+            version = int(version or 0) + 1
+            self.queue_write(pipe, status, value, version)
+            self.queue_publish(pipe, {status: version})
+            return renamed
+
+        for status in STATUSES:
+            keys = self.get_redis_keys(status)
+            renamed = self._redis.transaction(
+                functools.partial(migrate, status, keys),
+                *keys,
+                palettes_key,
+                value_from_callable=True,
+            )
+            for name, new_name in renamed:
+                logger.warning(
+                    f"Saved palette {name!r} from {status} has the same name"
+                    f" as another palette, so it was saved as {new_name!r}"
+                )
+
+
+def _get_free_name(palettes, name):
+    """
+    Get a name that isn't in the given palettes, starting with the given one
+    and adding a number if needed.
+    """
+    free_name = name
+    i = 2
+    while free_name in palettes:
+        free_name = f"{name} {i}"
+        i += 1
+    return free_name
 
 
 class Lcd(Resource):
@@ -169,7 +522,26 @@ class Lcd(Resource):
         "color": ColorSetting(),
     }
 
-    def __init__(self, redis_client):
+    def __init__(self, redis_client, **kwargs):
         super().__init__(
-            redis_client=redis_client, name="lcd", settings=__class__.SETTINGS
+            redis_client=redis_client,
+            name="lcd",
+            settings=__class__.SETTINGS,
+            **kwargs,
         )
+
+
+def make_resources(redis_client):
+    """
+    Makes every resource, as a dict of name: Resource.
+
+    Write coalescing is opt-in for each resource, with an environment
+    variable for its window in milliseconds, e.g. LED_COALESCE_MS=50.
+    """
+    resources = {}
+    for resource_class in [Led, Lcd]:
+        name = resource_class.__name__.upper()
+        window = float(os.environ.get(f"{name}_COALESCE_MS", 0)) / 1000
+        resource = resource_class(redis_client, coalesce_window=window)
+        resources[resource.name] = resource
+    return resources
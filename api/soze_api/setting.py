@@ -54,6 +54,26 @@ class Setting(metaclass=abc.ABCMeta):
             else self.default_value
         )
 
+    def compile_to_redis(self):
+        """Compile this setting into a function that does the same thing as
+        to_redis. This is called once per setting, so subclasses can do any
+        work up front to make the returned function as cheap as possible.
+
+        Returns:
+            function: Takes a value for this setting and returns the value for
+            Redis, raising a SozeError if the value is invalid
+        """
+        return self.to_redis
+
+    def compile_from_redis(self):
+        """Compile this setting into a function that converts a value from
+        Redis. Unlike from_redis, the function doesn't need to handle None.
+
+        Returns:
+            function: Takes a value from Redis and returns the converted value
+        """
+        return self._convert_from_redis
+
     def __str__(self):
         return self.__class__.__name__
 
@@ -71,6 +91,16 @@ class EnumSetting(Setting):
         if value.lower() not in self._valid_values:
             raise SozeError(f"Invalid value: {value}")
 
+    def compile_to_redis(self):
+        valid_values = self._valid_values
+
+        def to_redis(value):
+            if type(value) != str or value.lower() not in valid_values:
+                self._validate(value)  # Raises the appropriate error
+            return value
+
+        return to_redis
+
 
 class ColorSetting(Setting):
     def __init__(self, default_value=BLACK.to_html()):
@@ -82,6 +112,17 @@ class ColorSetting(Setting):
     def _convert_from_redis(self, value):
         return Color.from_hexcode(value).to_html()
 
+    def compile_to_redis(self):
+        # Colors aren't type-checked, so skip straight to the conversion
+        return Color.unpack_int
+
+    def compile_from_redis(self):
+        def from_redis(value):
+            # Same as _convert_from_redis, without building a Color
+            return f"#{value & 0xFFFFFF:06x}"
+
+        return from_redis
+
 
 class FloatSetting(Setting):
     def __init__(self, default_value, min_=None, max_=None):
@@ -105,6 +146,23 @@ class FloatSetting(Setting):
     def _convert_from_redis(self, value):
         return float(value)
 
+    def compile_to_redis(self):
+        min_, max_ = self._min, self._max
+
+        def to_redis(value):
+            if not (
+                (type(value) == float or type(value) == int)
+                and (min_ is None or value >= min_)
+                and (max_ is None or value <= max_)
+            ):
+                self._validate(value)  # Raises the appropriate error
+            return value
+
+        return to_redis
+
+    def compile_from_redis(self):
+        return float
+
 
 class ListSetting(Setting):
     def __init__(self, setting, default_value=[]):
@@ -123,6 +181,26 @@ class ListSetting(Setting):
     def _convert_from_redis(self, value):
         return [self._setting._convert_from_redis(e) for e in value]
 
+    def compile_to_redis(self):
+        # Element to_redis both validates and converts, so this is one pass
+        # over the list instead of two
+        elem_to_redis = self._setting.compile_to_redis()
+
+        def to_redis(value):
+            if type(value) != list:
+                Setting._validate(self, value)  # Raises
+            return [elem_to_redis(e) for e in value]
+
+        return to_redis
+
+    def compile_from_redis(self):
+        elem_from_redis = self._setting.compile_from_redis()
+
+        def from_redis(value):
+            return [elem_from_redis(e) for e in value]
+
+        return from_redis
+
 
 class DictSetting(Setting):
     def __init__(self, setting, default_value={}):
@@ -142,3 +220,23 @@ class DictSetting(Setting):
         return {
             k: self._setting._convert_from_redis(v) for k, v in value.items()
         }
+
+    def compile_to_redis(self):
+        # Element to_redis both validates and converts, so this is one pass
+        # over the dict instead of two
+        elem_to_redis = self._setting.compile_to_redis()
+
+        def to_redis(value):
+            if type(value) != dict:
+                Setting._validate(self, value)  # Raises
+            return {k: elem_to_redis(v) for k, v in value.items()}
+
+        return to_redis
+
+    def compile_from_redis(self):
+        elem_from_redis = self._setting.compile_from_redis()
+
+        def from_redis(value):
+            return {k: elem_from_redis(v) for k, v in value.items()}
+
+        return from_redis
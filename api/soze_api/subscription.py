@@ -0,0 +1,72 @@
+import time
+from threading import Lock, Thread
+
+import redis
+
+from . import logger
+
+
+class Subscription:
+    """
+    One background subscription to the a2r:* channels, shared by everything
+    in this process that needs to know when settings change. Listeners are
+    objects with these methods, which are all called from the subscription
+    thread:
+
+    - on_subscribe(): We're (re)subscribed
+    - on_pub(resource_name, data): Settings changed for a resource. data is
+      the msgpacked {status: version} dict.
+    - on_unsubscribe(): We lost the subscription, so pubs may be missed until
+      the next on_subscribe()
+    """
+
+    _SUB_PATTERN = "a2r:*"
+    _RETRY_DELAY = 5.0  # Seconds to wait before re-subscribing
+
+    def __init__(self, redis_client):
+        self._redis = redis_client
+        self._listeners = []
+        self._lock = Lock()
+        self._thread = None
+
+    def add_listener(self, listener):
+        self._listeners.append(listener)
+
+    def start(self):
+        """
+        @brief      Starts the subscription thread, if it isn't already
+                    running. Call this from each worker process.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(
+                    name="Subscription", target=self._run, daemon=True
+                )
+                self._thread.start()
+
+    def _notify(self, method_name, *args):
+        for listener in self._listeners:
+            try:
+                getattr(listener, method_name)(*args)
+            except Exception:
+                logger.exception(f"Error in {listener}.{method_name}")
+
+    def _run(self):
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                pubsub.psubscribe(__class__._SUB_PATTERN)
+                for msg in pubsub.listen():
+                    if msg["type"] == "psubscribe":
+                        logger.info("Subscribed to settings changes")
+                        self._notify("on_subscribe")
+                    elif msg["type"] == "pmessage":
+                        channel = msg["channel"].decode()
+                        resource_name = channel.split(":", 1)[1]
+                        self._notify("on_pub", resource_name, msg["data"])
+            except redis.ConnectionError as e:
+                logger.warning(f"Lost subscription to settings changes: {e}")
+            finally:
+                self._notify("on_unsubscribe")
+                pubsub.close()
+            time.sleep(__class__._RETRY_DELAY)
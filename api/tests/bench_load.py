@@ -0,0 +1,185 @@
+"""
+Load tests the Flask (api.py) and ASGI (asgi.py) versions of the API against
+a local Redis, and compares their throughput and latency. Not collected as a
+test. Run it from the api directory:
+
+    python -m tests.bench_load [--concurrency 50] [--duration 10]
+
+This writes settings, so by default it uses Redis database 15, NOT the one
+that the rest of soze uses.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import redis
+
+FLASK_PORT = 5101
+ASGI_PORT = 5102
+
+
+def start_server(name, port, redis_url):
+    env = {**os.environ, "REDIS_HOST": redis_url}
+    if name == "flask":
+        env["FLASK_APP"] = "soze_api.api"
+        cmd = ["flask", "run", "--port", str(port)]
+    else:
+        cmd = ["uvicorn", "soze_api.asgi:app", "--port", str(port)]
+    return subprocess.Popen(
+        [sys.executable, "-m", *cmd],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def request(port, conn, method, path, body=None):
+    """
+    Makes one HTTP request, reusing the given connection if there is one.
+
+    @return     (status code, connection to reuse or None)
+    """
+    if conn is None:
+        conn = await asyncio.open_connection("localhost", port)
+    reader, writer = conn
+
+    lines = [f"{method} {path} HTTP/1.1", "Host: localhost"]
+    if body is not None:
+        lines += [
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+        ]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + (body or b""))
+
+    status_line = await reader.readline()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        key, value = line.decode().split(":", 1)
+        headers[key.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get("content-length", 0)))
+
+    # The Flask dev server closes the connection after every response
+    keep_alive = (
+        status_line.startswith(b"HTTP/1.1")
+        and headers.get("connection", "").lower() != "close"
+    )
+    if not keep_alive:
+        writer.close()
+        conn = None
+    return (int(status_line.split()[1]), conn)
+
+
+async def wait_until_up(port, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            await request(port, None, "GET", "/led")
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def run_load(port, concurrency, duration, post_ratio):
+    latencies = {"GET": [], "POST": []}
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def worker():
+        nonlocal errors
+        conn = None
+        while time.monotonic() < deadline:
+            if random.random() < post_ratio:
+                method, path = "POST", "/led/normal"
+                body = json.dumps(
+                    {"fade": {"fade_time": round(random.uniform(1, 30), 1)}}
+                ).encode()
+            else:
+                method, body = "GET", None
+                path = random.choice(["/led", "/lcd"])
+
+            start = time.monotonic()
+            try:
+                status, conn = await request(port, conn, method, path, body)
+            except (OSError, asyncio.IncompleteReadError):
+                status, conn = None, None
+            if status == 200:
+                latencies[method].append(time.monotonic() - start)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return (latencies, errors)
+
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test the Flask and ASGI versions of the API"
+    )
+    parser.add_argument(
+        "--redis", default="redis://localhost:6379/15", help="Redis URL"
+    )
+    parser.add_argument("--concurrency", "-c", type=int, default=50)
+    parser.add_argument("--duration", "-d", type=float, default=10.0)
+    parser.add_argument(
+        "--post-ratio",
+        type=float,
+        default=0.1,
+        help="Fraction of requests that are POSTs",
+    )
+    args = parser.parse_args()
+
+    try:
+        redis.from_url(args.redis).ping()
+    except redis.ConnectionError:
+        print(f"Redis is unreachable at {args.redis}")
+        sys.exit(1)
+
+    print(
+        f"{args.concurrency} clients for {args.duration:.0f}s each,"
+        f" {args.post_ratio:.0%} POSTs"
+    )
+    print(
+        f"{'server':>6} {'req/s':>8} {'GET p50':>8} {'GET p99':>8}"
+        f" {'POST p50':>9} {'POST p99':>9} {'errors':>7}"
+    )
+    for name, port in [("flask", FLASK_PORT), ("asgi", ASGI_PORT)]:
+        server = start_server(name, port, args.redis)
+        try:
+            asyncio.run(wait_until_up(port))
+            latencies, errors = asyncio.run(
+                run_load(port, args.concurrency, args.duration, args.post_ratio)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+
+        gets, posts = latencies["GET"], latencies["POST"]
+        print(
+            f"{name:>6} {(len(gets) + len(posts)) / args.duration:>8.0f}"
+            f" {percentile(gets, 0.5):>8.1f} {percentile(gets, 0.99):>8.1f}"
+            f" {percentile(posts, 0.5):>9.1f} {percentile(posts, 0.99):>9.1f}"
+            f" {errors:>7}"
+        )
+    print("(latencies in ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmarks the request-path cost of the LED settings, and of loading the saved
+fade palettes, for various sizes of palette library. The palettes are stored
+outside of the settings, so the settings columns shouldn't grow with them. Not
+collected as a test. Run it from the api directory:
+
+    python -m tests.bench_settings
+"""
+
+import timeit
+
+import msgpack
+
+from soze_api import palettes
+from soze_api.resource import Led, Settings
+
+PALETTE_COUNTS = (0, 10, 100, 1000)
+COLORS_PER_PALETTE = 8
+NUMBER = 20
+
+
+VALUE = {
+    "mode": "fade",
+    "fade": {"colors": ["#ff0000", "#00ff00", "#0000ff"], "fade_time": 5.0},
+}
+
+
+def make_palettes(num_palettes):
+    """
+    Makes the contents of a palettes hash, as Redis would return it.
+    """
+    return {
+        f"palette{i}".encode(): palettes._encode(
+            [
+                f"#{(i * COLORS_PER_PALETTE + j) & 0xFFFFFF:06x}"
+                for j in range(COLORS_PER_PALETTE)
+            ]
+        )[1]
+        for i in range(num_palettes)
+    }
+
+
+def bench(stmt):
+    # Best of a few runs, in ms per call
+    return min(timeit.repeat(stmt, number=NUMBER, repeat=5)) / NUMBER * 1000
+
+
+def main():
+    settings = Settings(Led.SETTINGS)
+    print(
+        f"{'palettes':>8} {'to_redis':>10} {'merge':>10} {'from_redis':>10}"
+        f" {'GET':>10} {'POST':>10} {'palettes':>10}"
+    )
+    converted = settings.to_redis(VALUE)
+    packed = msgpack.dumps(converted)
+    for num_palettes in PALETTE_COUNTS:
+        palettes_hash = make_palettes(num_palettes)
+
+        def get():
+            return settings.from_redis(msgpack.loads(packed))
+
+        def post():
+            current = msgpack.loads(packed)
+            merged = settings.merge(current, settings.to_redis(VALUE))
+            msgpack.dumps(merged)
+            return settings.from_redis(merged)
+
+        print(
+            f"{num_palettes:>8}"
+            f" {bench(lambda: settings.to_redis(VALUE)):>10.3f}"
+            f" {bench(lambda: settings.merge(converted, converted)):>10.3f}"
+            f" {bench(lambda: settings.from_redis(converted)):>10.3f}"
+            f" {bench(get):>10.3f} {bench(post):>10.3f}"
+            f" {bench(lambda: palettes._decode_all(palettes_hash)):>10.3f}"
+        )
+    print("(ms per call)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import unittest
+import uuid
+
+import msgpack
+
+from soze_api import bulk
+from soze_api.error import SozeError
+from soze_api.resource import STATUSES, Resource
+from soze_api.setting import EnumSetting, FloatSetting
+
+from .test_resource import get_redis_client
+
+
+class BulkTestCase(unittest.TestCase):
+    def setUp(self):
+        self.redis = get_redis_client()
+        if self.redis is None:
+            self.skipTest("Redis is unreachable")
+
+        # Use unique names, so that we never touch real data
+        prefix = f"test_{uuid.uuid4().hex}"
+        settings = {
+            "mode": EnumSetting(["off", "on"], "off"),
+            "speed": FloatSetting(1.0),
+        }
+        self.resources = {
+            res.name: res
+            for res in [
+                Resource(self.redis, f"{prefix}_a", settings),
+                Resource(self.redis, f"{prefix}_b", settings),
+            ]
+        }
+        self.a, self.b = self.resources.keys()
+        self.pubsub = self.redis.pubsub()
+        self.pubsub.psubscribe(f"a2r:{prefix}_*")
+        self.pubsub.get_message(timeout=1.0)
+
+    def tearDown(self):
+        self.pubsub.close()
+        self.redis.delete(
+            *(
+                key
+                for res in self.resources.values()
+                for key in res.get_all_redis_keys()
+            )
+        )
+
+    def get_pubs(self):
+        pubs = []
+        while True:
+            msg = self.pubsub.get_message(timeout=0.2)
+            if msg is None:
+                return pubs
+            pubs.append((msg["channel"].decode(), msgpack.loads(msg["data"])))
+
+    def test_update_all(self):
+        self.resources[self.a].update("normal", {"speed": 2.0})
+        self.get_pubs()
+
+        data = bulk.update_all(
+            self.redis,
+            self.resources,
+            {
+                self.a: {status: {"mode": "on"} for status in STATUSES},
+                self.b: {"sleep": {"speed": 3.0}},
+            },
+        )
+        self.assertEqual(
+            {
+                self.a: {
+                    "normal": {"mode": "on", "speed": 2.0},
+                    "sleep": {"mode": "on", "speed": 1.0},
+                },
+                self.b: {"sleep": {"mode": "off", "speed": 3.0}},
+            },
+            data,
+        )
+        # One pub per resource, with every status that changed
+        self.assertCountEqual(
+            [
+                (f"a2r:{self.a}", {"normal": 2, "sleep": 1}),
+                (f"a2r:{self.b}", {"sleep": 1}),
+            ],
+            self.get_pubs(),
+        )
+
+        all_statuses = bulk.get_all(self.redis, self.resources.values())
+        self.assertEqual(
+            ({"mode": "off", "speed": 1.0}, 0), all_statuses[self.b]["normal"]
+        )
+        self.assertEqual(
+            ({"mode": "on", "speed": 2.0}, 2), all_statuses[self.a]["normal"]
+        )
+
+    def test_invalid(self):
+        for value in [
+            [],
+            {"fake": {}},
+            {self.a: {"fake": {}}},
+            {self.a: {"normal": {"mode": "fake"}}},
+        ]:
+            with self.assertRaises(SozeError):
+                bulk.update_all(self.redis, self.resources, value)
+        self.assertEqual([], self.get_pubs())
@@ -0,0 +1,37 @@
+import unittest
+
+from soze_api.cache import ResponseCache
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache()
+        self.cache.on_subscribe()
+
+    def test_invalidate(self):
+        generation = self.cache.generation
+        self.cache.put("led", "normal", generation, "1", b"led")
+        self.cache.put("lcd", "normal", generation, "1", b"lcd")
+        self.assertEqual(("1", b"led"), self.cache.get("led", "normal"))
+
+        self.cache.invalidate("led")
+        self.assertIsNone(self.cache.get("led", "normal"))
+        self.assertEqual(("1", b"lcd"), self.cache.get("lcd", "normal"))
+
+    def test_invalidate_all(self):
+        # Responses that cover every resource are dropped for any of them
+        self.cache.put(None, None, self.cache.generation, "1", b"all")
+        self.cache.invalidate("lcd")
+        self.assertIsNone(self.cache.get(None, None))
+
+    def test_stale_put(self):
+        # Data that was read before an invalidation shouldn't be cached
+        generation = self.cache.generation
+        self.cache.invalidate("led")
+        self.cache.put("led", "normal", generation, "1", b"led")
+        self.assertIsNone(self.cache.get("led", "normal"))
+
+    def test_unsubscribed(self):
+        self.cache.on_unsubscribe()
+        self.cache.put("led", "normal", self.cache.generation, "1", b"led")
+        self.assertIsNone(self.cache.get("led", "normal"))
@@ -0,0 +1,65 @@
+import asyncio
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from soze_api.coalesce import AsyncCoalescer, Coalescer
+
+WINDOW = 0.1
+
+
+def merge(a, b):
+    return {**a, **b}
+
+
+class CoalescerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.writes = []
+        self.coalescer = Coalescer(WINDOW, merge, self.write)
+
+    def write(self, converted):
+        self.writes.append(converted)
+        return dict(converted)
+
+    def test_lone_update(self):
+        # Nothing to wait for, so it's written right away
+        start = time.monotonic()
+        self.assertEqual({"a": 1}, self.coalescer.update({"a": 1}))
+        self.assertLess(time.monotonic() - start, WINDOW / 2)
+
+    def test_burst(self):
+        self.coalescer.update({"first": 0})
+
+        def update(i):
+            return self.coalescer.update({f"k{i}": i})
+
+        with ThreadPoolExecutor(10) as executor:
+            results = list(executor.map(update, range(10)))
+
+        # Everything after the first update went out in one write, and every
+        # caller got the result of it
+        expected = {f"k{i}": i for i in range(10)}
+        self.assertEqual([{"first": 0}, expected], self.writes)
+        self.assertEqual([expected] * 10, results)
+
+
+class AsyncCoalescerTestCase(unittest.TestCase):
+    def test_burst(self):
+        writes = []
+
+        async def write(converted):
+            writes.append(converted)
+            return dict(converted)
+
+        async def run():
+            coalescer = AsyncCoalescer(WINDOW, merge, write)
+            return await asyncio.gather(
+                *(coalescer.update({f"k{i}": i}) for i in range(10))
+            )
+
+        results = asyncio.run(run())
+        # They all came in before the first write got to run, so they all
+        # went out together
+        expected = {f"k{i}": i for i in range(10)}
+        self.assertEqual([expected], writes)
+        self.assertEqual([expected] * 10, results)
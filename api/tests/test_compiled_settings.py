@@ -0,0 +1,135 @@
+import unittest
+
+import msgpack
+
+from soze_api.error import SozeError
+from soze_api.resource import Lcd, Led, Settings
+from soze_api.setting import (
+    ColorSetting,
+    DictSetting,
+    EnumSetting,
+    FloatSetting,
+    ListSetting,
+)
+
+# Each setting, with values that it should accept and reject
+CASES = [
+    (
+        EnumSetting(["off", "static", "fade"], "off"),
+        ["off", "FADE"],
+        ["fake", True, 1, None],
+    ),
+    (
+        ColorSetting(),
+        ["#00ff00", "0xABCDEF", "123456", 0x123456, [1, 2, 3]],
+        ["#12345", "red", [1, 2], [1, 2, 256], None, 1.5],
+    ),
+    (
+        FloatSetting(5.0, 1.0, 30.0),
+        [1.0, 30, 12.5],
+        [0.9, 31, "5", True, None],
+    ),
+    (
+        ListSetting(ColorSetting()),
+        [[], ["#000000", 0xFFFFFF]],
+        ["#000000", ["#000000", "nope"], None],
+    ),
+    (
+        DictSetting(ListSetting(FloatSetting(0.0))),
+        [{}, {"a": [1.0, 2], "b": []}],
+        [[], {"a": 1.0}, {"a": [1.0, "2"]}],
+    ),
+]
+
+
+def get_error(func, value):
+    try:
+        func(value)
+    except SozeError as e:
+        return str(e)
+    return None
+
+
+class CompiledSettingTestCase(unittest.TestCase):
+    """
+    Each setting's compiled functions have to match what its uncompiled
+    to_redis/from_redis do.
+    """
+
+    def test_to_redis(self):
+        for setting, valid, invalid in CASES:
+            to_redis = setting.compile_to_redis()
+            for value in valid:
+                with self.subTest(setting=setting, value=value):
+                    self.assertEqual(setting.to_redis(value), to_redis(value))
+            for value in invalid:
+                with self.subTest(setting=setting, value=value):
+                    error = get_error(setting.to_redis, value)
+                    self.assertIsNotNone(error)
+                    self.assertEqual(error, get_error(to_redis, value))
+
+    def test_from_redis(self):
+        for setting, valid, _ in CASES:
+            from_redis = setting.compile_from_redis()
+            for value in valid:
+                with self.subTest(setting=setting, value=value):
+                    redis_value = setting.to_redis(value)
+                    self.assertEqual(
+                        setting.from_redis(redis_value),
+                        from_redis(redis_value),
+                    )
+
+
+class CompiledSettingsTestCase(unittest.TestCase):
+    def test_defaults(self):
+        # Defaults make it through Redis unchanged, for each resource
+        for resource_class in [Led, Lcd]:
+            with self.subTest(resource=resource_class.__name__):
+                settings = Settings(resource_class.SETTINGS)
+                defaults = settings.from_redis({})
+                redis_value = msgpack.loads(
+                    msgpack.dumps(settings.to_redis(defaults))
+                )
+                self.assertEqual(defaults, settings.from_redis(redis_value))
+
+    def test_round_trip(self):
+        settings = Settings(Led.SETTINGS)
+        value = {
+            "mode": "fade",
+            "static": {"color": "#ff0000"},
+            "fade": {
+                "colors": ["#000000", "#0000ff"],
+                "fade_time": 2.5,
+                "interpolation": "gamma",
+            },
+        }
+        redis_value = msgpack.loads(msgpack.dumps(settings.to_redis(value)))
+        self.assertEqual(value, settings.from_redis(redis_value))
+        # Missing values get their defaults
+        self.assertEqual(
+            {"colors": [], "fade_time": 5.0, "interpolation": "linear"},
+            settings.from_redis({"mode": "fade"})["fade"],
+        )
+
+    def test_invalid(self):
+        settings = Settings(Led.SETTINGS)
+        for value, error in [
+            (
+                "fade",
+                "Value must be a valid setting or a dict of settings",
+            ),
+            ({"fake": 1}, "Unknown key: 'fake'"),
+            ({"fade": {"fake": 1}}, "Unknown key: 'fake'"),
+            (
+                {"static": "#000000"},
+                "Value must be a valid setting or a dict of settings",
+            ),
+            ({"mode": "fake"}, "Invalid value: fake"),
+            ({"fade": {"fade_time": 0.5}}, "Value 0.5 below minimum of 1.0"),
+            (
+                {"fade": {"colors": ["#000000", "nope"]}},
+                "Invalid string format for color data: 'nope'",
+            ),
+        ]:
+            with self.subTest(value=value):
+                self.assertEqual(error, get_error(settings.to_redis, value))
@@ -0,0 +1,51 @@
+import unittest
+
+import msgpack
+
+from soze_api.feed import EventFeed
+
+
+class FakeResource:
+    def __init__(self):
+        self.reads = 0
+
+    def get_versioned(self, status):
+        self.reads += 1
+        return ({"mode": "off"}, 3)
+
+
+class EventFeedTestCase(unittest.TestCase):
+    def setUp(self):
+        self.resource = FakeResource()
+        self.feed = EventFeed({"led": self.resource})
+
+    def connect(self):
+        stream = self.feed.stream()
+        self.assertTrue(next(stream).startswith("retry:"))
+        return stream
+
+    def test_fan_out(self):
+        streams = [self.connect() for _ in range(3)]
+        self.feed.on_pub("led", msgpack.dumps({"normal": 3}))
+        for stream in streams:
+            self.assertEqual(
+                "event: update\ndata: "
+                '{"resource":"led","status":"normal","version":3,'
+                '"settings":{"mode":"off"}}\n\n',
+                next(stream),
+            )
+        # One read, no matter how many clients
+        self.assertEqual(1, self.resource.reads)
+
+    def test_slow_client(self):
+        stream = self.connect()
+        for _ in range(EventFeed._MAX_QUEUED_EVENTS + 1):
+            self.feed.on_pub("led", msgpack.dumps({"normal": 3}))
+        self.assertEqual(0, self.feed.num_clients)
+        self.assertRaises(StopIteration, lambda: next(stream))
+
+    def test_unsubscribe(self):
+        stream = self.connect()
+        self.feed.on_unsubscribe()
+        self.assertRaises(StopIteration, lambda: next(stream))
+        self.assertEqual(0, self.feed.num_clients)
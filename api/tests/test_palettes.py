@@ -0,0 +1,177 @@
+import unittest
+import uuid
+
+import msgpack
+
+from soze_api.error import SozeError
+from soze_api.palettes import Palettes
+from soze_api.resource import Led, Resource
+
+from .test_resource import get_redis_client
+
+
+class PalettesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.redis = get_redis_client()
+        if self.redis is None:
+            self.skipTest("Redis is unreachable")
+
+        # Use a unique name, so that we never touch real data
+        self.palettes = Palettes(self.redis, f"test_{uuid.uuid4().hex}")
+
+    def tearDown(self):
+        self.redis.delete(self.palettes.key)
+
+    def test_save_and_load(self):
+        self.assertEqual({}, self.palettes.get_all())
+        self.assertIsNone(self.palettes.get("warm"))
+
+        colors = ["#ff0000", "#ff8000"]
+        self.assertEqual(colors, self.palettes.save("warm", colors))
+        self.palettes.save("cool", ["#0000ff"])
+        self.assertEqual(colors, self.palettes.get("warm"))
+        self.assertEqual(
+            {"warm": colors, "cool": ["#0000ff"]}, self.palettes.get_all()
+        )
+
+        # Saving again replaces it
+        self.palettes.save("warm", ["#ffff00"])
+        self.assertEqual(["#ffff00"], self.palettes.get("warm"))
+
+    def test_delete(self):
+        self.palettes.save("warm", ["#ff0000"])
+        self.assertTrue(self.palettes.delete("warm"))
+        self.assertFalse(self.palettes.delete("warm"))
+        self.assertEqual({}, self.palettes.get_all())
+
+    def test_invalid(self):
+        self.assertRaises(SozeError, self.palettes.save, "warm", "#ff0000")
+        self.assertRaises(SozeError, self.palettes.save, "warm", ["red"])
+        self.assertRaises(SozeError, self.palettes.save, "", ["#ff0000"])
+        self.assertEqual({}, self.palettes.get_all())
+
+
+class UniqueLed(Led):
+    """
+    An Led with its own name, so that we never touch real data.
+    """
+
+    def __init__(self, redis_client, name):
+        Resource.__init__(self, redis_client, name, Led.SETTINGS)
+        self._palettes = Palettes(redis_client, name)
+
+
+class MigrateSavedPalettesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.redis = get_redis_client()
+        if self.redis is None:
+            self.skipTest("Redis is unreachable")
+
+        self.name = f"test_{uuid.uuid4().hex}"
+        self.led = UniqueLed(self.redis, self.name)
+        # Old-style settings, with the palettes in them (already converted)
+        self.set_status(
+            "normal",
+            {
+                "mode": "fade",
+                "static": {"color": 0},
+                "fade": {
+                    "colors": [0xFF0000],
+                    "saved": {"warm": [0xFF0000, 0xFF8000], "cool": [0xFF]},
+                    "fade_time": 5.0,
+                    "interpolation": "linear",
+                },
+            },
+            4,
+        )
+        self.set_status(
+            "sleep",
+            {"fade": {"saved": {"warm": [0xFFFF00], "dim": [0x10]}}},
+            2,
+        )
+        self.pubsub = self.redis.pubsub()
+        self.pubsub.subscribe(f"a2r:{self.name}")
+        self.pubsub.get_message(timeout=1.0)  # Subscribe confirmation
+
+    def tearDown(self):
+        self.pubsub.close()
+        self.redis.delete(
+            self.led.palettes.key,
+            *(
+                f"user:{self.name}:{status}{suffix}"
+                for status in ("normal", "sleep")
+                for suffix in ("", ":version")
+            ),
+        )
+
+    def set_status(self, status, value, version):
+        self.redis.set(f"user:{self.name}:{status}", msgpack.dumps(value))
+        self.redis.set(f"user:{self.name}:{status}:version", version)
+
+    def get_status(self, status):
+        return (
+            msgpack.loads(self.redis.get(f"user:{self.name}:{status}")),
+            int(self.redis.get(f"user:{self.name}:{status}:version")),
+        )
+
+    def get_pubs(self):
+        pubs = []
+        while True:
+            msg = self.pubsub.get_message(timeout=0.1)
+            if msg is None:
+                return pubs
+            pubs.append(msgpack.loads(msg["data"]))
+
+    def test_migrate(self):
+        self.led.init_redis()
+
+        # The normal status goes first, so the sleep palette is renamed
+        self.assertEqual(
+            {
+                "warm": ["#ff0000", "#ff8000"],
+                "cool": ["#0000ff"],
+                "warm (sleep)": ["#ffff00"],
+                "dim": ["#000010"],
+            },
+            self.led.palettes.get_all(),
+        )
+        # The palettes are gone from the settings, and nothing else changed.
+        # Normal already had every other key, so it's only written once.
+        normal, normal_version = self.get_status("normal")
+        self.assertNotIn("saved", normal["fade"])
+        self.assertEqual([0xFF0000], normal["fade"]["colors"])
+        self.assertEqual(5, normal_version)
+        # Sleep was missing keys, so it was filled in after the migration
+        sleep, sleep_version = self.get_status("sleep")
+        self.assertNotIn("saved", sleep["fade"])
+        self.assertEqual(4, sleep_version)
+        self.assertEqual(
+            [{"normal": 5}, {"sleep": 3}, {"sleep": 4}], self.get_pubs()
+        )
+
+        # Once it's done, there's nothing left to do
+        self.led.init_redis()
+        self.assertEqual((normal, 5), self.get_status("normal"))
+        self.assertEqual((sleep, 4), self.get_status("sleep"))
+        self.assertEqual(4, len(self.led.palettes.get_all()))
+        self.assertEqual([], self.get_pubs())
+
+    def test_existing_palette_kept(self):
+        self.led.palettes.save("warm", ["#000001"])
+        self.led.palettes.save("cool", ["#0000ff"])
+        self.led.palettes.save("warm (sleep)", ["#000002"])
+        with self.assertLogs("soze_api", "WARNING") as logs:
+            self.led.init_redis()
+        # Nothing is overwritten or lost. The identical palette isn't copied.
+        self.assertEqual(
+            {
+                "warm": ["#000001"],
+                "cool": ["#0000ff"],
+                "warm (sleep)": ["#000002"],
+                "warm (normal)": ["#ff0000", "#ff8000"],
+                "warm (sleep) 2": ["#ffff00"],
+                "dim": ["#000010"],
+            },
+            self.led.palettes.get_all(),
+        )
+        self.assertEqual(2, len(logs.records))
@@ -0,0 +1,61 @@
+import os
+import unittest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import redis
+
+from soze_api.resource import Resource
+from soze_api.setting import FloatSetting
+
+NUM_WRITERS = 8
+NUM_UPDATES = 50
+
+
+def get_redis_client():
+    """Connects to a local Redis, or returns None if there isn't one"""
+    client = redis.from_url(
+        os.environ.get("REDIS_HOST", "redis://localhost:6379")
+    )
+    try:
+        client.ping()
+    except redis.ConnectionError:
+        return None
+    return client
+
+
+class ResourceUpdateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.redis = get_redis_client()
+        if self.redis is None:
+            self.skipTest("Redis is unreachable")
+
+        # Use a unique name, so that we never touch real data
+        self.name = f"test_{uuid.uuid4().hex}"
+        self.resource = Resource(
+            self.redis,
+            self.name,
+            {f"k{i}": FloatSetting(0.0) for i in range(NUM_WRITERS)},
+        )
+
+    def tearDown(self):
+        self.redis.delete(
+            f"user:{self.name}:normal", f"user:{self.name}:normal:version"
+        )
+
+    def test_concurrent_updates(self):
+        # Each writer only touches its own key, so if every update is atomic,
+        # each key ends up with the last value that its writer set
+        def write(i):
+            for j in range(NUM_UPDATES):
+                self.resource.update("normal", {f"k{i}": float(j)})
+
+        with ThreadPoolExecutor(NUM_WRITERS) as executor:
+            list(executor.map(write, range(NUM_WRITERS)))
+
+        self.assertEqual(
+            {f"k{i}": float(NUM_UPDATES - 1) for i in range(NUM_WRITERS)},
+            self.resource.get("normal"),
+        )
+        version = self.redis.get(f"user:{self.name}:normal:version")
+        self.assertEqual(NUM_WRITERS * NUM_UPDATES, int(version))
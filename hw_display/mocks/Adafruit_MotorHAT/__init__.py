@@ -10,7 +10,10 @@ class Adafruit_MotorHAT:
 
     def __init__(self, addr):
         self._addr = addr
-        self._motors = {i: Motor(i) for i in range(1, 5)}
+        self._motors = {i: Motor(self, i) for i in range(1, 5)}
+        # Number of I2C writes that the real HAT would have done (one per
+        # PWM channel update), for benchmarking
+        self.i2c_writes = 0
         logger.info(f"Set addr to {addr}")
 
     def getMotor(self, pin):
@@ -18,11 +21,15 @@ class Adafruit_MotorHAT:
 
 
 class Motor:
-    def __init__(self, pin):
+    def __init__(self, hat, pin):
+        self._hat = hat
         self._pin = pin
 
     def run(self, direction):
+        # The real HAT sets both direction pins
+        self._hat.i2c_writes += 2
         logger.info(f"[{self._pin}] Direction: {direction}")
 
     def setSpeed(self, speed):
+        self._hat.i2c_writes += 1
         logger.debug(f"[{self._pin}] Speed: {speed}")
@@ -5,11 +5,19 @@ logger = make_logger("GPIO")
 
 BCM = "BCM"
 IN = "IN"
+RISING = "RISING"
+FALLING = "FALLING"
+BOTH = "BOTH"
+
+# Current value of each pin. Unset pins read high.
+_values = {}
+# Edge detection callbacks for each pin, as (edge, callback) tuples
+_event_detects = {}
 
 
 def input(pin):
     logger.info(f"Read pin {pin}")
-    return 1
+    return _values.get(pin, 1)
 
 
 def setmode(mode):
@@ -20,5 +28,33 @@ def setup(pin, direction):
     logger.info(f"Set pin {pin} to {direction}")
 
 
+def add_event_detect(pin, edge, callback=None, bouncetime=None):
+    logger.info(f"Detect {edge} edges on pin {pin} (bounce: {bouncetime}ms)")
+    _event_detects[pin] = (edge, callback)
+
+
+def remove_event_detect(pin):
+    logger.info(f"Stop detecting edges on pin {pin}")
+    _event_detects.pop(pin, None)
+
+
 def cleanup(pin):
     logger.info(f"Clean up pin {pin}")
+    _values.pop(pin, None)
+
+
+def set_input(pin, value):
+    """
+    Mock-only: set the value of an input pin. If this is an edge that's being
+    detected, the callback is called (on the caller's thread).
+    """
+    old_value = _values.get(pin, 1)
+    _values[pin] = value
+    if old_value == value or pin not in _event_detects:
+        return
+
+    edge, callback = _event_detects[pin]
+    if edge == BOTH or edge == (RISING if value else FALLING):
+        logger.info(f"{'Rising' if value else 'Falling'} edge on pin {pin}")
+        if callback:
+            callback(pin)
@@ -10,6 +10,12 @@ parser.add_argument(
     default="redis://localhost:6379",
     help="URL for the Redis host",
 )
+parser.add_argument(
+    "--lcd-stream",
+    action="store_true",
+    help="Read LCD frames from a Redis stream instead of a list. The reducer"
+    " must be run with the same option.",
+)
 args = parser.parse_args()
 
-SozeDisplay(args.redis).run()
+SozeDisplay(args.redis, lcd_stream=args.lcd_stream).run()
@@ -8,13 +8,14 @@ from .lcd import Lcd
 from .keepalive import Keepalive
 
 # Potentially could read these from a config file
-KEEPALIVE_CONFIG = {"pin": 4}
-LED_CONFIG = {"hat_addr": 0x60, "pins": [3, 1, 2]}  # Pins are RGB
+KEEPALIVE_CONFIG = {"pin": 4, "edge_detect": True}
+# Pins are RGB, refresh rate is in Hz
+LED_CONFIG = {"hat_addr": 0x60, "pins": [3, 1, 2], "max_refresh_rate": 60}
 LCD_CONFIG = {"serial_port": "/dev/ttyAMA0"}
 
 
 class SozeDisplay:
-    def __init__(self, redis_url):
+    def __init__(self, redis_url, lcd_stream=False):
         redis_client = redis.from_url(redis_url)
         self._pubsub = redis_client.pubsub()
 
@@ -22,7 +23,12 @@ class SozeDisplay:
         self._resources = [
             self._keepalive,
             Led(redis_client=redis_client, pubsub=self._pubsub, **LED_CONFIG),
-            Lcd(redis_client=redis_client, pubsub=self._pubsub, **LCD_CONFIG),
+            Lcd(
+                redis_client=redis_client,
+                pubsub=self._pubsub,
+                stream=lcd_stream,
+                **LCD_CONFIG,
+            ),
         ]
         self._threads = [self._keepalive]
         self._should_run = True
@@ -0,0 +1,105 @@
+"""
+LCD frames from the reducer. The mock display (mock_display/) links to this
+file, so it has to stay free of any hardware imports.
+"""
+
+import struct
+
+from . import logger
+
+# Every LCD frame from the reducer starts with a header of: sequence number,
+# flags, payload length
+FRAME_HEADER = struct.Struct(">IBH")
+FRAME_FLAG_FULL = 0x01  # Frame redraws the LCD from an unknown state
+_SEQ_MASK = 0xFFFFFFFF
+
+
+def parse_frame(frame):
+    """
+    @brief      Splits a frame into its header fields and payload, without
+                copying the payload.
+
+    @param      frame  The frame, as a bytes-like object
+
+    @return     (sequence number, flags, payload memoryview)
+
+    @raise      ValueError  If the frame is malformed
+    """
+    view = memoryview(frame)
+    try:
+        seq, flags, length = FRAME_HEADER.unpack_from(view)
+    except struct.error as e:
+        raise ValueError(f"Malformed LCD frame ({len(view)} bytes)") from e
+    payload = view[FRAME_HEADER.size :]
+    if length != len(payload):
+        raise ValueError(
+            f"LCD frame should have {length} bytes, but has {len(payload)}"
+        )
+    return (seq, flags, payload)
+
+
+def next_seq(seq):
+    return (seq + 1) & _SEQ_MASK
+
+
+def is_after(seq, other):
+    """
+    @brief      Checks if one sequence number comes after another, allowing for
+                wraparound.
+    """
+    return 0 < (seq - other) & _SEQ_MASK <= _SEQ_MASK // 2
+
+
+def get_frames_to_write(frames, snapshot, latest_seq, last_seq, max_backlog):
+    """
+    @brief      Figures out which of the frames just read from the queue need to
+                be written. If we're too far behind, we write the snapshot and
+                only the frames after it.
+
+    @param      frames       List of parsed frames, oldest first
+    @param      snapshot     The snapshot frame (unparsed), or None
+    @param      latest_seq   Sequence number of the latest frame pushed, or
+                             None if it's unknown
+    @param      last_seq     Sequence number of the last frame written, or None
+                             if we don't know what the LCD is showing
+    @param      max_backlog  If more frames than this are queued up, skip to
+                             the snapshot instead
+
+    @return     List of parsed frames to write, oldest first, or None if
+                they can't get the LCD to a known state, because we missed
+                some and there's no snapshot that covers them
+
+    @raise      ValueError  If the snapshot is malformed
+    """
+    # Nothing before a full redraw matters
+    full_indexes = [
+        i for i, (_, flags, _) in enumerate(frames) if flags & FRAME_FLAG_FULL
+    ]
+    if full_indexes:
+        return frames[full_indexes[-1] :]
+
+    lost = (
+        last_seq is None  # We don't know what the LCD is showing
+        # We missed some frames, because the queue got trimmed
+        or (frames and frames[0][0] != next_seq(last_seq))
+    )
+    if not lost and len(frames) <= max_backlog:
+        return frames
+
+    if snapshot is not None:
+        snapshot = parse_frame(snapshot)
+        snapshot_seq = snapshot[0]
+        # The snapshot is only any use if we have every frame after it. With
+        # no frames queued, that means it has to be the latest frame.
+        if (
+            snapshot_seq == latest_seq
+            if not frames
+            else not is_after(frames[0][0], next_seq(snapshot_seq))
+        ):
+            logger.info(f"Skipped to LCD snapshot {snapshot_seq}")
+            return [snapshot] + [
+                f for f in frames if is_after(f[0], snapshot_seq)
+            ]
+    # If we're only behind, it's still right to write everything. If we're
+    # lost, writing what's left would garble the LCD.
+    return None if lost else frames
@@ -11,12 +11,20 @@ class Keepalive(Resource):
 
     _KEEPALIVE_KEY = "reducer:keepalive"
     _KEEPALIVE_CHANNEL = "r2d:keepalive"
+    _POLL_INTERVAL = 1  # Seconds between each read of the pin, without edges
+    # If the value hasn't changed, it's still pushed this often (in seconds)
+    _HEARTBEAT_INTERVAL = 10
+    _BOUNCE_TIME = 200  # Milliseconds to ignore further edges after one edge
 
-    def __init__(self, *args, pin, **kwargs):
+    def __init__(self, *args, pin, edge_detect=True, **kwargs):
         super().__init__(*args, **kwargs)
         self._pin = pin
+        # With edge detection, the thread sleeps until the pin changes (or a
+        # heartbeat is due). Otherwise, it has to poll the pin.
+        self._edge_detect = edge_detect
         self._thread = Thread(name="Keepalive", target=self._run)
         self._shutdown = Event()
+        self._wake = Event()
 
     def _read_val(self):
         val = GPIO.input(self._pin)
@@ -29,8 +37,17 @@ class Keepalive(Resource):
     def init(self):
         GPIO.setmode(GPIO.BCM)
         GPIO.setup(self._pin, GPIO.IN)
+        if self._edge_detect:
+            GPIO.add_event_detect(
+                self._pin,
+                GPIO.BOTH,
+                callback=self._on_edge,
+                bouncetime=__class__._BOUNCE_TIME,
+            )
 
     def cleanup(self):
+        if self._edge_detect:
+            GPIO.remove_event_detect(self._pin)
         GPIO.cleanup(self._pin)
 
     def start(self):
@@ -38,12 +55,43 @@ class Keepalive(Resource):
 
     def stop(self):
         self._shutdown.set()
+        self._wake.set()
+
+    def _on_edge(self, channel):
+        # Called from the GPIO library's thread. Wake our thread up so it reads
+        # and pushes the new value right away.
+        self._wake.set()
+
+    def _push_val(self, val):
+        # The value goes in the message so the reducer doesn't have to read it
+        # back. The key is still set for anything that reads it directly.
+        p = self._redis.pipeline()
+        p.set(__class__._KEEPALIVE_KEY, val)
+        p.publish(__class__._KEEPALIVE_CHANNEL, val)
+        p.execute()
 
     def _run(self):
         logger.info("Keepalive started")
+        timeout = (
+            __class__._HEARTBEAT_INTERVAL
+            if self._edge_detect
+            else __class__._POLL_INTERVAL
+        )
+        last_val = None
+        last_push_time = 0
         while self.should_run:
-            # Update
-            self._redis.set(__class__._KEEPALIVE_KEY, self._read_val())
-            self._redis.publish(__class__._KEEPALIVE_CHANNEL, b"")
-            time.sleep(1)
+            # Clear the flag before reading, so that an edge that comes in
+            # after the read isn't lost
+            self._wake.clear()
+            # Only push on a change, or if it's time for a heartbeat
+            val = self._read_val()
+            now = time.time()
+            if (
+                val != last_val
+                or now - last_push_time >= __class__._HEARTBEAT_INTERVAL
+            ):
+                self._push_val(val)
+                last_val = val
+                last_push_time = now
+            self._wake.wait(timeout)
         logger.info("Keepalive stopped")
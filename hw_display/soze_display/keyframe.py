@@ -0,0 +1,96 @@
+"""
+Keyframes for LED fades. The mock display (mock_display/) links to this file,
+so it has to stay free of any hardware imports.
+"""
+
+import struct
+
+
+def _srgb_to_linear(value):
+    c = value / 255
+    return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(c):
+    c = c * 12.92 if c <= 0.0031308 else 1.055 * c ** (1 / 2.4) - 0.055
+    return int(c * 255 + 0.5)
+
+
+# Same lookup tables as the reducer's gamma interpolation, so there's no pow()
+# on every frame. Each sRGB channel value maps to linear light, scaled up to
+# _LINEAR_STEPS, and each of those steps maps back to the nearest sRGB value.
+_LINEAR_STEPS = 4095
+_SRGB_TO_LINEAR = [
+    _srgb_to_linear(value) * _LINEAR_STEPS for value in range(256)
+]
+_LINEAR_TO_SRGB = bytes(
+    _linear_to_srgb(i / _LINEAR_STEPS) for i in range(_LINEAR_STEPS + 1)
+)
+_IDENTITY = bytes(range(256))
+
+# For each interpolation code on the wire, a table that maps each sRGB channel
+# value to the space to interpolate in, and a table that maps back
+_INTERPOLATIONS = {
+    0: (_IDENTITY, _IDENTITY),
+    1: (_SRGB_TO_LINEAR, _LINEAR_TO_SRGB),
+}
+
+
+class Keyframe:
+    """
+    A transition from one color to another, starting at some time (in epoch
+    seconds) and lasting some number of seconds. The reducer sends these for
+    fades, and we interpolate them locally.
+    """
+
+    # Start color, end color, start time, duration (ms), interpolation code
+    _STRUCT = struct.Struct(">3s3sdIB")
+
+    def __init__(self, start, end, start_time, duration, interpolation):
+        self._start = start
+        self._end = end
+        self._start_time = start_time
+        self._duration = duration
+        to_space, self._from_space = _INTERPOLATIONS.get(
+            interpolation, _INTERPOLATIONS[0]
+        )
+        # Each channel's endpoints, in the space to interpolate in
+        self._channels = [
+            (to_space[c1], to_space[c2]) for c1, c2 in zip(start, end)
+        ]
+
+    @classmethod
+    def from_bytes(cls, data):
+        try:
+            start, end, start_time, duration_ms, interpolation = (
+                cls._STRUCT.unpack(data)
+            )
+        except struct.error as e:
+            raise ValueError(f"Malformed keyframe ({len(data)} bytes)") from e
+        return cls(start, end, start_time, duration_ms / 1000, interpolation)
+
+    @classmethod
+    def static(cls, color):
+        """
+        @brief      Makes a keyframe that just shows one color.
+        """
+        return cls(color, color, 0, 0, 0)
+
+    def get_color(self, now):
+        """
+        @brief      Gets the color at the given time.
+
+        @return     (RGB bytes, whether the keyframe is over)
+        """
+        if self._duration <= 0:
+            return (self._end, True)
+        bias = (now - self._start_time) / self._duration
+        if bias >= 1:
+            return (self._end, True)
+        bias = max(bias, 0)
+        from_space = self._from_space
+        color = bytes(
+            from_space[int(c1 + (c2 - c1) * bias + 0.5)]
+            for c1, c2 in self._channels
+        )
+        return (color, False)
@@ -1,74 +1,129 @@
-import itertools
 import serial
 
+from .frame import get_frames_to_write, parse_frame
 from .resource import SubscriberResource
+from .serial_writer import SerialWriter
+from .stream import FrameStream
 from . import logger
 
 
-def chunks(l, n):
-    """
-    Split the given list into chunks of size n.
-    https://stackoverflow.com/questions/312443/how-do-you-split-a-list-into-evenly-sized-chunks
-    """
-    n = max(1, n)
-    return (l[i : i + n] for i in range(0, len(l), n))
-
-
-def format_bytes(data):
-    return " ".join("{:02x}".format(b) for b in data)
-
-
 class Lcd(SubscriberResource):
 
     _COMMAND_QUEUE_KEY = "reducer:lcd_commands"
-    # Data is sent in chunks to prevent overflowing the backpack's buffer
-    _CHUNK_SIZE = 20  # Bytes per chunk
-
-    def __init__(self, serial_port, *args, **kwargs):
-        super().__init__(*args, sub_channel="r2d:lcd", **kwargs)
+    _SNAPSHOT_KEY = "reducer:lcd_snapshot"
+    _LATEST_SEQ_KEY = "reducer:lcd_latest_seq"
+    # Where we ask the reducer for a full redraw
+    _RESYNC_CHANNEL = "d2r:lcd"
+    # If more frames than this are queued up, skip to the snapshot instead
+    _MAX_BACKLOG = 10
+    _BAUD_RATE = 9600
+
+    def __init__(self, serial_port, *args, stream=False, **kwargs):
+        # In stream mode, frames come from the stream instead of pubs
+        super().__init__(
+            *args, sub_channel=None if stream else "r2d:lcd", **kwargs
+        )
         # By deferring the port assignment until after construction, we prevent
         # the port from opening immediately, so that it can be opened manually
         self._ser = serial.Serial(
-            baudrate=9600,
+            baudrate=__class__._BAUD_RATE,
             bytesize=serial.EIGHTBITS,
             parity=serial.PARITY_NONE,
             stopbits=serial.STOPBITS_ONE,
         )
         self._ser.port = serial_port
+        # All writes happen on the writer's thread
+        self._writer = SerialWriter(self._ser, __class__._BAUD_RATE)
+        self._stream = (
+            FrameStream(self._redis, on_frame=self._on_stream_frame)
+            if stream
+            else None
+        )
+        # Sequence number of the last frame we wrote, None if we don't know
+        # what the LCD is showing
+        self._seq = None
 
     def init(self):
         self._ser.open()
+        self._writer.start()
+        if self._stream:
+            self._stream.start()
+        else:
+            # Catch up with whatever the reducer already sent
+            self._on_pub(None)
 
     def cleanup(self):
+        if self._stream:
+            self._stream.stop()
+            self._stream.join()
+        self._writer.stop()
         self._ser.close()
 
     def _read_data(self):
+        # Grab the snapshot along with the queue, so that they're consistent
         p = self._redis.pipeline()
         p.lrange(__class__._COMMAND_QUEUE_KEY, 0, -1)
         p.delete(__class__._COMMAND_QUEUE_KEY)
-        data, _ = p.execute()
-        # Data is an array of bytes, convert that into one long list of ints
-        return list(itertools.chain.from_iterable(data))
+        p.get(__class__._SNAPSHOT_KEY)
+        p.get(__class__._LATEST_SEQ_KEY)
+        data, _, snapshot, latest_seq = p.execute()
+        return (
+            [parse_frame(frame) for frame in data],
+            snapshot,
+            int(latest_seq) if latest_seq is not None else None,
+        )
+
+    def _get_frames_to_write(self, frames, snapshot, latest_seq):
+        return get_frames_to_write(
+            frames, snapshot, latest_seq, self._seq, __class__._MAX_BACKLOG
+        )
 
-    def _write_data(self, data):
-        # Make sure the buffer is empty before writing to it
-        self._ser.flush()
-        num_written = self._ser.write(data)
+    def _request_redraw(self):
+        logger.warning("Lost track of the LCD, asking for a redraw")
+        self._seq = None
+        self._redis.publish(__class__._RESYNC_CHANNEL, b"")
 
-        # Make sure we wrote the expected number of bytes
-        if num_written != len(data):
-            logger.error(
-                f"Expected to send {len(data)} bytes ({format_bytes(data)}),"
-                f" but only sent {num_written} bytes"
-            )
+    def _write_frame(self, data):
+        """
+        @brief      Queues a frame to be written to the LCD.
 
-    def _on_pub(self, msg):
-        # list of ints representing the data to transfer
-        data_list = self._read_data()
+        @return     False if the writer is too far behind, in which case it
+                    drops everything and the caller needs to redraw the LCD
+        """
+        if self._writer.write(data):
+            return True
+        logger.warning("LCD writer is too far behind, dropping queued frames")
+        self._writer.clear()
+        return False
 
-        # Break the data into chunks to prevent overflowing the buffer
-        data_chunks = chunks(data_list, __class__._CHUNK_SIZE)
+    def _on_stream_frame(self, data):
+        if not self._write_frame(data):
+            self._stream.request_resync()
 
-        # Write each individual chunk
-        for chunk in data_chunks:
-            self._write_data(chunk)
+    def _on_pub(self, msg):
+        try:
+            frames, snapshot, latest_seq = self._read_data()
+            frames = self._get_frames_to_write(frames, snapshot, latest_seq)
+        except ValueError as e:
+            # Use the snapshot next time
+            logger.error(str(e))
+            self._seq = None
+            return
+        if frames is None:
+            self._request_redraw()
+            return
+
+        for seq, _, payload in frames:
+            if not self._write_frame(payload):
+                # Start over from the snapshot, if it's up to date. If that's
+                # missing or doesn't fit either, the next pub will try again.
+                self._seq = None
+                if snapshot is None:
+                    return
+                seq, _, payload = parse_frame(snapshot)
+                if seq != latest_seq:
+                    self._request_redraw()
+                elif self._write_frame(payload):
+                    self._seq = seq
+                return
+            self._seq = seq
@@ -1,5 +1,9 @@
 from Adafruit_MotorHAT import Adafruit_MotorHAT
+import time
+from threading import Event, Thread
 
+from . import logger
+from .keyframe import Keyframe
 from .resource import SubscriberResource
 
 
@@ -7,8 +11,10 @@ class Led(SubscriberResource):
 
     _COLOR_LENGTH = 3  # RGB
     _COLOR_KEY = "reducer:led_color"
+    # Only set while the reducer is sending keyframes
+    _KEYFRAME_KEY = "reducer:led_keyframe"
 
-    def __init__(self, hat_addr, pins, *args, **kwargs):
+    def __init__(self, hat_addr, pins, *args, max_refresh_rate=60, **kwargs):
         super().__init__(*args, sub_channel="r2d:led", **kwargs)
 
         if len(pins) != __class__._COLOR_LENGTH:
@@ -17,6 +23,22 @@ class Led(SubscriberResource):
 
         self._hat_addr = hat_addr
         self._hat = None
+        # Last duty cycle written to each channel, None if unknown. Every
+        # write is an I2C transaction, so unchanged channels are skipped.
+        self._duty_cycles = [None] * __class__._COLOR_LENGTH
+
+        # Colors are written on a separate thread, at most this often (in
+        # seconds). Pubs that come in faster than that are coalesced, and only
+        # the latest one is used. Keyframes are interpolated at this rate too.
+        self._min_write_interval = 1 / max_refresh_rate
+        self._keyframe = None
+        self._thread = Thread(name="LED-Writer", target=self._run)
+        self._shutdown = Event()
+        self._wake = Event()
+
+    @property
+    def should_run(self):
+        return not self._shutdown.is_set()
 
     @property
     def name(self):
@@ -27,14 +49,21 @@ class Led(SubscriberResource):
         self._hat = Adafruit_MotorHAT(addr=self._hat_addr)
         for pin in self._pins:
             self._hat.getMotor(pin).run(Adafruit_MotorHAT.FORWARD)
+        self._thread.start()
+        # Pick up a fade that's already going, instead of sitting on the wrong
+        # color until the next keyframe
+        self._on_pub({"data": self._redis.get(__class__._KEYFRAME_KEY)})
 
     def cleanup(self):
+        self._shutdown.set()
+        self._wake.set()
+        self._thread.join()
         # Stop all PWM
         for pin in self._pins:
             self._hat.getMotor(pin).run(Adafruit_MotorHAT.RELEASE)
 
     def _read_data(self):
-        data = self._redis.get(__class__._COLOR_KEY)
+        data = self._redis.get(__class__._COLOR_KEY) or b""
         if len(data) != __class__._COLOR_LENGTH:
             raise ValueError(
                 f"Input data must be {__class__._COLOR_LENGTH} bytes (RGB),"
@@ -42,10 +71,46 @@ class Led(SubscriberResource):
             )
         return data
 
-    def _on_pub(self, msg):
-        data = self._read_data()
+    def _write_color(self, data):
         # Color values are [0,255]. The HAT also expects values in this range,
         # but because of the way it is wired, 0 means full on and 255 means
         # full off. We need to invert the color values to correct for this.
-        for pin, val in zip(self._pins, data):
-            self._hat.getMotor(pin).setSpeed(255 - val)
+        for i, (pin, val) in enumerate(zip(self._pins, data)):
+            duty_cycle = 255 - val
+            if duty_cycle != self._duty_cycles[i]:
+                self._hat.getMotor(pin).setSpeed(duty_cycle)
+                self._duty_cycles[i] = duty_cycle
+
+    def _on_pub(self, msg):
+        # A message means a keyframe to interpolate, otherwise the color is in
+        # the key
+        try:
+            if msg["data"]:
+                keyframe = Keyframe.from_bytes(msg["data"])
+            else:
+                keyframe = Keyframe.static(self._read_data())
+        except ValueError as e:
+            logger.error(str(e))
+            return
+        # Hand it off to the writer thread, which picks up the latest one
+        self._keyframe = keyframe
+        self._wake.set()
+
+    def _run(self):
+        logger.info("LED writer started")
+        finished = True
+        while self.should_run:
+            # Sleep until something new comes in, unless there's a keyframe to
+            # keep interpolating
+            if finished:
+                self._wake.wait()
+            # Clear the flag before grabbing the keyframe, so that a pub that
+            # comes in after this isn't lost
+            self._wake.clear()
+            keyframe = self._keyframe
+            if keyframe is not None:
+                color, finished = keyframe.get_color(time.time())
+                self._write_color(color)
+            # Anything that comes in while we wait gets coalesced
+            self._shutdown.wait(self._min_write_interval)
+        logger.info("LED writer stopped")
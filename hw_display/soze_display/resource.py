@@ -20,7 +20,10 @@ class SubscriberResource(Resource):
     def __init__(self, *args, pubsub, sub_channel, **kwargs):
         super().__init__(*args, **kwargs)
         self._pubsub = pubsub
-        self._pubsub.subscribe(**{sub_channel: self._on_pub})
+        # Subclasses can opt out of subscribing, e.g. if they get their data
+        # some other way
+        if sub_channel is not None:
+            self._pubsub.subscribe(**{sub_channel: self._on_pub})
 
     @abc.abstractmethod
     def _on_pub(self, msg):
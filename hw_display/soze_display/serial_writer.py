@@ -0,0 +1,160 @@
+import queue
+import time
+from threading import Event, Thread
+
+from . import logger
+
+
+def format_bytes(data):
+    return " ".join("{:02x}".format(b) for b in data)
+
+
+class SerialWriter:
+    """
+    Writes frames to a serial port on a dedicated thread, so that nothing else
+    (e.g. LED updates) ever waits on the 9600 baud link.
+
+    Writes are paced to what the LCD backpack can buffer. The buffer drains at
+    the baud rate, so we keep an estimate of how full it is and only write as
+    much as fits, instead of writing fixed chunks and waiting for each one to
+    drain.
+    """
+
+    _MAX_QUEUED_FRAMES = 32
+    _BUFFER_SIZE = 64  # Bytes that the backpack can buffer
+    _BITS_PER_BYTE = 10  # 8 data bits, plus start and stop bits
+    # Don't bother waking up to write less than this many bytes
+    _MIN_WRITE_SIZE = 16
+    _METRICS_INTERVAL = 60  # Seconds between logging metrics
+
+    def __init__(self, ser, baudrate):
+        self._ser = ser
+        self._bytes_per_second = baudrate / __class__._BITS_PER_BYTE
+        self._queue = queue.Queue(maxsize=__class__._MAX_QUEUED_FRAMES)
+        self._thread = Thread(name="LCD-Writer", target=self._run)
+        self._shutdown = Event()
+
+        # Estimated number of bytes in the backpack's buffer, as of a time
+        self._buffered = 0.0
+        self._buffered_time = time.monotonic()
+
+        # Metrics. Latency is the time from a frame being queued to its last
+        # byte being written.
+        self._frames_written = 0
+        self._bytes_written = 0
+        self._frames_dropped = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+
+    @property
+    def should_run(self):
+        return not self._shutdown.is_set()
+
+    @property
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    @property
+    def metrics(self):
+        frames = self._frames_written
+        return {
+            "queue_depth": self.queue_depth,
+            "frames_written": frames,
+            "bytes_written": self._bytes_written,
+            "frames_dropped": self._frames_dropped,
+            "mean_latency": self._total_latency / frames if frames else 0.0,
+            "max_latency": self._max_latency,
+        }
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._shutdown.set()
+        self.clear()
+        try:
+            self._queue.put_nowait(None)  # Wake the thread up
+        except queue.Full:
+            pass  # Refilled already, so the thread will see the shutdown
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def write(self, data):
+        """
+        @brief      Queues a frame to be written. Never blocks.
+
+        @param      data  The frame, as a bytes-like object
+
+        @return     False if the queue is full and the frame was dropped
+        """
+        try:
+            self._queue.put_nowait((time.monotonic(), bytes(data)))
+            return True
+        except queue.Full:
+            self._frames_dropped += 1
+            return False
+
+    def clear(self):
+        """
+        @brief      Drops every frame that hasn't been written yet.
+        """
+        try:
+            while True:
+                self._queue.get_nowait()
+                self._frames_dropped += 1
+        except queue.Empty:
+            pass
+
+    def _get_buffer_room(self):
+        now = time.monotonic()
+        drained = (now - self._buffered_time) * self._bytes_per_second
+        self._buffered = max(self._buffered - drained, 0.0)
+        self._buffered_time = now
+        return __class__._BUFFER_SIZE - self._buffered
+
+    def _write_frame(self, data):
+        view = memoryview(data)
+        while view and self.should_run:
+            # Wait until there's room for a decent-sized write
+            needed = min(len(view), __class__._MIN_WRITE_SIZE)
+            room = self._get_buffer_room()
+            if room < needed:
+                time.sleep((needed - room) / self._bytes_per_second)
+                continue
+
+            chunk = view[: int(room)]
+            num_written = self._ser.write(chunk)
+            # Make sure we wrote the expected number of bytes
+            if num_written != len(chunk):
+                logger.error(
+                    f"Expected to send {len(chunk)} bytes"
+                    f" ({format_bytes(chunk)}), but only sent"
+                    f" {num_written} bytes"
+                )
+            self._buffered += len(chunk)
+            view = view[len(chunk) :]
+
+    def _run(self):
+        logger.info("LCD writer started")
+        last_metrics_time = time.monotonic()
+        while self.should_run:
+            item = self._queue.get()
+            if item is None:
+                continue
+            queued_time, data = item
+            self._write_frame(data)
+
+            latency = time.monotonic() - queued_time
+            self._frames_written += 1
+            self._bytes_written += len(data)
+            self._total_latency += latency
+            self._max_latency = max(self._max_latency, latency)
+            logger.debug(
+                f"Wrote {len(data)} bytes to the LCD in"
+                f" {latency * 1000:.0f} ms, {self.queue_depth} frames queued"
+            )
+
+            if queued_time - last_metrics_time >= __class__._METRICS_INTERVAL:
+                last_metrics_time = queued_time
+                logger.info(f"LCD writer metrics: {self.metrics}")
+        logger.info("LCD writer stopped")
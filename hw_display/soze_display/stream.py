@@ -0,0 +1,94 @@
+"""
+The stream transport for LCD frames. The mock display (mock_display/) links
+to this file, so it has to stay free of any hardware imports.
+"""
+
+from threading import Event, Thread
+
+from . import logger
+from .frame import FRAME_FLAG_FULL, next_seq, parse_frame
+
+
+class FrameStream:
+    """
+    Reads LCD frames from the Redis stream that the reducer writes to when it
+    runs with --lcd-stream. Each frame has a sequence number, so if we miss
+    one (e.g. it got trimmed off the stream while we were behind), we ask the
+    reducer for a full redraw and skip everything until it arrives.
+    """
+
+    _STREAM_KEY = "reducer:lcd_stream"
+    _STREAM_FIELD = b"frame"
+    _RESYNC_CHANNEL = "d2r:lcd"
+    # Milliseconds to block on each read, so that a stop is noticed
+    _BLOCK_TIME = 1000
+
+    def __init__(self, redis_client, on_frame):
+        self._redis = redis_client
+        # Called with a memoryview of each frame's payload, in order
+        self._on_frame = on_frame
+        self._thread = Thread(name="LCD-Stream", target=self._run)
+        self._shutdown = Event()
+        self._seq = None  # Sequence number of the last frame we handled
+        self._resyncing = False
+
+    @property
+    def should_run(self):
+        return not self._shutdown.is_set()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._shutdown.set()
+
+    def join(self):
+        self._thread.join()
+
+    def request_resync(self):
+        """
+        @brief      Asks the reducer for a full redraw, and skips every frame
+                    until it arrives.
+        """
+        self._resyncing = True
+        self._seq = None
+        self._redis.publish(__class__._RESYNC_CHANNEL, b"")
+
+    def _handle_frame(self, frame):
+        try:
+            seq, flags, payload = parse_frame(frame)
+        except ValueError as e:
+            logger.error(str(e))
+            self.request_resync()
+            return
+
+        if flags & FRAME_FLAG_FULL:
+            self._resyncing = False
+        elif self._resyncing:
+            return  # Nothing before the redraw is any use
+        elif self._seq is not None and seq != next_seq(self._seq):
+            logger.warning(f"Missed LCD frames {self._seq + 1} to {seq - 1}")
+            self.request_resync()
+            return
+
+        self._seq = seq
+        self._on_frame(payload)
+
+    def _run(self):
+        logger.info("LCD stream started")
+        # Start from the end of the stream. We don't know what's on the LCD,
+        # so anything before that is useless.
+        last = self._redis.xrevrange(__class__._STREAM_KEY, count=1)
+        last_id = last[0][0] if last else b"0-0"
+        self.request_resync()
+
+        while self.should_run:
+            response = self._redis.xread(
+                {__class__._STREAM_KEY: last_id},
+                block=__class__._BLOCK_TIME,
+            )
+            for _, entries in response:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    self._handle_frame(fields[__class__._STREAM_FIELD])
+        logger.info("LCD stream stopped")
@@ -0,0 +1,65 @@
+import threading
+import unittest
+
+# These tests run against the hardware mocks (pip install -e mocks/), which
+# log to mock_logs/
+import RPi.GPIO as GPIO
+
+from soze_display.keepalive import Keepalive
+
+
+class RecordingRedis:
+    """Records the values the keepalive publishes, instead of sending them"""
+
+    def __init__(self):
+        self.values = []
+        self._cond = threading.Condition()
+
+    def pipeline(self):
+        return self
+
+    def set(self, key, value):
+        pass
+
+    def publish(self, channel, msg):
+        with self._cond:
+            self.values.append(msg)
+            self._cond.notify_all()
+
+    def execute(self):
+        pass
+
+    def wait_for_values(self, n, timeout=1.0):
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self.values) >= n, timeout)
+
+
+class KeepaliveTestCase(unittest.TestCase):
+
+    PIN = 4
+
+    def setUp(self):
+        self.redis = RecordingRedis()
+        self.keepalive = Keepalive(self.redis, pin=__class__.PIN)
+        self.keepalive.init()
+        self.keepalive.start()
+        # The initial value is always pushed
+        self.assertTrue(self.redis.wait_for_values(1))
+
+    def tearDown(self):
+        self.keepalive.stop()
+        self.keepalive.cleanup()
+
+    def test_edge_pushes_immediately(self):
+        GPIO.set_input(__class__.PIN, 0)
+        # Much less than the heartbeat interval
+        self.assertTrue(self.redis.wait_for_values(2, timeout=0.5))
+        GPIO.set_input(__class__.PIN, 1)
+        self.assertTrue(self.redis.wait_for_values(3, timeout=0.5))
+        self.assertEqual([b"\x01", b"\x00", b"\x01"], self.redis.values)
+
+    def test_no_push_without_edge(self):
+        # Setting the same value again isn't an edge
+        GPIO.set_input(__class__.PIN, 1)
+        self.assertFalse(self.redis.wait_for_values(2, timeout=0.3))
+        self.assertEqual([b"\x01"], self.redis.values)
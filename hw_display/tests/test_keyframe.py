@@ -0,0 +1,52 @@
+import struct
+import unittest
+
+from soze_display.keyframe import Keyframe
+
+
+def keyframe_bytes(start, end, start_time, duration_ms, interpolation):
+    return struct.pack(
+        ">3s3sdIB", start, end, start_time, duration_ms, interpolation
+    )
+
+
+class KeyframeTestCase(unittest.TestCase):
+    def test_linear(self):
+        keyframe = Keyframe.from_bytes(
+            keyframe_bytes(b"\x00\x00\xff", b"\xff\x00\x00", 100.0, 2000, 0)
+        )
+        self.assertEqual((b"\x00\x00\xff", False), keyframe.get_color(99.0))
+        self.assertEqual((b"\x80\x00\x80", False), keyframe.get_color(101.0))
+        self.assertEqual((b"\xff\x00\x00", True), keyframe.get_color(102.0))
+
+    def test_gamma(self):
+        keyframe = Keyframe.from_bytes(
+            keyframe_bytes(b"\x00\x00\x00", b"\xff\xff\xff", 100.0, 2000, 1)
+        )
+        # Half of the light is well over half of the sRGB value
+        color, finished = keyframe.get_color(101.0)
+        self.assertEqual(bytes([188] * 3), color)
+        self.assertFalse(finished)
+
+    def test_gamma_endpoints(self):
+        start, end = b"\x0a\x80\xfa", b"\xc8\x1e\x00"
+        keyframe = Keyframe.from_bytes(
+            keyframe_bytes(start, end, 100.0, 2000, 1)
+        )
+        # Colors are shown as chosen, at both ends of the keyframe
+        self.assertEqual((start, False), keyframe.get_color(100.0))
+        self.assertEqual((end, True), keyframe.get_color(102.0))
+        # A keyframe that stays on one color never changes it
+        keyframe = Keyframe.from_bytes(
+            keyframe_bytes(start, start, 100.0, 2000, 1)
+        )
+        self.assertEqual((start, False), keyframe.get_color(101.0))
+        self.assertEqual((start, True), keyframe.get_color(105.0))
+
+    def test_static(self):
+        keyframe = Keyframe.static(b"\x01\x02\x03")
+        self.assertEqual((b"\x01\x02\x03", True), keyframe.get_color(0))
+
+    def test_malformed(self):
+        with self.assertRaises(ValueError):
+            Keyframe.from_bytes(b"\x00\x00\x00")
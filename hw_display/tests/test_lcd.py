@@ -0,0 +1,80 @@
+import unittest
+
+from soze_display.frame import FRAME_FLAG_FULL, FRAME_HEADER, parse_frame
+from soze_display.lcd import Lcd
+
+
+def frame(seq, payload, flags=0):
+    return FRAME_HEADER.pack(seq, flags, len(payload)) + payload
+
+
+class NullPubSub:
+    def subscribe(self, **kwargs):
+        pass
+
+
+class LcdCatchUpTestCase(unittest.TestCase):
+    def setUp(self):
+        self.lcd = Lcd("/dev/null", redis_client=None, pubsub=NullPubSub())
+        self.lcd._seq = 4
+        self.snapshot = frame(9, b"snap", FRAME_FLAG_FULL)
+        self.latest_seq = 9
+
+    def get_payloads(self, frames):
+        frames = [parse_frame(f) for f in frames]
+        to_write = self.lcd._get_frames_to_write(
+            frames, self.snapshot, self.latest_seq
+        )
+        if to_write is None:
+            return None
+        return [bytes(payload) for _, _, payload in to_write]
+
+    def test_in_sync(self):
+        frames = [frame(seq, b"%d" % seq) for seq in range(5, 10)]
+        self.assertEqual(
+            [b"5", b"6", b"7", b"8", b"9"], self.get_payloads(frames)
+        )
+
+    def test_behind(self):
+        # Too many frames, or missing frames, skips to the snapshot
+        frames = [frame(seq, b"%d" % seq) for seq in range(5, 17)]
+        self.assertEqual(
+            [b"snap"] + [b"%d" % seq for seq in range(10, 17)],
+            self.get_payloads(frames),
+        )
+        frames = [frame(8, b""), frame(10, b"10")]
+        self.assertEqual([b"snap", b"10"], self.get_payloads(frames))
+        # We don't know what's on the LCD
+        self.lcd._seq = None
+        self.assertEqual([b"snap"], self.get_payloads([]))
+
+    def test_stale_snapshot(self):
+        # The queue got trimmed past the frame after the snapshot, so the
+        # snapshot doesn't cover what we missed. Writing the rest would garble
+        # the LCD, so we need a redraw.
+        self.assertIsNone(self.get_payloads([frame(11, b"11")]))
+        self.lcd._seq = None
+        self.assertIsNone(self.get_payloads([frame(11, b"11")]))
+        # Nothing's queued, but frames were pushed after the snapshot (and
+        # another display emptied the queue), so the snapshot is out of date
+        self.latest_seq = 12
+        self.assertIsNone(self.get_payloads([]))
+        # Same if we can't tell
+        self.latest_seq = None
+        self.assertIsNone(self.get_payloads([]))
+        # Same if there's no snapshot at all
+        self.snapshot = None
+        self.assertIsNone(self.get_payloads([frame(6, b"6")]))
+        self.assertIsNone(self.get_payloads([]))
+        # If we're only behind, and didn't miss anything, the frames are fine
+        self.lcd._seq = 4
+        frames = [frame(seq, b"%d" % seq) for seq in range(5, 17)]
+        self.assertEqual(12, len(self.get_payloads(frames)))
+
+    def test_full_frame(self):
+        frames = [
+            frame(5, b"5"),
+            frame(6, b"6", FRAME_FLAG_FULL),
+            frame(7, b"7"),
+        ]
+        self.assertEqual([b"6", b"7"], self.get_payloads(frames))
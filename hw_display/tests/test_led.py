@@ -0,0 +1,100 @@
+import struct
+import time
+import unittest
+
+from soze_display.led import Led
+
+
+class FakeRedis:
+    def __init__(self, keyframe=None):
+        self.color = b"\x00\x00\x00"
+        self.keyframe = keyframe
+
+    def get(self, key):
+        return self.keyframe if key == "reducer:led_keyframe" else self.color
+
+
+class NullPubSub:
+    def subscribe(self, **kwargs):
+        pass
+
+
+class LedTestCase(unittest.TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.led = self.make_led()
+        # The current color is written on startup
+        self.assertTrue(self.wait_for_duty_cycles(lambda d: d == 255))
+        self.hat.i2c_writes = 0
+
+    def tearDown(self):
+        self.led.cleanup()
+
+    def make_led(self):
+        led = Led(
+            hat_addr=0x60,
+            pins=[3, 1, 2],
+            max_refresh_rate=20,
+            redis_client=self.redis,
+            pubsub=NullPubSub(),
+        )
+        led.init()
+        self.hat = led._hat
+        return led
+
+    def wait_for_writes(self, n, timeout=1.0):
+        end = time.monotonic() + timeout
+        while self.hat.i2c_writes < n and time.monotonic() < end:
+            time.sleep(0.001)
+        return self.hat.i2c_writes
+
+    def wait_for_duty_cycles(self, check, timeout=1.0):
+        end = time.monotonic() + timeout
+        while time.monotonic() < end:
+            duty_cycles = self.led._duty_cycles
+            if all(d is not None and check(d) for d in duty_cycles):
+                return True
+            time.sleep(0.001)
+        return False
+
+    def pub(self, color):
+        self.redis.color = color
+        self.led._on_pub({"data": b""})
+
+    def test_dedupe(self):
+        self.pub(b"\x01\x02\x03")
+        self.assertEqual(3, self.wait_for_writes(3))
+        # Only channels that changed are written
+        time.sleep(0.06)
+        self.pub(b"\x01\x02\x04")
+        self.assertEqual(4, self.wait_for_writes(4))
+        time.sleep(0.06)
+        self.pub(b"\x01\x02\x04")
+        time.sleep(0.06)
+        self.assertEqual(4, self.hat.i2c_writes)
+
+    def test_coalesce(self):
+        self.pub(b"\x01\x01\x01")
+        self.assertEqual(3, self.wait_for_writes(3))
+        # These all come in before the next write is allowed, so only the
+        # last one is written
+        for i in range(2, 10):
+            self.pub(bytes([i, 1, 1]))
+        time.sleep(0.1)
+        self.assertEqual(4, self.hat.i2c_writes)
+        self.assertEqual(255 - 9, self.led._duty_cycles[0])
+
+    def test_startup_keyframe(self):
+        # Restart in the middle of a fade from black to white
+        self.led.cleanup()
+        self.redis = FakeRedis(
+            keyframe=struct.pack(
+                ">3s3sdIB", b"\x00" * 3, b"\xff" * 3, time.time() - 1, 2000, 0
+            )
+        )
+        self.led = self.make_led()
+        self.assertTrue(self.wait_for_duty_cycles(lambda d: d < 255))
+        # Somewhere around halfway through the fade, not sitting on black
+        duty_cycle = self.led._duty_cycles[0]
+        self.assertLess(duty_cycle, 150)
+        self.assertGreater(duty_cycle, 0)
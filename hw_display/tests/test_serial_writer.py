@@ -0,0 +1,73 @@
+import threading
+import time
+import unittest
+
+from soze_display.serial_writer import SerialWriter
+
+
+class RecordingSerial:
+    """Records what gets written, instead of sending it"""
+
+    def __init__(self):
+        self.writes = []
+        self.cond = threading.Condition()
+
+    def write(self, data):
+        with self.cond:
+            self.writes.append(bytes(data))
+            self.cond.notify_all()
+        return len(data)
+
+    def wait_for_bytes(self, n, timeout=1.0):
+        with self.cond:
+            return self.cond.wait_for(
+                lambda: sum(map(len, self.writes)) >= n, timeout
+            )
+
+
+class SerialWriterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.ser = RecordingSerial()
+        # Fast enough that the test doesn't take long, but slow enough that
+        # pacing is needed
+        self.writer = SerialWriter(self.ser, baudrate=64000)
+
+    def tearDown(self):
+        self.writer.stop()
+
+    def test_pacing(self):
+        self.writer.start()
+        data = bytes(range(200))
+        start = time.monotonic()
+        self.assertTrue(self.writer.write(data))
+        self.assertTrue(self.ser.wait_for_bytes(len(data)))
+
+        self.assertEqual(data, b"".join(self.ser.writes))
+        # Never more than the backpack can buffer at once
+        self.assertLessEqual(max(map(len, self.ser.writes)), 64)
+        # The rest has to wait for the buffer to drain (6400 bytes/s)
+        self.assertGreaterEqual(time.monotonic() - start, 136 / 6400)
+
+    def test_queue_full(self):
+        # Nothing is written until the thread starts
+        for _ in range(32):
+            self.assertTrue(self.writer.write(b"a"))
+        self.assertFalse(self.writer.write(b"b"))
+        self.assertEqual(32, self.writer.queue_depth)
+
+        self.writer.clear()
+        self.assertEqual(0, self.writer.queue_depth)
+        self.assertEqual(33, self.writer.metrics["frames_dropped"])
+        self.writer.start()
+
+    def test_stop(self):
+        # Stopping a writer that never started doesn't fail or block, even
+        # with a full queue
+        writer = SerialWriter(self.ser, baudrate=64000)
+        writer.stop()
+        writer = SerialWriter(self.ser, baudrate=64000)
+        writer.clear = lambda: None  # As if the queue got refilled
+        for _ in range(32):
+            writer.write(b"a")
+        writer.stop()
+        self.assertFalse(writer.should_run)
@@ -0,0 +1,51 @@
+import struct
+import unittest
+
+from soze_display.stream import FrameStream
+
+HEADER = struct.Struct(">IBH")
+FULL = 0x01
+
+
+def frame(seq, payload, flags=0):
+    return HEADER.pack(seq, flags, len(payload)) + payload
+
+
+class RecordingRedis:
+    """Records resync requests, instead of sending them"""
+
+    def __init__(self):
+        self.resyncs = 0
+
+    def publish(self, channel, msg):
+        self.resyncs += 1
+
+
+class FrameStreamTestCase(unittest.TestCase):
+    def setUp(self):
+        self.redis = RecordingRedis()
+        self.frames = []
+        self.stream = FrameStream(
+            self.redis, on_frame=lambda data: self.frames.append(bytes(data))
+        )
+
+    def test_frames(self):
+        self.stream._handle_frame(frame(7, b"a", FULL))
+        self.stream._handle_frame(frame(8, b"b"))
+        self.assertEqual([b"a", b"b"], self.frames)
+        self.assertEqual(0, self.redis.resyncs)
+
+    def test_gap(self):
+        self.stream._handle_frame(frame(7, b"a", FULL))
+        self.stream._handle_frame(frame(9, b"c"))
+        self.assertEqual(1, self.redis.resyncs)
+        # Everything is skipped until the redraw
+        self.stream._handle_frame(frame(10, b"d"))
+        self.stream._handle_frame(frame(11, b"e", FULL))
+        self.stream._handle_frame(frame(12, b"f"))
+        self.assertEqual([b"a", b"e", b"f"], self.frames)
+
+    def test_malformed(self):
+        self.stream._handle_frame(frame(7, b"a", FULL)[:-1])
+        self.assertEqual([], self.frames)
+        self.assertEqual(1, self.redis.resyncs)
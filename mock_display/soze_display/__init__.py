@@ -0,0 +1,24 @@
+import logging.config
+
+logging.config.dictConfig(
+    {
+        "version": 1,
+        "formatters": {
+            "f": {
+                "format": "{asctime} [{threadName} {levelname}] {message}",
+                "datefmt": "%Y-%m-%d %H:%M:%S",
+                "style": "{",
+            }
+        },
+        "handlers": {
+            "file": {
+                "class": "logging.FileHandler",
+                "formatter": "f",
+                "filename": "display.log",
+                "mode": "w",
+            }
+        },
+        "loggers": {__name__: {"handlers": ["file"], "level": "DEBUG"}},
+    }
+)
+logger = logging.getLogger(__name__)
@@ -14,9 +14,15 @@ def main(stdscr):
         default="redis://localhost:6379",
         help="URL for the Redis host",
     )
+    parser.add_argument(
+        "--lcd-stream",
+        action="store_true",
+        help="Read LCD frames from a Redis stream instead of a list. The"
+        " reducer must be run with the same option.",
+    )
     args = parser.parse_args()
 
-    SozeDisplay(args.redis).run()
+    SozeDisplay(args.redis, lcd_stream=args.lcd_stream).run()
 
 
 curses.wrapper(main)
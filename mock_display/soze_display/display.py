@@ -1,37 +1,18 @@
 import abc
 import curses
 import itertools
-import logging.config
 import redis
 import signal
 import time
 import traceback
 from threading import Event, Thread
 
+from . import logger
 from .color import BLACK, Color
-
-logging.config.dictConfig(
-    {
-        "version": 1,
-        "formatters": {
-            "f": {
-                "format": "{asctime} [{threadName} {levelname}] {message}",
-                "datefmt": "%Y-%m-%d %H:%M:%S",
-                "style": "{",
-            }
-        },
-        "handlers": {
-            "file": {
-                "class": "logging.FileHandler",
-                "formatter": "f",
-                "filename": "display.log",
-                "mode": "w",
-            }
-        },
-        "loggers": {__name__: {"handlers": ["file"], "level": "DEBUG"}},
-    }
-)
-logger = logging.getLogger(__name__)
+# Shared with the hardware display, through symlinks
+from .frame import get_frames_to_write, parse_frame
+from .keyframe import Keyframe
+from .stream import FrameStream
 
 
 # Special signals for the controller
@@ -67,7 +48,8 @@ class Resource:
     def __init__(self, redis_client, pubsub, dimensions, sub_channel):
         self._redis = redis_client
         self._pubsub = pubsub
-        self._pubsub.subscribe(**{sub_channel: self._on_pub})
+        if sub_channel is not None:
+            self._pubsub.subscribe(**{sub_channel: self._on_pub})
 
         x, y, width, height = dimensions
         self._window = curses.newwin(height, width, y, x)
@@ -83,17 +65,45 @@ class Led(Resource):
     """
 
     _COLOR_KEY = "reducer:led_color"
+    # Only set while the reducer is sending keyframes
+    _KEYFRAME_KEY = "reducer:led_keyframe"
 
     def __init__(self, *args, **kwargs):
         super().__init__(
             dimensions=(0, 0, 50, 1), sub_channel="r2d:led", *args, **kwargs
         )
+        self._keyframe = None
         self._set_color(BLACK)
 
+    def start(self):
+        # Pick up a fade that's already going, instead of sitting on the wrong
+        # color until the next keyframe
+        self._on_pub({"data": self._redis.get(__class__._KEYFRAME_KEY)})
+
     def _on_pub(self, msg):
-        # Fetch the correct color from Redis and set it
-        color = Color.from_bytes(self._redis.get(__class__._COLOR_KEY))
-        self._set_color(color)
+        try:
+            if msg["data"]:
+                # Interpolated in update()
+                self._keyframe = Keyframe.from_bytes(msg["data"])
+            else:
+                # Fetch the correct color from Redis and set it
+                self._keyframe = None
+                data = self._redis.get(__class__._COLOR_KEY)
+                self._set_color(Color.from_bytes(data))
+        except Exception:
+            logger.error(traceback.format_exc())
+
+    def update(self):
+        """
+        @brief      Moves the current keyframe (if any) along. Called on every
+                    screen refresh.
+        """
+        keyframe = self._keyframe
+        if keyframe is not None:
+            color, finished = keyframe.get_color(time.time())
+            self._set_color(Color.from_bytes(color))
+            if finished:
+                self._keyframe = None
 
     def _set_color(self, color):
         curses_color = curses.color_pair(color.to_term_color())
@@ -111,6 +121,12 @@ class Lcd(Resource):
     """
 
     _COMMAND_QUEUE_KEY = "reducer:lcd_commands"
+    _SNAPSHOT_KEY = "reducer:lcd_snapshot"
+    _LATEST_SEQ_KEY = "reducer:lcd_latest_seq"
+    # Where we ask the reducer for a full redraw
+    _RESYNC_CHANNEL = "d2r:lcd"
+    # If more frames than this are queued up, skip to the snapshot instead
+    _MAX_BACKLOG = 10
 
     def command(code, num_args=0):
         def inner(func):
@@ -122,9 +138,18 @@ class Lcd(Resource):
 
         return inner
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, stream=False, **kwargs):
+        # In stream mode, frames come from the stream instead of pubs
         super().__init__(
-            dimensions=(0, 1, 0, 0), sub_channel="r2d:lcd", *args, **kwargs
+            dimensions=(0, 1, 0, 0),
+            sub_channel=None if stream else "r2d:lcd",
+            *args,
+            **kwargs,
+        )
+        self._stream = (
+            FrameStream(self._redis, on_frame=self._on_frame)
+            if stream
+            else None
         )
 
         # Unfortunately this has to be hardcoded
@@ -142,6 +167,9 @@ class Lcd(Resource):
 
         self._width, self._height = 20, 4
         self._cursor_x, self._cursor_y = 0, 0
+        # Sequence number of the last frame we processed, None if we don't
+        # know what the LCD is showing
+        self._seq = None
 
     @command(CMD_CLEAR)
     def _clear(self):
@@ -227,8 +255,8 @@ class Lcd(Resource):
             except KeyError:
                 return chr(b)
 
-        # Data is a list of bytes objects, of varying lengths. Build a flat
-        # iterator of ints so we can process each command one at a time.
+        # Data is a list of bytes-like objects, of varying lengths. Build a
+        # flat iterator of ints so we can process each command one at a time.
         byte_buffer = itertools.chain.from_iterable(data)
 
         # Iterate through the iterator
@@ -252,25 +280,66 @@ class Lcd(Resource):
                 # it to screen
                 self._write_str(decode_byte(first_byte))
 
+    def _request_redraw(self):
+        logger.warning("Lost track of the LCD, asking for a redraw")
+        self._seq = None
+        self._redis.publish(__class__._RESYNC_CHANNEL, b"")
+
     def _on_pub(self, msg):
         try:
             # Get all data elements from the command queue in Redis, then delete
             # the queue. Doing this in a pipeline makes it atomic/consecutive,
-            # so there can't be any race conditions.
+            # so there can't be any race conditions. The snapshot comes along
+            # in case we're too far behind, with the latest sequence number to
+            # tell if it's out of date.
             p = self._redis.pipeline()
             p.lrange(__class__._COMMAND_QUEUE_KEY, 0, -1)
             p.delete(__class__._COMMAND_QUEUE_KEY)
-            data, _ = p.execute()
+            p.get(__class__._SNAPSHOT_KEY)
+            p.get(__class__._LATEST_SEQ_KEY)
+            data, _, snapshot, latest_seq = p.execute()
+
+            frames = get_frames_to_write(
+                [parse_frame(frame) for frame in data],
+                snapshot,
+                int(latest_seq) if latest_seq is not None else None,
+                self._seq,
+                __class__._MAX_BACKLOG,
+            )
+            if frames is None:
+                self._request_redraw()
+                return
+            self._process_data([payload for _, _, payload in frames])
+            if frames:
+                self._seq = frames[-1][0]
+        except Exception:
+            self._seq = None  # Use the snapshot next time
+            logger.error(traceback.format_exc())
 
-            self._process_data(data)
+    def _on_frame(self, data):
+        try:
+            self._process_data([data])
         except Exception:
             logger.error(traceback.format_exc())
 
+    def start(self):
+        if self._stream:
+            self._stream.start()
+        else:
+            # Catch up with whatever the reducer already sent
+            self._on_pub(None)
+
+    def stop(self):
+        if self._stream:
+            self._stream.stop()
+
 
 class Keepalive(Thread):
 
     _KEEPALIVE_KEY = "reducer:keepalive"
     _KEEPALIVE_CHANNEL = "r2d:keepalive"
+    # The mock is always alive, so only a heartbeat is needed (in seconds)
+    _HEARTBEAT_INTERVAL = 10
 
     def __init__(self, redis_client, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -287,22 +356,25 @@ class Keepalive(Thread):
     def run(self):
         logger.info("Keepalive started")
         while self.should_run:
-            # Update
-            self._redis.set(__class__._KEEPALIVE_KEY, b"\x01")
-            self._redis.publish(__class__._KEEPALIVE_CHANNEL, b"")
-            time.sleep(1)
+            # Update. The value goes in the message so the reducer doesn't have
+            # to read it back.
+            p = self._redis.pipeline()
+            p.set(__class__._KEEPALIVE_KEY, b"\x01")
+            p.publish(__class__._KEEPALIVE_CHANNEL, b"\x01")
+            p.execute()
+            self._shutdown.wait(__class__._HEARTBEAT_INTERVAL)
         logger.info("Keepalive stopped")
 
 
 class SozeDisplay:
-    def __init__(self, redis_url):
+    def __init__(self, redis_url, lcd_stream=False):
         redis_client = redis.from_url(redis_url)
         self._pubsub = redis_client.pubsub()
 
         self._should_run = True
         self._keepalive = Keepalive(redis_client)
-        Led(redis_client, self._pubsub)
-        Lcd(redis_client, self._pubsub)
+        self._led = Led(redis_client, self._pubsub)
+        self._lcd = Lcd(redis_client, self._pubsub, stream=lcd_stream)
 
         # Curses init
         curses.curs_set(0)  # Hide the cursor
@@ -325,9 +397,12 @@ class SozeDisplay:
             # Start threads
             self._keepalive.start()
             self._pubsub_thread = self._pubsub.run_in_thread()
+            self._led.start()
+            self._lcd.start()
 
             # Constantly refresh curses, wait for Ctrl+c
             while self._should_run:
+                self._led.update()
                 curses.doupdate()
                 time.sleep(0.1)
         except Exception:
@@ -342,3 +417,4 @@ class SozeDisplay:
     def _stop_threads(self):
         self._pubsub_thread.stop()  # Will unsub from all channels
         self._keepalive.stop()
+        self._lcd.stop()
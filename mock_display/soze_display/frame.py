@@ -0,0 +1 @@
+../../hw_display/soze_display/frame.py
\ No newline at end of file
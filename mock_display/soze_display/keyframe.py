@@ -0,0 +1 @@
+../../hw_display/soze_display/keyframe.py
\ No newline at end of file
@@ -0,0 +1 @@
+../../hw_display/soze_display/stream.py
\ No newline at end of file
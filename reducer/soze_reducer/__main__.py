@@ -1,5 +1,6 @@
 import argparse
 
+from soze_reducer.core.async_reducer import AsyncSozeReducer
 from soze_reducer.core.reducer import SozeReducer
 
 
@@ -10,6 +11,19 @@ parser.add_argument(
     default="redis://localhost:6379",
     help="URL for the Redis host",
 )
+parser.add_argument(
+    "--async",
+    dest="use_async",
+    action="store_true",
+    help="Run everything on one asyncio event loop instead of threads",
+)
+parser.add_argument(
+    "--lcd-stream",
+    action="store_true",
+    help="Send LCD frames over a Redis stream instead of a list. The display"
+    " must be run with the same option.",
+)
 args = parser.parse_args()
 
-SozeReducer(args.redis).run()
+reducer_class = AsyncSozeReducer if args.use_async else SozeReducer
+reducer_class(args.redis, lcd_stream=args.lcd_stream).run()
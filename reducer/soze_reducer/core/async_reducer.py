@@ -0,0 +1,125 @@
+import asyncio
+import functools
+import signal
+import traceback
+
+import redis.asyncio as redis
+
+from soze_reducer import logger
+from soze_reducer.led.led import Led
+from soze_reducer.lcd.lcd import Lcd
+from .keepalive import Keepalive
+from .reducer import LED_CONFIG
+
+
+class AsyncSozeReducer:
+    """
+    Runs the same resources as SozeReducer, but everything (pubsub handling,
+    keepalive handling and each resource's updates) is a task on one asyncio
+    event loop, instead of a thread each.
+    """
+
+    def __init__(self, redis_url, lcd_stream=False):
+        self._redis = redis.from_url(redis_url)
+        self._pubsub = self._redis.pubsub()
+
+        self._keepalive = Keepalive()
+        # Each resource gets its own pipeline to queue writes on and its own
+        # wake event. Its task flushes the pipeline after every step.
+        self._resources = [
+            self._make_resource(Led, **LED_CONFIG),
+            self._make_resource(Lcd, stream=lcd_stream),
+        ]
+        resources = [res for res, _, _ in self._resources]
+        lcd = resources[-1]
+        # The keepalive goes first, so that the resources see a status change
+        # during the same refresh
+        self._subscribers = (
+            [self._keepalive] + resources + [lcd.resync_subscriber]
+        )
+
+    def _make_resource(self, resource_class, **kwargs):
+        pipeline = self._redis.pipeline(transaction=False)
+        wake_event = asyncio.Event()
+        resource = resource_class(
+            redis_client=pipeline,
+            keepalive=self._keepalive,
+            wake_event=wake_event,
+            **kwargs,
+        )
+        return (resource, pipeline, wake_event)
+
+    def run(self):
+        asyncio.run(self._run())
+
+    async def _on_pub(self, subscriber, msg):
+        subscriber.on_pub(msg)
+        await self._refresh()
+
+    async def _refresh(self):
+        """Load whatever data the subscribers need from Redis."""
+        for sub in self._subscribers:
+            keys = sub.get_stale_keys()
+            if keys:
+                sub.load(await self._redis.mget(keys))
+
+    async def _run_resource(self, resource, pipeline, wake_event):
+        try:
+            logger.info(f"Starting {resource.name} task")
+            resource.init()
+            await pipeline.execute()
+            while True:
+                timeout = resource.step()
+                await pipeline.execute()
+                # Sleep until the output would change, or until we get woken up
+                try:
+                    await asyncio.wait_for(wake_event.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.error(traceback.format_exc())
+        finally:
+            logger.info(f"Stopped {resource.name} task")
+
+    async def _run(self):
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop_event.set)
+
+        await self._pubsub.subscribe(
+            **{
+                sub.sub_channel: functools.partial(self._on_pub, sub)
+                for sub in self._subscribers
+            }
+        )
+        # Load initial state before anything starts
+        await self._refresh()
+
+        tasks = [asyncio.create_task(self._pubsub.run())] + [
+            asyncio.create_task(self._run_resource(*res))
+            for res in self._resources
+        ]
+        logger.info("Started tasks")
+        try:
+            await stop_event.wait()
+        finally:
+            await self._stop(tasks)
+
+    async def _stop(self, tasks):
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Push the final values for each resource
+        for resource, pipeline, _ in self._resources:
+            # Drop anything left over from a cancelled step
+            await pipeline.reset()
+            resource.cleanup()
+            await pipeline.execute()
+
+        await self._pubsub.unsubscribe()  # This will unsub from all channels
+        await self._pubsub.aclose()
+        await self._redis.aclose()
@@ -1,8 +1,4 @@
-def _coerce(r, g, b):
-    def helper(val):
-        return min(max(int(val), 0), 255)
-
-    return (helper(r), helper(g), helper(b))
+from array import array
 
 
 def _check(val):
@@ -13,29 +9,63 @@ def _check(val):
     return val
 
 
+def _clamp(val):
+    return min(max(int(val), 0), 255)
+
+
 class Color:
+    """
+    An immutable RGB color, stored as a single packed 24-bit int. Colors are
+    created on every LED/LCD frame, so internal arithmetic skips validation
+    and commonly used values are interned.
+    """
+
+    __slots__ = ("_value",)
+
+    # Interned instances, keyed by packed value. See _unchecked.
+    _INTERNED = {}
+
     def __init__(self, red, green, blue):
-        self._r = _check(red)
-        self._g = _check(green)
-        self._b = _check(blue)
+        self._value = (_check(red) << 16) | (_check(green) << 8) | _check(blue)
+
+    @classmethod
+    def _unchecked(cls, value):
+        """
+        @brief      Fast constructor for internal use. The value must already
+                    be a valid packed color.
+        """
+        color = cls._INTERNED.get(value)
+        if color is None:
+            color = object.__new__(cls)
+            color._value = value
+        return color
+
+    @classmethod
+    def _intern(cls, color):
+        cls._INTERNED[color._value] = color
+        return color
 
     @classmethod
     def from_hexcode(cls, hex_val):
-        return cls(
-            (hex_val >> 16) & 0xFF, (hex_val >> 8) & 0xFF, hex_val & 0xFF
-        )
+        # Same as _unchecked, inlined because this is called on every frame
+        value = hex_val & 0xFFFFFF
+        color = cls._INTERNED.get(value)
+        if color is None:
+            color = object.__new__(cls)
+            color._value = value
+        return color
 
     @property
     def red(self):
-        return self._r
+        return self._value >> 16
 
     @property
     def green(self):
-        return self._g
+        return (self._value >> 8) & 0xFF
 
     @property
     def blue(self):
-        return self._b
+        return self._value & 0xFF
 
     def blend(self, other, bias=0.5):
         """
@@ -49,27 +79,57 @@ class Color:
         """
         if bias < 0 or 1 < bias:
             raise ValueError(f"Bias must be in range [0, 1], but was {bias}")
-        other_bias = 1.0 - bias
+        return __class__._unchecked(
+            __class__._mix(self._value, other._value, 1.0 - bias)
+        )
 
-        def mix(this, other):
-            return int(this * bias + other * other_bias)
+    @staticmethod
+    def _mix(value1, value2, bias):
+        """
+        @brief      Mix two packed colors, with the given bias towards the
+                    second one [0, 1].
+        """
+        bias1 = 1.0 - bias
+        r1, g1, b1 = value1 >> 16, (value1 >> 8) & 0xFF, value1 & 0xFF
+        r2, g2, b2 = value2 >> 16, (value2 >> 8) & 0xFF, value2 & 0xFF
+        # Round each channel (+0.5), since truncating visibly steps at low
+        # brightness
+        return (
+            (int(r1 * bias1 + r2 * bias + 0.5) << 16)
+            | (int(g1 * bias1 + g2 * bias + 0.5) << 8)
+            | int(b1 * bias1 + b2 * bias + 0.5)
+        )
+
+    def gradient(self, other, num_steps):
+        """
+        @brief      Batch version of blend. Computes a gradient from this color
+                    towards another one, without creating any Color objects.
 
-        return Color(
-            mix(self.red, other.red),
-            mix(self.green, other.green),
-            mix(self.blue, other.blue),
+        @param      self       The object
+        @param      other      The color to fade towards
+        @param      num_steps  The number of colors in the gradient. The first
+                               is this color, and the last is one step short
+                               of the other color.
+
+        @return     The gradient, as an array of packed colors
+        """
+        mix = __class__._mix
+        value1, value2 = self._value, other._value
+        return array(
+            "L", (mix(value1, value2, i / num_steps) for i in range(num_steps))
         )
 
+    def __int__(self):
+        return self._value
+
     def __eq__(self, other):
-        return (
-            isinstance(other, Color)
-            and self.red == other.red
-            and self.green == other.green
-            and self.blue == other.blue
-        )
+        return isinstance(other, Color) and self._value == other._value
+
+    def __hash__(self):
+        return self._value
 
     def __bytes__(self):
-        return bytes([self.red, self.green, self.blue])
+        return self._value.to_bytes(3, "big")
 
     def __str__(self):
         return f"({self.red}, {self.green}, {self.blue})"
@@ -83,12 +143,12 @@ class Color:
                 "unsupported operand type(s) for +:"
                 f" '{type(self)}' and '{type(other)}'"
             )
-        r, g, b = _coerce(
-            self.red + other.red,
-            self.green + other.green,
-            self.blue + other.blue,
+        value1, value2 = self._value, other._value
+        return __class__._unchecked(
+            (min((value1 >> 16) + (value2 >> 16), 255) << 16)
+            | (min(((value1 >> 8) & 0xFF) + ((value2 >> 8) & 0xFF), 255) << 8)
+            | min((value1 & 0xFF) + (value2 & 0xFF), 255)
         )
-        return Color(r, g, b)
 
     def __mul__(self, coeff):
         if not isinstance(coeff, int) and not isinstance(coeff, float):
@@ -96,10 +156,18 @@ class Color:
                 "unsupported operand type(s) for *:"
                 f" '{type(self)}' and '{type(coeff)}'"
             )
-        r, g, b = _coerce(
-            self.red * coeff, self.green * coeff, self.blue * coeff
+        value = self._value
+        r, g, b = value >> 16, (value >> 8) & 0xFF, value & 0xFF
+        if 0 <= coeff <= 1:
+            # Can't leave the valid range, so no clamping is needed
+            packed = (int(r * coeff) << 16) | (int(g * coeff) << 8)
+            return __class__._unchecked(packed | int(b * coeff))
+        return __class__._unchecked(
+            (_clamp(r * coeff) << 16)
+            | (_clamp(g * coeff) << 8)
+            | _clamp(b * coeff)
         )
-        return Color(r, g, b)
 
 
-BLACK = Color(0, 0, 0)
+BLACK = Color._intern(Color(0, 0, 0))
+WHITE = Color._intern(Color(255, 255, 255))
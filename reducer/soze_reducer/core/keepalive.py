@@ -2,7 +2,7 @@ import struct
 from enum import Enum
 
 from soze_reducer import logger
-from .resource import RedisSubscriber
+from .subscriber import RedisSubscriber
 
 
 class Status(Enum):
@@ -17,6 +17,8 @@ class Keepalive(RedisSubscriber):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, sub_channel="r2d:keepalive", **kwargs)
         self._alive = False
+        # Read the current value on startup instead of waiting for a pub
+        self._stale = True
         # List of functions to call after a status change
         self._listeners = []
 
@@ -28,11 +30,26 @@ class Keepalive(RedisSubscriber):
     def register_listener(self, listener):
         self._listeners.append(listener)
 
-    def _on_pub(self, msg):
+    def on_pub(self, msg):
+        # The display sends the value in the message. Older displays send an
+        # empty message and only set the key, so fall back to reading that.
+        if msg["data"]:
+            self._set_value(msg["data"])
+        else:
+            self._stale = True
+
+    def get_stale_keys(self):
+        return [__class__._KEEPALIVE_KEY] if self._stale else []
+
+    def load(self, values):
+        (redis_value,) = values
+        self._stale = False
+        if redis_value is not None:  # None if the display hasn't written it yet
+            self._set_value(redis_value)
+
+    def _set_value(self, value):
         # struct.unpack returns a 1-tuple, we want to get the only field
-        is_alive, = struct.unpack(
-            "?", self._redis.get(__class__._KEEPALIVE_KEY)
-        )
+        (is_alive,) = struct.unpack("?", value)
 
         # If the value changed, update our state, log it, then call listeners
         if is_alive != self._alive:
@@ -24,6 +24,13 @@ class Mode(metaclass=abc.ABCMeta):
     def name(self):
         return self._name
 
+    def get_next_update(self, settings, now):
+        """
+        Get the time (in epoch seconds) at which this mode's output will next
+        change on its own, or None if it only changes when the settings do.
+        """
+        return None
+
     @abc.abstractclassmethod
     def _get_modes(cls):
         pass
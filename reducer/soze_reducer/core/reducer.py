@@ -1,3 +1,4 @@
+import functools
 import redis
 import signal
 import time
@@ -7,28 +8,46 @@ from soze_reducer.led.led import Led
 from soze_reducer.lcd.lcd import Lcd
 from .keepalive import Keepalive
 
+# Potentially could read these from a config file
+LED_CONFIG = {
+    "refresh_interval": 5.0,  # Seconds between forced color pushes
+    "keyframes": True,  # Let the display interpolate fades
+}
+
 
 class SozeReducer:
-    def __init__(self, redis_url):
+    def __init__(self, redis_url, lcd_stream=False):
         self._redis = redis.from_url(redis_url)
         self._pubsub = self._redis.pubsub()
         self._pubsub_thread = None  # Will be populated during run
 
-        self._keepalive = Keepalive(
-            redis_client=self._redis, pubsub=self._pubsub
+        self._keepalive = Keepalive()
+        # Each resource gets its own pipeline to queue writes on. Its thread
+        # flushes the pipeline after every step.
+        lcd = Lcd(
+            redis_client=self._redis.pipeline(transaction=False),
+            keepalive=self._keepalive,
+            stream=lcd_stream,
         )
         self._resources = [
             Led(
-                redis_client=self._redis,
-                pubsub=self._pubsub,
-                keepalive=self._keepalive,
-            ),
-            Lcd(
-                redis_client=self._redis,
-                pubsub=self._pubsub,
+                redis_client=self._redis.pipeline(transaction=False),
                 keepalive=self._keepalive,
+                **LED_CONFIG,
             ),
+            lcd,
         ]
+        # The keepalive goes first, so that the resources see a status change
+        # during the same refresh
+        self._subscribers = (
+            [self._keepalive] + self._resources + [lcd.resync_subscriber]
+        )
+        self._pubsub.subscribe(
+            **{
+                sub.sub_channel: functools.partial(self._on_pub, sub)
+                for sub in self._subscribers
+            }
+        )
         self._should_run = True
 
         # Register exit handlers
@@ -38,7 +57,24 @@ class SozeReducer:
         signal.signal(signal.SIGINT, stop_handler)
         signal.signal(signal.SIGTERM, stop_handler)
 
+    def _on_pub(self, subscriber, msg):
+        subscriber.on_pub(msg)
+        self._refresh()
+
+    def _refresh(self):
+        """
+        Load whatever data the subscribers need from Redis. Runs on the pubsub
+        thread, so the resource threads never block on a read.
+        """
+        for sub in self._subscribers:
+            keys = sub.get_stale_keys()
+            if keys:
+                sub.load(self._redis.mget(keys))
+
     def run(self):
+        # Load initial state before anything starts
+        self._refresh()
+
         # Start the helper threads
         try:
             # One thread to listen for Redis pubs, and one thread for each
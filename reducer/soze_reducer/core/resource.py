@@ -5,17 +5,8 @@ import traceback
 from threading import Event, Thread
 
 from soze_reducer import logger
-
-
-class RedisSubscriber(metaclass=abc.ABCMeta):
-    def __init__(self, redis_client, pubsub, sub_channel):
-        self._redis = redis_client
-        self._pubsub = pubsub
-        self._pubsub.subscribe(**{sub_channel: self._on_pub})
-
-    @abc.abstractmethod
-    def _on_pub(self, msg):
-        pass
+from .keepalive import Status
+from .subscriber import RedisSubscriber
 
 
 class ReducerResource(RedisSubscriber):
@@ -24,36 +15,47 @@ class ReducerResource(RedisSubscriber):
 
     def __init__(
         self,
+        redis_client,
         *args,
         name,
         settings_key,
         pub_channel,
         mode_class,
-        pause=0.1,
         keepalive,
+        wake_event=None,
         **kwargs,
     ):
         super().__init__(*args, **kwargs)
+        # Only used for writes, so this is a pipeline. Whoever runs the
+        # resource flushes it after each step.
+        self._redis = redis_client
         # Constants defined by the super class
         self._name = name
         self._settings_key = settings_key
         self._pub_channel = pub_channel
         self._mode_class = mode_class
-        self._pause = pause
 
         # Other assorted properties
         self._keepalive = keepalive
         self._thread = Thread(name=f"{self.name}-Thread", target=self._loop)
         self._shutdown = Event()
+        # Set to wake the update loop up before its next scheduled update
+        self._wake = wake_event if wake_event is not None else Event()
         self._mode = None
-        # Dict representing settings for one resource/status combo
+        # Dict representing settings for the current resource/status combo.
+        # This always points into _cached_settings.
         self._settings = None
-
-        # Register _load_settings to be called after a status change
-        self._keepalive.register_listener(self._load_settings)
-
-        # Load settings from Redis for the first time
-        self._load_settings(self._keepalive.status)
+        # Decoded settings and their versions for every status, so that a
+        # status change doesn't need any Redis I/O
+        self._cached_settings = {status.value: {} for status in Status}
+        self._versions = {status.value: None for status in Status}
+        # Statuses that need to be (re)loaded. Initially, that's all of them.
+        self._stale_statuses = set(self._cached_settings.keys())
+        # Statuses requested by the last get_stale_keys() call
+        self._loading_statuses = []
+
+        # Swap settings after a status change
+        self._keepalive.register_listener(self._on_status_change)
 
     @property
     def name(self):
@@ -70,23 +72,67 @@ class ReducerResource(RedisSubscriber):
     def stop(self):
         if self.should_run:
             self._shutdown.set()
+            self._wake.set()
 
     def _get_user_redis_key(self, status):
         return f"user:{self._settings_key}:{status}"
 
-    def _on_pub(self, msg):
-        self._load_settings(self._keepalive.status)
+    def _get_version_redis_key(self, status):
+        return f"user:{self._settings_key}:{status}:version"
 
-    def _load_settings(self, status):
+    def on_pub(self, msg):
+        # The API sends a msgpacked dict of {status: version} for each status
+        # that changed. If we can't read that, assume everything changed.
+        try:
+            versions = msgpack.loads(msg["data"])
+            stale_statuses = {
+                status
+                for status, version in versions.items()
+                if status in self._versions
+                and version != self._versions[status]
+            }
+        except (AttributeError, TypeError, ValueError):
+            stale_statuses = set(self._versions.keys())
+        self._stale_statuses |= stale_statuses
+
+    def _on_status_change(self, status):
+        self._apply_settings()
+
+    def get_stale_keys(self):
+        # Settings and version for each stale status, in pairs
+        self._loading_statuses = sorted(self._stale_statuses)
+        return [
+            key
+            for status in self._loading_statuses
+            for key in (
+                self._get_user_redis_key(status),
+                self._get_version_redis_key(status),
+            )
+        ]
+
+    def load(self, values):
+        statuses = self._loading_statuses
+        for status, redis_value, version in zip(
+            statuses, values[::2], values[1::2]
+        ):
+            self._stale_statuses.discard(status)
+            self._versions[status] = int(version) if version else 0
+            # Unpack the value from the user state
+            self._cached_settings[status] = (
+                msgpack.loads(redis_value) if redis_value else {}
+            )
+
+        # Only the current status matters right now, the others are just cached
+        if self._keepalive.status in statuses:
+            self._apply_settings()
+
+    def _apply_settings(self):
         """
-        Load settings for the current status from Redis. This should be called
-        after any change to the settings for any status of this resource, or
-        after a change to the status.
+        Switch to the cached settings for the current status. This should be
+        called after any change to the settings for the current status of this
+        resource, or after a change to the status.
         """
-
-        # Pull our value from the user state and unpack it
-        redis_value = self._redis.get(self._get_user_redis_key(status))
-        self._settings = msgpack.loads(redis_value) if redis_value else {}
+        self._settings = self._cached_settings[self._keepalive.status]
 
         try:
             new_mode = self._settings[__class__._MODE_KEY]
@@ -98,6 +144,9 @@ class ReducerResource(RedisSubscriber):
                 # Make a new mode object
                 self._mode = self._mode_class.get_by_name(new_mode)()
 
+        # Wake up the loop so that the new settings are applied immediately
+        self._wake.set()
+
     def publish(self, msg=b""):
         self._redis.publish(self._pub_channel, msg)
 
@@ -110,14 +159,50 @@ class ReducerResource(RedisSubscriber):
         # Apply the values. If something was updated, do a publish.
         self._apply_values(*values)
 
+    def _get_next_update(self, now):
+        """Get the time at which values should next be recomputed, or None if
+        they only need to be recomputed after a settings or status change.
+        """
+        if self._settings and self._mode is not None:
+            return self._mode.get_next_update(self._settings, now)
+        return None
+
+    def _get_timeout(self):
+        now = time.time()
+        next_update = self._get_next_update(now)
+        return None if next_update is None else max(next_update - now, 0)
+
+    def init(self):
+        """Push initial values. Called once before the first step()."""
+        self._after_init()
+
+    def step(self):
+        """
+        Recompute and apply values. Returns the number of seconds until the next
+        step is needed, or None if it should wait until the wake event is set.
+        """
+        # Clear the flag before updating, so that a wakeup that comes in during
+        # the update isn't lost
+        self._wake.clear()
+        self._update()
+        return self._get_timeout()
+
+    def cleanup(self):
+        """Push final values. Called once after the last step()."""
+        self._before_stop()
+
     def _loop(self):
         try:
             logger.info(f"Starting {self.name} thread")
-            self._after_init()
+            self.init()
+            self._redis.execute()
             while self.should_run:
-                self._update()
-                time.sleep(self._pause)
-            self._before_stop()
+                timeout = self.step()
+                self._redis.execute()
+                # Sleep until the output would change, or until we get woken up
+                self._wake.wait(timeout)
+            self.cleanup()
+            self._redis.execute()
         except Exception:
             logger.error(traceback.format_exc())
         finally:
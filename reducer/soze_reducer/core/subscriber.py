@@ -0,0 +1,29 @@
+import abc
+
+
+class RedisSubscriber(metaclass=abc.ABCMeta):
+    """
+    Something that listens to a Redis channel. Subscribers never do any Redis
+    I/O while handling a pub. Instead, they report which keys they need to
+    (re)load, and whoever owns the pubsub fetches those keys and hands the
+    values back. This lets the same subscriber run on a thread or an event loop.
+    """
+
+    def __init__(self, sub_channel):
+        self._sub_channel = sub_channel
+
+    @property
+    def sub_channel(self):
+        return self._sub_channel
+
+    @abc.abstractmethod
+    def on_pub(self, msg):
+        pass
+
+    def get_stale_keys(self):
+        """Get the list of Redis keys that need to be loaded via load()."""
+        return []
+
+    def load(self, values):
+        """Load the values for the keys from the last get_stale_keys() call."""
+        pass
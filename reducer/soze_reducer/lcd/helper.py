@@ -1,5 +1,4 @@
-import itertools
-from collections import defaultdict
+import functools
 from enum import Enum
 
 # Custom chars (e.g. the small blocks used to make big chars) are defined here
@@ -113,49 +112,76 @@ class CursorMode(Enum):
     block = 3
 
 
+@functools.lru_cache(maxsize=128)
 def make_big_text(text):
     """
     @brief      Converts the given string into "big text". Big text is is three
-                lines high.
+                lines high. Results are cached, since modes tend to render the
+                same text over and over.
 
     @param      text  The text to make big
 
-    @return     The big text, as a list of 3 strings, one for each line
+    @return     The big text, as a tuple of 3 strings, one for each line
     """
     big_chars = (BIG_CHARS[c] for c in text)
     line_tuples = zip(*big_chars)
-    return (" ".join(t) for t in line_tuples)  # Put a space between characters
+    # Put a space between characters
+    return tuple(" ".join(t) for t in line_tuples)
 
 
-def diff_text(lines1, lines2):
+def encode_text(text, width, height):
     """
-    @brief      Diffs the given lists of strings, producing a dict of (x,y):str
-                tuples of the text from lines2 where they differed. Adjacent
-                differing characters are included together in the same string.
-                If one list is longer then the other, the shorter list is padded
-                with empty strings. If one line is longer than its counterpart,
-                the shorter string is padded with spaces. See unit tests for
-                examples.
-
-    @param      lines1  The first list of strings
-    @param      lines2  The second list of strings (this one takes priority)
-
-    @return     A dict of (x,y):str tuples representing the changes
+    @brief      Encodes the given text into a framebuffer, which has one byte
+                per character on the LCD, row by row. Lines that are too long
+                are cut off, and missing characters are filled with spaces.
+
+    @param      text    The text, with lines separated by a newline character
+    @param      width   The width of the LCD (in characters)
+    @param      height  The height of the LCD (in characters)
+
+    @return     The framebuffer, as a bytearray of width*height bytes
+    """
+    frame = bytearray(b" " * (width * height))
+    for y, line in enumerate(text.splitlines()[:height]):
+        # UTF-8 encodes 128+ as two bytes but we want just one byte, [0, 255]
+        encoded = line[:width].encode("latin-1")
+        frame[y * width : y * width + len(encoded)] = encoded
+    return frame
+
+
+def diff_frames(frame1, frame2, width, max_gap=0):
     """
-    diff = defaultdict(
-        lambda: []
-    )  # List of chars is more efficient for building up
-    for y, (line1, line2) in enumerate(
-        itertools.zip_longest(lines1, lines2, fillvalue="")
-    ):
-        pos = None
-        for x, (c1, c2) in enumerate(
-            itertools.zip_longest(line1, line2, fillvalue=" ")
-        ):
-            if c1 != c2:
-                if pos is None:
-                    pos = (x, y)
-                diff[pos].append(c2)
-            else:
-                pos = None
-    return {k: "".join(v) for k, v in diff.items()}
+    @brief      Diffs the given framebuffers (see encode_text), producing a
+                list of (offset, bytes) runs from frame2 where they differed.
+                Runs never span multiple rows. Runs in the same row that are
+                separated by max_gap or fewer unchanged bytes are merged into
+                one, for when rewriting those bytes is cheaper than moving the
+                cursor. See unit tests for examples.
+
+    @param      frame1   The first framebuffer
+    @param      frame2   The second framebuffer (this one takes priority)
+    @param      width    The width of each row
+    @param      max_gap  The longest unchanged gap to merge across
+
+    @return     A list of (offset, bytes) tuples representing the changes
+    """
+    view1, view2 = memoryview(frame1), memoryview(frame2)
+    diff = []
+    for row_start in range(0, len(frame2), width):
+        row_end = row_start + width
+        # Most rows don't change between frames, so compare them in bulk first
+        if view1[row_start:row_end] == view2[row_start:row_end]:
+            continue
+
+        run_start = run_end = None
+        for i in range(row_start, row_end):
+            if frame1[i] != frame2[i]:
+                if run_start is None or i - run_end > max_gap:
+                    # Start a new run, saving the previous one
+                    if run_start is not None:
+                        run = bytes(view2[run_start:run_end])
+                        diff.append((run_start, run))
+                    run_start = i
+                run_end = i + 1
+        diff.append((run_start, bytes(view2[run_start:run_end])))
+    return diff
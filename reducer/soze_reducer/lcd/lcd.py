@@ -1,7 +1,9 @@
-import itertools
+import struct
 
+from soze_reducer import logger
 from soze_reducer.core.color import BLACK
 from soze_reducer.core.resource import ReducerResource
+from soze_reducer.core.subscriber import RedisSubscriber
 from .helper import (
     CMD_AUTOSCROLL_OFF,
     CMD_AUTOSCROLL_ON,
@@ -26,9 +28,11 @@ from .helper import (
     CUSTOM_CHARS,
     SIG_COMMAND,
     CursorMode,
-    diff_text,
+    diff_frames,
+    encode_text,
 )
 from .mode import LcdMode
+from .optimizer import CommandOptimizer
 
 
 class Lcd(ReducerResource):
@@ -36,8 +40,26 @@ class Lcd(ReducerResource):
     _DEFAULT_WIDTH = 20
     _DEFAULT_HEIGHT = 4
     _COMMAND_QUEUE_KEY = "reducer:lcd_commands"
-
-    def __init__(self, *args, **kwargs):
+    _COMMAND_QUEUE_MAXLEN = 100  # Frames kept for a display that's behind
+    # Displays that fall behind (or restart) skip to this
+    _SNAPSHOT_KEY = "reducer:lcd_snapshot"
+    # Sequence number of the latest frame, so displays can tell if the
+    # snapshot is missing anything after it, even once the queue is empty
+    _LATEST_SEQ_KEY = "reducer:lcd_latest_seq"
+    # Frames between snapshots. This has to be well under the queue length,
+    # so the frames after a snapshot are still queued when a display needs it.
+    _SNAPSHOT_INTERVAL = 10
+    # Alternative transport, where each frame is a stream entry. See __exit__.
+    _STREAM_KEY = "reducer:lcd_stream"
+    _STREAM_MAXLEN = 100  # Displays that fall further behind than this resync
+    _STREAM_FIELD = b"frame"
+    # Sequence number, flags, payload length
+    _FRAME_HEADER = struct.Struct(">IBH")
+    _FRAME_FLAG_FULL = 0x01  # Frame redraws the LCD from an unknown state
+    # The LCD is on a 9600 baud serial link, with 10 bits on the wire per byte
+    _BYTES_PER_SECOND = 9600 / 10
+
+    def __init__(self, *args, stream=False, **kwargs):
         super().__init__(
             *args,
             name="LCD",
@@ -51,24 +73,57 @@ class Lcd(ReducerResource):
         self._width = __class__._DEFAULT_WIDTH
         self._height = __class__._DEFAULT_HEIGHT
         self._color = None
-        self._lines = None
+        # What's currently on the screen. See helper.encode_text.
+        self._frame = None
         # Used to queue up bytes and send them to Redis in bulk
         self._command_queue = None
+        self._optimizer = CommandOptimizer(self._width, self._height)
+        # Transport settings. See __exit__.
+        self._stream = stream
+        self._seq = 0
+        self._full_frame = False
+        # Frames pushed since the last snapshot. Starts out due.
+        self._frames_since_snapshot = __class__._SNAPSHOT_INTERVAL
+        # Set when a display asks for everything to be sent again
+        self._redraw_requested = False
+        self._resync_subscriber = LcdResyncSubscriber(self)
+
+    @property
+    def resync_subscriber(self):
+        return self._resync_subscriber
+
+    def request_redraw(self):
+        """
+        @brief      Makes the next update redraw the whole LCD, instead of only
+                    what changed.
+        """
+        self._redraw_requested = True
+        self._wake.set()
 
     def _after_init(self):
         # Initiate a transaction. Only one Redis push will occur, at the end.
         with self:
-            self.set_size(self.width, self.height, True)
+            self._setup()
             self.set_color(BLACK)
 
-            self.clear()
-            self.set_autoscroll(False)  # Fugg that
-            self.on()
+    def _setup(self):
+        """
+        @brief      Gets the LCD from an unknown state to a blank screen.
+        """
+        # Don't assume anything about what the LCD is showing now
+        self._optimizer.reset()
+        self._color = None
+        self._full_frame = True
+
+        self.set_size(self.width, self.height, True)
+        self.clear()
+        self.set_autoscroll(False)  # Fugg that
+        self.on()
 
-            # Register custom characters
-            for index, char in CUSTOM_CHARS.items():
-                self.create_char(0, index, char)
-            self.load_char_bank(0)
+        # Register custom characters
+        for index, char in CUSTOM_CHARS.items():
+            self.create_char(0, index, char)
+        self.load_char_bank(0)
 
     def _before_stop(self):
         """
@@ -90,6 +145,9 @@ class Lcd(ReducerResource):
     def _apply_values(self, color, text):
         # Initiate a transaction. Only one Redis push will occur, at the end.
         with self:
+            if self._redraw_requested:
+                self._redraw_requested = False
+                self._setup()
             self.set_color(color)
             self.set_text(text)
 
@@ -123,6 +181,7 @@ class Lcd(ReducerResource):
         @brief      Clears all text on the screen.
         """
         self._send_command(CMD_CLEAR)
+        self._frame = encode_text("", self.width, self.height)
 
     def on(self):
         """
@@ -151,7 +210,7 @@ class Lcd(ReducerResource):
         if force_update or self.width != width or self.height != height:
             self._width, self._height = width, height
             self._send_command(CMD_SIZE, width, height)
-            self._lines = [""] * height  # Resize the text buffer
+            self._frame = encode_text("", width, height)  # Resize the buffer
 
     def set_splash_text(self, splash_text):
         """
@@ -271,42 +330,121 @@ class Lcd(ReducerResource):
                         newline character
         """
 
-        def encode_str(s):
-            # UTF-8 encodes 128+ as two bytes but we use ord to get just one
-            # byte, [0, 255]
-            return bytes(ord(c) for c in s)
+        frame = encode_text(text, self.width, self.height)
+        diff = diff_frames(self._frame, frame, self.width)
 
-        lines = [
-            line[: self.width] for line in text.splitlines()[: self.height]
-        ]
-        diff = diff_text(self._lines, lines)
-
-        # Build a list of bytes we want to write
-        for (x, y), s in diff.items():
-            text_bytes = encode_str(s)
+        # Build a list of bytes we want to write. The optimizer decides how to
+        # actually get the cursor to each spot, based on where it already is.
+        for offset, text_bytes in diff:
             # Move the cursor to the right spot (the LCD coords are 1-based),
             # then add the text at that location
+            y, x = divmod(offset, self.width)
             self.set_cursor_pos(x + 1, y + 1)
             self._queue_bytes(text_bytes)
 
-        self._lines = lines
+        self._frame = frame
+
+    def _log_frame_size(self, num_bytes):
+        seconds = num_bytes / __class__._BYTES_PER_SECOND
+        msg = f"LCD frame is {num_bytes} bytes ({seconds * 1000:.0f} ms)"
+        # Anything over a second falls behind the clock's updates
+        if seconds > 1.0:
+            logger.warning(f"{msg}, over the serial budget")
+        else:
+            logger.debug(msg)
 
     def __enter__(self):
         # Initialize a command queue
         if self._command_queue is not None:
             raise ValueError("Command queue already exists")
         self._command_queue = []
+        self._full_frame = False
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         # If we exited cleanly, push the queued bytes to Redis
         try:
             if not exc_type:
-                # Squash all the queued bytes into one long bytes object
-                to_push = bytes(
-                    itertools.chain.from_iterable(self._command_queue)
-                )
+                # Squash all the queued bytes into one long bytes object,
+                # leaving out anything that wouldn't change the LCD
+                to_push = self._optimizer.optimize(self._command_queue)
                 if to_push:
-                    self._redis.rpush(__class__._COMMAND_QUEUE_KEY, to_push)
-                    self.publish()
+                    self._log_frame_size(len(to_push))
+                    self._push_frame(to_push)
         finally:
             self._command_queue = None
+
+    def _make_frame(self, seq, data, full):
+        flags = __class__._FRAME_FLAG_FULL if full else 0
+        return __class__._FRAME_HEADER.pack(seq, flags, len(data)) + data
+
+    def _push_frame(self, data):
+        """
+        @brief      Sends a frame to the displays. Each frame has a sequence
+                    number, so that displays can tell when they missed one.
+                    Both transports are capped, so they don't grow while no
+                    display is reading them.
+        """
+        seq = self._seq
+        self._seq = (seq + 1) & 0xFFFFFFFF
+        frame = self._make_frame(seq, data, self._full_frame)
+
+        if self._stream:
+            # Displays that miss a frame ask for a redraw
+            self._redis.xadd(
+                __class__._STREAM_KEY,
+                {__class__._STREAM_FIELD: frame},
+                maxlen=__class__._STREAM_MAXLEN,
+                approximate=True,
+            )
+        else:
+            key = __class__._COMMAND_QUEUE_KEY
+            # The client is a pipeline, so everything goes out in one round
+            # trip at the end of the step
+            self._redis.rpush(key, frame)
+            self._redis.ltrim(key, -__class__._COMMAND_QUEUE_MAXLEN, -1)
+            self._redis.set(__class__._LATEST_SEQ_KEY, seq)
+            self._queue_snapshot(seq)
+            self.publish()
+
+    def _queue_snapshot(self, seq):
+        """
+        @brief      Queues an update of the snapshot, which displays that fall
+                    behind skip to instead of replaying everything. Building
+                    it isn't free, so it's only refreshed every so often, and
+                    after a full redraw (e.g. when a display asked for one).
+                    It's pushed after the frame, so it's never ahead of the
+                    queue.
+
+        @param      seq   Sequence number of the frame
+        """
+        self._frames_since_snapshot += 1
+        if (
+            not self._full_frame
+            and self._frames_since_snapshot < __class__._SNAPSHOT_INTERVAL
+        ):
+            return
+        snapshot = self._optimizer.get_snapshot()
+        if snapshot is None:
+            # We don't know what the LCD is showing, so the old snapshot would
+            # soon be stale. Displays have to ask for a redraw instead. Keep
+            # trying on every frame until there's one again.
+            self._redis.delete(__class__._SNAPSHOT_KEY)
+        else:
+            self._redis.set(
+                __class__._SNAPSHOT_KEY, self._make_frame(seq, snapshot, True)
+            )
+            self._frames_since_snapshot = 0
+
+
+class LcdResyncSubscriber(RedisSubscriber):
+    """
+    Listens for displays that lost track of the LCD (e.g. after missing some
+    frames), and makes the LCD redraw everything.
+    """
+
+    def __init__(self, lcd):
+        super().__init__(sub_channel="d2r:lcd")
+        self._lcd = lcd
+
+    def on_pub(self, msg):
+        self._lcd.request_redraw()
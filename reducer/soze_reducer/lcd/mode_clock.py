@@ -1,3 +1,5 @@
+import functools
+import math
 from datetime import datetime
 
 from soze_reducer.core.mode import register
@@ -18,24 +20,45 @@ class ClockMode(LcdMode):
     def __init__(self):
         super().__init__("clock")
 
-    def get_text(self, settings):
-        lines = []  # This will we populated as we go along
+    def get_next_update(self, settings, now):
+        # The smallest unit on the display is seconds
+        return math.floor(now) + 1
 
+    def get_text(self, settings):
+        # Only the seconds change on every tick, everything else is cached
         now = datetime.now()
-        day_str = __class__._LONG_DAY_FORMAT.format(d=now)
         seconds_str = __class__._SECONDS_FORMAT.format(d=now)
+        return "".join(
+            (
+                __class__._get_day_str(now.date(), len(seconds_str)),
+                seconds_str,
+                __class__._get_time_text(now.replace(second=0, microsecond=0)),
+            )
+        )
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _get_day_str(date, seconds_len):
+        """
+        @brief      Gets the first line of the clock, minus the seconds.
+        """
+        day_str = __class__._LONG_DAY_FORMAT.format(d=date)
 
         # If the line is too long, shorten the day name
-        if len(day_str) + len(seconds_str) > __class__._LCD_WIDTH:
-            day_str = __class__._SHORT_DAY_FORMAT.format(d=now)
+        if len(day_str) + seconds_len > __class__._LCD_WIDTH:
+            day_str = __class__._SHORT_DAY_FORMAT.format(d=date)
 
         # Pad the day string with spaces to make it the right length
-        day_str = day_str.ljust(__class__._LCD_WIDTH - len(seconds_str))
-        lines.append(day_str + seconds_str)  # First line
-
-        time_str = __class__._TIME_FORMAT.format(d=now).rjust(5)
-        time_lines = helper.make_big_text(time_str)  # Rest of the fucking lines
-        # Pad each line with a space then add it to the list of lines
-        lines += (f" {line}" for line in time_lines)
+        return day_str.ljust(__class__._LCD_WIDTH - seconds_len)
 
-        return "\n".join(lines)
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _get_time_text(time):
+        """
+        @brief      Gets the rest of the fucking lines, which show the time in
+                    big text.
+        """
+        time_str = __class__._TIME_FORMAT.format(d=time).rjust(5)
+        time_lines = helper.make_big_text(time_str)
+        # Pad each line with a space, and start it on a new line
+        return "".join(f"\n {line}" for line in time_lines)
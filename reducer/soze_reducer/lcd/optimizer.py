@@ -0,0 +1,203 @@
+from .helper import (
+    CMD_AUTOSCROLL_OFF,
+    CMD_AUTOSCROLL_ON,
+    CMD_BACKLIGHT_OFF,
+    CMD_BACKLIGHT_ON,
+    CMD_BLOCK_CURSOR_OFF,
+    CMD_BLOCK_CURSOR_ON,
+    CMD_BRIGHTNESS,
+    CMD_CLEAR,
+    CMD_COLOR,
+    CMD_CONTRAST,
+    CMD_CURSOR_BACK,
+    CMD_CURSOR_FWD,
+    CMD_CURSOR_HOME,
+    CMD_CURSOR_POS,
+    CMD_LOAD_CHAR_BANK,
+    CMD_SAVE_CUSTOM_CHAR,
+    CMD_SIZE,
+    CMD_UNDERLINE_CURSOR_OFF,
+    CMD_UNDERLINE_CURSOR_ON,
+    SIG_COMMAND,
+    diff_frames,
+    encode_text,
+)
+
+# Commands that set some persistent state on the LCD, grouped by the state
+# they set. Sending the value that a state already has is a no-op.
+_STATE_GROUPS = {
+    CMD_BACKLIGHT_ON: "backlight",
+    CMD_BACKLIGHT_OFF: "backlight",
+    CMD_COLOR: "color",
+    CMD_BRIGHTNESS: "brightness",
+    CMD_CONTRAST: "contrast",
+    CMD_AUTOSCROLL_ON: "autoscroll",
+    CMD_AUTOSCROLL_OFF: "autoscroll",
+    CMD_UNDERLINE_CURSOR_ON: "underline_cursor",
+    CMD_UNDERLINE_CURSOR_OFF: "underline_cursor",
+    CMD_BLOCK_CURSOR_ON: "block_cursor",
+    CMD_BLOCK_CURSOR_OFF: "block_cursor",
+    CMD_LOAD_CHAR_BANK: "char_bank",
+}
+
+_CURSOR_HOME = bytes([SIG_COMMAND, CMD_CURSOR_HOME])
+_CURSOR_FWD = bytes([SIG_COMMAND, CMD_CURSOR_FWD])
+_CURSOR_BACK = bytes([SIG_COMMAND, CMD_CURSOR_BACK])
+
+
+class CommandOptimizer:
+    """
+    Rewrites a queued LCD command stream into the cheapest equivalent stream
+    of bytes. Every byte costs about 1ms on the 9600 baud serial link, so this
+    models what the LCD is showing (cursor position, screen contents and state
+    like the color) in order to skip everything that wouldn't change it.
+    """
+
+    def __init__(self, width, height):
+        self._width = width
+        self._height = height
+        self.reset()
+
+    def reset(self):
+        """
+        @brief      Forget everything about the LCD's state, so that the next
+                    stream is sent unoptimized. Use this if the LCD may have
+                    been changed by something else.
+        """
+        self._cursor = None  # Offset into the screen, None if unknown
+        self._screen = None  # Framebuffer (see encode_text), None if unknown
+        self._states = {}  # Last command sent for each state group
+        self._custom_chars = {}  # Last command sent for each (bank, code)
+
+    def optimize(self, items):
+        """
+        @brief      Optimizes the given command stream.
+
+        @param      items  Iterable of bytes objects, each of which is either
+                           one command (starting with SIG_COMMAND) or text to
+                           write at the cursor
+
+        @return     The optimized stream, as one bytes object
+        """
+        out = bytearray()
+        # Cursor moves are deferred until something is written, so that
+        # they can be skipped or replaced with something cheaper
+        self._target = None
+        for item in items:
+            if item[0] == SIG_COMMAND:
+                self._command(item, out)
+            else:
+                self._write(item, out)
+        return bytes(out)
+
+    def get_snapshot(self):
+        """
+        @brief      Gets a stream that takes the LCD from an unknown state to
+                    what it's showing now, cursor included. Sending this and
+                    then the output of any later optimize() calls has the same
+                    result as sending everything since the last reset().
+
+        @return     The stream as bytes, or None if we don't know what the LCD
+                    is showing
+        """
+        if self._screen is None:
+            return None
+
+        width, height = self._width, self._height
+        items = [
+            bytes([SIG_COMMAND, CMD_SIZE, width, height]),
+            bytes([SIG_COMMAND, CMD_CLEAR]),
+            *self._custom_chars.values(),
+            *self._states.values(),
+        ]
+        # Everything is blank after the clear
+        blank = encode_text("", width, height)
+        for offset, data in diff_frames(blank, self._screen, width):
+            y, x = divmod(offset, width)
+            items += [bytes([SIG_COMMAND, CMD_CURSOR_POS, x + 1, y + 1]), data]
+
+        optimizer = CommandOptimizer(width, height)
+        out = bytearray(optimizer.optimize(items))
+        if self._cursor is not None:
+            optimizer._target = self._cursor
+            optimizer._move_cursor(out)
+        return bytes(out)
+
+    def _command(self, item, out):
+        cmd, args = item[1], item[2:]
+        if cmd == CMD_CURSOR_POS:
+            x, y = args
+            self._target = (y - 1) * self._width + (x - 1)
+        elif cmd == CMD_CURSOR_HOME:
+            self._target = 0
+        elif cmd in _STATE_GROUPS:
+            group = _STATE_GROUPS[cmd]
+            if self._states.get(group) != item:
+                self._states[group] = item
+                out += item
+        else:
+            if cmd in (CMD_CURSOR_FWD, CMD_CURSOR_BACK):
+                # Relative moves are sent as-is, from wherever the cursor is
+                # supposed to be
+                self._move_cursor(out)
+            out += item
+
+            if cmd == CMD_CLEAR:
+                # Clearing also sends the cursor home
+                self._screen = encode_text("", self._width, self._height)
+                self._cursor = 0
+                self._target = None
+            elif cmd == CMD_SIZE:
+                self._width, self._height = args
+                self._screen = None
+                self._cursor = None
+            elif cmd in (CMD_CURSOR_FWD, CMD_CURSOR_BACK):
+                self._cursor = None
+            elif cmd == CMD_SAVE_CUSTOM_CHAR:
+                self._custom_chars[tuple(args[:2])] = item
+
+    def _write(self, text, out):
+        self._move_cursor(out)
+        out += text
+        if self._cursor is None:
+            # We don't know where that went, so we don't know the screen
+            self._screen = None
+            return
+
+        start, end = self._cursor, self._cursor + len(text)
+        if start // self._width == (end - 1) // self._width:
+            if self._screen is not None:
+                self._screen[start:end] = text
+        else:
+            # We don't model how the LCD wraps between rows
+            self._screen = None
+        # Same goes for the cursor, once it reaches the end of the row
+        self._cursor = end if end % self._width else None
+
+    def _move_cursor(self, out):
+        """
+        @brief      Moves the cursor to the target of the last CURSOR_POS or
+                    CURSOR_HOME command, in as few bytes as possible.
+        """
+        target, cursor = self._target, self._cursor
+        self._target = None
+        if target is None or target == cursor:
+            return
+
+        y, x = divmod(target, self._width)
+        options = [bytes([SIG_COMMAND, CMD_CURSOR_POS, x + 1, y + 1])]
+        if target == 0:
+            options.append(_CURSOR_HOME)
+        if cursor is not None and cursor // self._width == y:
+            if target > cursor:
+                options.append(_CURSOR_FWD * (target - cursor))
+                # Rewriting what's already there also moves the cursor forward
+                if self._screen is not None:
+                    gap = bytes(self._screen[cursor:target])
+                    if SIG_COMMAND not in gap:
+                        options.append(gap)
+            else:
+                options.append(_CURSOR_BACK * (cursor - target))
+
+        out += min(options, key=len)
+        self._cursor = target
@@ -0,0 +1,61 @@
+from array import array
+
+from soze_reducer.core.mode import register
+
+# Each interpolation builds a whole gradient at once (see Color.gradient), so
+# that fades can precompute all of their frames
+INTERPOLATIONS = {}
+
+
+@register("linear", INTERPOLATIONS)
+def linear_gradient(start, end, num_steps):
+    """Interpolate each sRGB channel directly."""
+    return start.gradient(end, num_steps)
+
+
+def _srgb_to_linear(value):
+    c = value / 255
+    return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(c):
+    c = c * 12.92 if c <= 0.0031308 else 1.055 * c ** (1 / 2.4) - 0.055
+    return int(c * 255 + 0.5)
+
+
+# Lookup tables to convert each sRGB channel value to linear light [0, 1], and
+# linear light (quantized to _LINEAR_STEPS) back to the nearest sRGB value
+_LINEAR_STEPS = 4095
+_SRGB_TO_LINEAR = [_srgb_to_linear(value) for value in range(256)]
+_LINEAR_TO_SRGB = bytes(
+    _linear_to_srgb(i / _LINEAR_STEPS) for i in range(_LINEAR_STEPS + 1)
+)
+
+
+@register("gamma", INTERPOLATIONS)
+def gamma_gradient(start, end, num_steps):
+    """
+    Interpolate in linear light, so that the amount of light changes evenly
+    (e.g. a fade between two bright colors doesn't dip through a dark one),
+    then convert back to sRGB. Every sRGB value survives the round trip, so
+    the fade starts and ends on exactly the given colors.
+    """
+    start_channels = [
+        _SRGB_TO_LINEAR[c] * _LINEAR_STEPS
+        for c in (start.red, start.green, start.blue)
+    ]
+    end_channels = [
+        _SRGB_TO_LINEAR[c] * _LINEAR_STEPS
+        for c in (end.red, end.green, end.blue)
+    ]
+    channels = list(zip(start_channels, end_channels))
+
+    frames = array("L")
+    for i in range(num_steps):
+        bias = i / num_steps
+        packed = 0
+        for c1, c2 in channels:
+            srgb = _LINEAR_TO_SRGB[int(c1 + (c2 - c1) * bias + 0.5)]
+            packed = (packed << 8) | srgb
+        frames.append(packed)
+    return frames
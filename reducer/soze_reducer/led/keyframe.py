@@ -0,0 +1,37 @@
+import struct
+from collections import namedtuple
+
+# Interpolations that displays know how to do, by their code on the wire. See
+# interpolation.py for what each one means.
+INTERPOLATION_CODES = {"linear": 0, "gamma": 1}
+
+
+class Keyframe(
+    namedtuple(
+        "Keyframe", ["start", "end", "start_time", "duration", "interpolation"]
+    )
+):
+    """
+    A transition from one color to another, starting at some time (in epoch
+    seconds) and lasting some number of seconds. Displays interpolate between
+    the two colors themselves, so a fade only needs one message per keyframe
+    instead of one per frame.
+    """
+
+    __slots__ = ()
+
+    # Start color, end color, start time, duration (ms), interpolation code
+    _STRUCT = struct.Struct(">3s3sdIB")
+
+    @property
+    def end_time(self):
+        return self.start_time + self.duration
+
+    def __bytes__(self):
+        return __class__._STRUCT.pack(
+            bytes(self.start),
+            bytes(self.end),
+            self.start_time,
+            round(self.duration * 1000),
+            INTERPOLATION_CODES.get(self.interpolation, 0),
+        )
@@ -1,13 +1,19 @@
+import time
+
 from soze_reducer.core.color import BLACK
 from soze_reducer.core.resource import ReducerResource
+from .keyframe import Keyframe
 from .mode import LedMode
 
 
 class Led(ReducerResource):
 
     _COLOR_KEY = "reducer:led_color"
+    # The keyframe being shown, so that a display that starts up mid-fade can
+    # pick it up. Only set while a keyframe is being shown.
+    _KEYFRAME_KEY = "reducer:led_keyframe"
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, refresh_interval=5.0, keyframes=False, **kwargs):
         super().__init__(
             *args,
             name="LED",
@@ -17,14 +23,57 @@ class Led(ReducerResource):
             mode_class=LedMode,
             **kwargs,
         )
+        # Unchanged colors are still re-pushed after this many seconds, so that
+        # a display that restarted since the last change will still converge
+        self._refresh_interval = refresh_interval
+        # If enabled, modes that support it send keyframes instead of colors
+        self._keyframes = keyframes
+        self._color = None
+        self._keyframe = None  # Only set while a keyframe is being shown
+        self._last_push_time = 0
+
+    def _should_push(self, value, last_value, force_update, now):
+        # Make sure the value is actually changing (or the last push is stale),
+        # to prevent unnecessary writes to Redis and wakeups on the display
+        return (
+            force_update
+            or value != last_value
+            or now - self._last_push_time >= self._refresh_interval
+        )
 
-    def set_color(self, color):
-        # Push the new color to Redis
-        self._redis.set(__class__._COLOR_KEY, bytes(color))
-        self.publish()
+    def set_color(self, color, force_update=False):
+        now = time.time()
+        if self._should_push(
+            color, None if self._keyframe else self._color, force_update, now
+        ):
+            self._color = color
+            self._keyframe = None
+            self._last_push_time = now
+            # Push the new color to Redis. An empty message means the display
+            # should read the color from the key. Displays that start up read
+            # the keyframe key first, so it can't be left over from a fade.
+            self._redis.set(__class__._COLOR_KEY, bytes(color))
+            self._redis.delete(__class__._KEYFRAME_KEY)
+            self.publish()
+
+    def set_keyframe(self, keyframe, force_update=False):
+        """
+        @brief      Sends a keyframe, which the display will interpolate itself.
+        """
+        now = time.time()
+        if self._should_push(keyframe, self._keyframe, force_update, now):
+            self._color = keyframe.end
+            self._keyframe = keyframe
+            self._last_push_time = now
+            # Displays that don't know about keyframes still get the colors
+            # at the end of each keyframe
+            data = bytes(keyframe)
+            self._redis.set(__class__._COLOR_KEY, bytes(keyframe.end))
+            self._redis.set(__class__._KEYFRAME_KEY, data)
+            self.publish(data)
 
     def off(self):
-        self.set_color(BLACK)
+        self.set_color(BLACK, True)
 
     def _before_stop(self):
         self.off()
@@ -33,7 +82,26 @@ class Led(ReducerResource):
         return (BLACK,)
 
     def _get_values(self):
+        if self._keyframes:
+            keyframe = self._mode.get_keyframe(self._settings, time.time())
+            if keyframe is not None:
+                return (keyframe,)
         return (self._mode.get_color(self._settings),)
 
-    def _apply_values(self, color):
-        self.set_color(color)
+    def _get_next_update(self, now):
+        # Make sure we wake up in time for the next forced refresh
+        next_refresh = self._last_push_time + self._refresh_interval
+        if self._keyframe is not None:
+            # The display takes care of everything until the keyframe ends
+            next_update = self._keyframe.end_time
+        else:
+            next_update = super()._get_next_update(now)
+        if next_update is None:
+            return next_refresh
+        return min(next_update, next_refresh)
+
+    def _apply_values(self, value):
+        if isinstance(value, Keyframe):
+            self.set_keyframe(value)
+        else:
+            self.set_color(value)
@@ -11,6 +11,14 @@ class LedMode(Mode):
     def get_color(self, settings):
         pass
 
+    def get_keyframe(self, settings, now):
+        """
+        Get the Keyframe that the output is in at the given time, or None if
+        this mode can't be described by keyframes. Keyframes let the display
+        do the interpolation, instead of getting each color from get_color.
+        """
+        return None
+
     @classmethod
     def _get_modes(cls):
         return cls.MODES
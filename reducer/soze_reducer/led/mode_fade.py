@@ -1,7 +1,11 @@
+import math
 import time
+from array import array
 
 from soze_reducer.core.color import BLACK, Color
 from soze_reducer.core.mode import register
+from .interpolation import INTERPOLATIONS, linear_gradient
+from .keyframe import Keyframe
 from .mode import LedMode
 
 
@@ -10,40 +14,95 @@ class FadeMode(LedMode):
 
     _FADE_COLORS_KEY = "fade:colors"
     _FADE_TIME_KEY = "fade:fade_time"
+    _FRAME_RATE = 10  # Color updates per second
 
     def __init__(self):
         super().__init__("fade")
-        self._color_index = 0
-        self._fade_start_time = 0
+        self._start_time = time.time()
+        # The fade settings that everything below was loaded from
+        self._fade_settings = None
+        self._colors = []
+        self._fade_time = 0.0
+        self._interpolation = None
+        # Every frame of one full cycle through the colors, as packed RGB ints
+        self._frames = array("L")
 
-    def get_color(self, settings):
-        try:
-            fade_settings = settings["fade"]
-            fade_colors = [
-                Color.from_hexcode(color_bytes)
-                for color_bytes in fade_settings["colors"]
-            ]
-            fade_time = float(fade_settings["fade_time"])
-        except KeyError:
-            # One or more key is missing from Redis
-            return BLACK
+    def _load(self, settings):
+        """
+        Load the given settings. Everything is only reloaded (and the table
+        of frames rebuilt) when the fade settings change, and the fade starts
+        over.
+        """
+        fade_settings = settings.get("fade")
+        if fade_settings is not self._fade_settings:
+            self._fade_settings = fade_settings
+            try:
+                self._colors = [
+                    Color.from_hexcode(color_bytes)
+                    for color_bytes in fade_settings["colors"]
+                ]
+                self._fade_time = float(fade_settings["fade_time"])
+                self._interpolation = fade_settings.get("interpolation")
+            except (KeyError, TypeError):
+                # One or more key is missing from Redis
+                self._colors = []
+            self._frames = __class__._build_frames(
+                self._colors, self._fade_time, self._interpolation
+            )
+            self._start_time = time.time()
+
+    def _get_frames(self, settings):
+        """Get the table of frames for the given settings."""
+        self._load(settings)
+        return self._frames
+
+    @staticmethod
+    def _build_frames(fade_colors, fade_time, interpolation):
+        if not fade_colors:
+            return array("L")
+        gradient = INTERPOLATIONS.get(interpolation, linear_gradient)
+
+        # Each color gets the same number of frames, in which it fades into
+        # the next color (wrapping around at the end)
+        frames_per_color = max(round(fade_time * __class__._FRAME_RATE), 1)
+        frames = array("L")
+        for i, last_color in enumerate(fade_colors):
+            next_color = fade_colors[(i + 1) % len(fade_colors)]
+            frames.extend(gradient(last_color, next_color, frames_per_color))
+        return frames
 
-        if len(fade_colors) == 0:
+    def get_next_update(self, settings, now):
+        # The color only moves if there is something to fade between
+        self._load(settings)
+        if len(self._colors) <= 1 or self._fade_time <= 0:
+            return None
+        frame_rate = __class__._FRAME_RATE
+        elapsed_frames = math.floor((now - self._start_time) * frame_rate)
+        return self._start_time + (elapsed_frames + 1) / frame_rate
+
+    def get_keyframe(self, settings, now):
+        self._load(settings)
+        colors, fade_time = self._colors, self._fade_time
+        if len(colors) <= 1 or fade_time <= 0:
+            return None
+
+        # Each color fades into the next one (wrapping around at the end)
+        segment = math.floor((now - self._start_time) / fade_time)
+        i = segment % len(colors)
+        return Keyframe(
+            start=colors[i],
+            end=colors[(i + 1) % len(colors)],
+            start_time=self._start_time + segment * fade_time,
+            duration=fade_time,
+            interpolation=self._interpolation,
+        )
+
+    def get_color(self, settings):
+        frames = self._get_frames(settings)
+        if len(frames) == 0:
             return BLACK
 
-        def get_fade_color(index):
-            return fade_colors[index % len(fade_colors)]
-
-        now = time.time()
-        if now - self._fade_start_time >= fade_time:
-            # Reached the next color
-            self._color_index += 1
-            self._color_index %= len(fade_colors)
-            self._fade_start_time = now
-
-        # Interpolate between the two boundary colors based on time
-        last_color = get_fade_color(self._color_index)
-        next_color = get_fade_color(self._color_index + 1)
-        bias = (now - self._fade_start_time) / fade_time
-        current_color = last_color * (1 - bias) + next_color * bias
-        return current_color
+        # Just look up the frame for the current time
+        elapsed = time.time() - self._start_time
+        frame = int(elapsed * __class__._FRAME_RATE) % len(frames)
+        return Color.from_hexcode(frames[frame])
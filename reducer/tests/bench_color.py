@@ -0,0 +1,136 @@
+"""
+Benchmarks the Color operations done on every LED/LCD frame, against the
+Color class from before it was packed into a single int (BaselineColor,
+below). Not collected as a test. Run it from the reducer directory:
+
+    python -m tests.bench_color
+"""
+
+import timeit
+
+from soze_reducer.core.color import Color
+
+
+def _coerce(val):
+    return min(max(int(val), 0), 255)
+
+
+def _check(val):
+    if not isinstance(val, int):
+        raise TypeError(f"Value must be int, but was {type(val)}")
+    if val < 0 or val > 255:
+        raise ValueError(f"Value must be [0, 255], but was {val}")
+    return val
+
+
+class BaselineColor:
+    """
+    The old Color, with a validated attribute per channel, for comparison.
+    Only has what the benchmarks use.
+    """
+
+    def __init__(self, red, green, blue):
+        self._r = _check(red)
+        self._g = _check(green)
+        self._b = _check(blue)
+
+    @classmethod
+    def from_hexcode(cls, hex_val):
+        return cls(
+            (hex_val >> 16) & 0xFF, (hex_val >> 8) & 0xFF, hex_val & 0xFF
+        )
+
+    @property
+    def red(self):
+        return self._r
+
+    @property
+    def green(self):
+        return self._g
+
+    @property
+    def blue(self):
+        return self._b
+
+    def blend(self, other, bias=0.5):
+        if bias < 0 or 1 < bias:
+            raise ValueError(f"Bias must be in range [0, 1], but was {bias}")
+        other_bias = 1.0 - bias
+
+        def mix(this, other):
+            return int(this * bias + other * other_bias)
+
+        return BaselineColor(
+            mix(self.red, other.red),
+            mix(self.green, other.green),
+            mix(self.blue, other.blue),
+        )
+
+    def __int__(self):
+        return (self.red << 16) | (self.green << 8) | self.blue
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, BaselineColor)
+            and self.red == other.red
+            and self.green == other.green
+            and self.blue == other.blue
+        )
+
+    def __bytes__(self):
+        return bytes([self.red, self.green, self.blue])
+
+    def __add__(self, other):
+        return BaselineColor(
+            _coerce(self.red + other.red),
+            _coerce(self.green + other.green),
+            _coerce(self.blue + other.blue),
+        )
+
+    def __mul__(self, coeff):
+        return BaselineColor(
+            _coerce(self.red * coeff),
+            _coerce(self.green * coeff),
+            _coerce(self.blue * coeff),
+        )
+
+
+HEXCODE = 0x123456
+
+
+def make_benchmarks(color_class):
+    red = color_class(255, 0, 0)
+    blue = color_class(0, 0, 255)
+    frames = [int(red), int(blue)]
+    return {
+        # What FadeMode did on every frame before it used a precomputed table
+        "fade frame (2 * and +)": lambda: red * 0.25 + blue * 0.75,
+        # What FadeMode does on every frame now
+        "fade frame (table)": lambda: color_class.from_hexcode(frames[1]),
+        "blend": lambda: red.blend(blue, 0.25),
+        "from_hexcode": lambda: color_class.from_hexcode(HEXCODE),
+        "== (unchanged check)": lambda: red == blue,
+        "bytes (LED push)": lambda: bytes(red),
+    }
+
+
+def bench(func, number, repeat):
+    # Take the best run, to filter out noise from the rest of the system
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+    return best / number * 1e9
+
+
+def main(number=100000, repeat=5):
+    baseline = make_benchmarks(BaselineColor)
+    current = make_benchmarks(Color)
+    print(f"{'':<25} {'baseline':>10} {'current':>10}")
+    for name, func in current.items():
+        print(
+            f"{name:<25} {bench(baseline[name], number, repeat):>10.0f}"
+            f" {bench(func, number, repeat):>10.0f}"
+        )
+    print("(ns per op)")
+
+
+if __name__ == "__main__":
+    main()
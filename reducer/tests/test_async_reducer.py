@@ -0,0 +1,56 @@
+import asyncio
+import os
+import unittest
+
+import redis
+
+from soze_reducer.core.async_reducer import AsyncSozeReducer
+from soze_reducer.lcd.lcd import Lcd
+
+REDIS_URL = os.environ.get("REDIS_HOST", "redis://localhost:6379")
+
+
+def redis_is_reachable():
+    try:
+        redis.from_url(REDIS_URL).ping()
+    except redis.ConnectionError:
+        return False
+    return True
+
+
+class AsyncLcdTestCase(unittest.TestCase):
+    KEYS = (Lcd._COMMAND_QUEUE_KEY, Lcd._SNAPSHOT_KEY, Lcd._LATEST_SEQ_KEY)
+
+    def setUp(self):
+        if not redis_is_reachable():
+            self.skipTest("Redis is unreachable")
+        self.redis = redis.from_url(REDIS_URL)
+        self.redis.delete(*__class__.KEYS)
+
+    def tearDown(self):
+        self.redis.delete(*__class__.KEYS)
+
+    def test_frames_are_pushed(self):
+        async def run():
+            reducer = AsyncSozeReducer(REDIS_URL)
+            lcd, pipeline, _ = next(
+                res for res in reducer._resources if isinstance(res[0], Lcd)
+            )
+            # Same as the LCD's task does, minus the sleeping
+            lcd.init()
+            await pipeline.execute()
+            lcd.step()
+            await pipeline.execute()
+            await reducer._redis.aclose()
+
+        asyncio.run(run())
+
+        # The setup frame was pushed, along with a snapshot of it
+        frames = self.redis.lrange(Lcd._COMMAND_QUEUE_KEY, 0, -1)
+        self.assertEqual(1, len(frames))
+        seq, flags, length = Lcd._FRAME_HEADER.unpack_from(frames[0])
+        self.assertEqual(0, seq)
+        self.assertTrue(flags & Lcd._FRAME_FLAG_FULL)
+        self.assertEqual(len(frames[0]) - Lcd._FRAME_HEADER.size, length)
+        self.assertIsNotNone(self.redis.get(Lcd._SNAPSHOT_KEY))
+        self.assertEqual(b"0", self.redis.get(Lcd._LATEST_SEQ_KEY))
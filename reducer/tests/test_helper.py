@@ -0,0 +1,53 @@
+import unittest
+
+from soze_reducer.lcd.helper import (
+    BIG_CHARS,
+    diff_frames,
+    encode_text,
+    make_big_text,
+)
+
+
+class MakeBigTextTestCase(unittest.TestCase):
+    def test_make_big_text(self):
+        lines = make_big_text("1:")
+        self.assertEqual(3, len(lines))
+        for line, one, colon in zip(lines, BIG_CHARS["1"], BIG_CHARS[":"]):
+            self.assertEqual(f"{one} {colon}", line)
+        # Rendered text is cached
+        self.assertIs(lines, make_big_text("1:"))
+
+
+class EncodeTextTestCase(unittest.TestCase):
+    def test_encode_text(self):
+        self.assertEqual(bytearray(b"    "), encode_text("", 2, 2))
+        self.assertEqual(bytearray(b"abcd"), encode_text("ab\ncd", 2, 2))
+        # Short lines are padded, long lines are cut off
+        self.assertEqual(bytearray(b"a cd"), encode_text("a\ncde\nf", 2, 2))
+        # Characters are encoded as one byte each
+        self.assertEqual(bytearray(b"\xff\x00"), encode_text("\xff\x00", 2, 1))
+
+
+class DiffFramesTestCase(unittest.TestCase):
+    def test_no_diff(self):
+        self.assertEqual([], diff_frames(b"abcd", b"abcd", 2))
+
+    def test_diff(self):
+        self.assertEqual([(1, b"x")], diff_frames(b"abcd", b"axcd", 2))
+        # Adjacent changes go in one run, but runs don't span rows
+        self.assertEqual(
+            [(0, b"wx"), (2, b"y")], diff_frames(b"abcd", b"wxyd", 2)
+        )
+        self.assertEqual(
+            [(0, b"x"), (4, b"y")], diff_frames(b"abcdef", b"xbcdyf", 6)
+        )
+
+    def test_max_gap(self):
+        # Gaps up to max_gap long are rewritten as part of the run
+        self.assertEqual(
+            [(0, b"xbcdy")], diff_frames(b"abcdef", b"xbcdyf", 6, max_gap=3)
+        )
+        self.assertEqual(
+            [(0, b"x"), (4, b"y")],
+            diff_frames(b"abcdef", b"xbcdyf", 6, max_gap=2),
+        )
@@ -0,0 +1,61 @@
+import unittest
+
+from soze_reducer.core.color import BLACK, Color
+from soze_reducer.led.interpolation import gamma_gradient, linear_gradient
+
+WHITE = Color(255, 255, 255)
+
+
+def get_steps(frames):
+    """Gets the change in red between each frame, and to white at the end"""
+    reds = [Color.from_hexcode(frame).red for frame in frames] + [255]
+    return [b - a for a, b in zip(reds, reds[1:])]
+
+
+def to_linear(color):
+    """Gets each channel as linear light [0, 1]"""
+    return [
+        c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+        for c in (color.red / 255, color.green / 255, color.blue / 255)
+    ]
+
+
+class InterpolationTestCase(unittest.TestCase):
+    def test_linear(self):
+        # A one second fade from black to white, at 10 frames per second
+        steps = get_steps(linear_gradient(BLACK, WHITE, 10))
+        self.assertEqual([26, 25] * 5, steps)
+
+    def test_gamma(self):
+        frames = gamma_gradient(BLACK, WHITE, 10)
+        self.assertEqual(int(BLACK), frames[0])
+        # Half of the light is well over half of the sRGB value
+        self.assertEqual(Color(188, 188, 188), Color.from_hexcode(frames[5]))
+        self.assertEqual(sorted(frames), list(frames))
+
+    def test_gamma_endpoints(self):
+        # The fade starts on the first color, and its last frame is one step
+        # (in linear light) short of the second
+        start, end = Color(10, 128, 250), Color(200, 30, 0)
+        for num_steps in (1, 10, 50):
+            with self.subTest(num_steps=num_steps):
+                frames = gamma_gradient(start, end, num_steps)
+                self.assertEqual(int(start), frames[0])
+                last = to_linear(Color.from_hexcode(frames[-1]))
+                for c, c_start, c_end in zip(
+                    last, to_linear(start), to_linear(end)
+                ):
+                    self.assertAlmostEqual(
+                        c_end - (c_end - c_start) / num_steps, c, delta=0.01
+                    )
+
+    def test_gamma_same_color(self):
+        # The color is shown as chosen, the same as in linear mode
+        color = Color(10, 128, 250)
+        self.assertEqual(
+            [int(color)] * 5, list(gamma_gradient(color, color, 5))
+        )
+        self.assertEqual(
+            list(linear_gradient(color, color, 5)),
+            list(gamma_gradient(color, color, 5)),
+        )
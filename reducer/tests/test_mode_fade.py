@@ -0,0 +1,43 @@
+import unittest
+
+from soze_reducer.core.color import Color
+from soze_reducer.led.mode_fade import FadeMode
+
+
+def make_settings(colors, fade_time):
+    return {
+        "mode": "fade",
+        "fade": {"colors": colors, "fade_time": fade_time},
+    }
+
+
+class FadeModeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.mode = FadeMode()
+
+    def test_next_update(self):
+        settings = make_settings([0xFF0000, 0x0000FF], 5.0)
+        # Loading the settings starts the fade over
+        self.mode.get_color(settings)
+        start_time = self.mode._start_time
+        # Frames are a tenth of a second apart
+        self.assertAlmostEqual(
+            start_time + 0.1, self.mode.get_next_update(settings, start_time)
+        )
+        self.assertAlmostEqual(
+            start_time + 1.0,
+            self.mode.get_next_update(settings, start_time + 0.95),
+        )
+
+    def test_no_updates_without_fade(self):
+        # Nothing to fade between, so there's no reason to wake up
+        for settings in (
+            make_settings([], 5.0),
+            make_settings([0xFF0000], 5.0),
+            make_settings([0xFF0000, 0x0000FF], 0.0),
+        ):
+            self.assertIsNone(self.mode.get_next_update(settings, 0.0))
+
+    def test_single_color(self):
+        settings = make_settings([0xFF0000], 5.0)
+        self.assertEqual(Color(255, 0, 0), self.mode.get_color(settings))
@@ -0,0 +1,102 @@
+import unittest
+
+from soze_reducer.lcd.helper import (
+    CMD_BACKLIGHT_ON,
+    CMD_CLEAR,
+    CMD_COLOR,
+    CMD_CURSOR_FWD,
+    CMD_CURSOR_HOME,
+    CMD_CURSOR_POS,
+    CMD_SIZE,
+    SIG_COMMAND,
+)
+from soze_reducer.lcd.optimizer import CommandOptimizer
+
+
+def cmd(command, *args):
+    return bytes([SIG_COMMAND, command, *args])
+
+
+class CommandOptimizerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.optimizer = CommandOptimizer(20, 4)
+        self.optimizer.optimize([cmd(CMD_CLEAR)])
+
+    def test_unknown_cursor(self):
+        # Nothing can be skipped until we know the LCD's state
+        items = [cmd(CMD_CURSOR_POS, 2, 1), b"a"]
+        self.assertEqual(
+            b"".join(items), CommandOptimizer(20, 4).optimize(items)
+        )
+
+    def test_cursor_moves(self):
+        optimize = self.optimizer.optimize
+        # The cursor is already home after a clear
+        self.assertEqual(b"ab", optimize([cmd(CMD_CURSOR_POS, 1, 1), b"ab"]))
+        # Short gaps are rewritten, longer ones are jumped over
+        self.assertEqual(b"  c", optimize([cmd(CMD_CURSOR_POS, 5, 1), b"c"]))
+        self.assertEqual(
+            cmd(CMD_CURSOR_POS, 10, 1) + b"d",
+            optimize([cmd(CMD_CURSOR_POS, 10, 1), b"d"]),
+        )
+        self.assertEqual(
+            cmd(CMD_CURSOR_HOME) + b"x",
+            optimize([cmd(CMD_CURSOR_POS, 1, 1), b"x"]),
+        )
+        # Rewriting a gap with a command byte in it isn't safe
+        optimize([cmd(CMD_CURSOR_POS, 1, 2), bytes([0, SIG_COMMAND])])
+        items = [
+            cmd(CMD_CURSOR_POS, 1, 2),
+            b"e",
+            cmd(CMD_CURSOR_POS, 3, 2),
+            b"f",
+        ]
+        self.assertEqual(
+            cmd(CMD_CURSOR_POS, 1, 2) + b"e" + cmd(CMD_CURSOR_FWD) + b"f",
+            optimize(items),
+        )
+
+    def test_row_wrap(self):
+        # We don't know where the cursor goes after the end of a row
+        self.optimizer.optimize([cmd(CMD_CURSOR_POS, 20, 1), b"a"])
+        self.assertEqual(
+            cmd(CMD_CURSOR_POS, 1, 2) + b"b",
+            self.optimizer.optimize([cmd(CMD_CURSOR_POS, 1, 2), b"b"]),
+        )
+
+    def test_state_commands(self):
+        optimize = self.optimizer.optimize
+        items = [cmd(CMD_COLOR, 1, 2, 3), cmd(CMD_BACKLIGHT_ON, 0)]
+        self.assertEqual(b"".join(items), optimize(items))
+        self.assertEqual(b"", optimize(items))
+        self.assertEqual(
+            cmd(CMD_COLOR, 4, 5, 6), optimize([cmd(CMD_COLOR, 4, 5, 6)])
+        )
+        self.optimizer.reset()
+        self.assertEqual(b"".join(items), optimize(items))
+
+    def test_snapshot(self):
+        self.assertIsNone(CommandOptimizer(20, 4).get_snapshot())
+
+        optimize = self.optimizer.optimize
+        optimize([cmd(CMD_COLOR, 1, 2, 3), cmd(CMD_CURSOR_POS, 2, 2), b"ab"])
+        # Redraws the screen, then puts the cursor back
+        self.assertEqual(
+            cmd(CMD_SIZE, 20, 4)
+            + cmd(CMD_CLEAR)
+            + cmd(CMD_COLOR, 1, 2, 3)
+            + cmd(CMD_CURSOR_POS, 2, 2)
+            + b"ab",
+            self.optimizer.get_snapshot(),
+        )
+        optimize([cmd(CMD_CURSOR_POS, 1, 1), b"c"])
+        self.assertEqual(
+            cmd(CMD_SIZE, 20, 4)
+            + cmd(CMD_CLEAR)
+            + cmd(CMD_COLOR, 1, 2, 3)
+            + b"c"
+            + cmd(CMD_CURSOR_POS, 2, 2)
+            + b"ab"
+            + cmd(CMD_CURSOR_POS, 2, 1),
+            self.optimizer.get_snapshot(),
+        )
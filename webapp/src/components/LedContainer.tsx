@@ -2,7 +2,7 @@ import { FormControl, Typography } from '@material-ui/core';
 import Slider from '@material-ui/core/Slider';
 import useResource from 'hooks/useResource';
 import React from 'react';
-import { LedMode, LedSettings } from 'types/led';
+import { FadeInterpolation, LedMode, LedSettings } from 'types/led';
 import { Resource } from 'types/resource';
 import ColorPicker from './ColorPicker';
 import ColorSeries from './ColorSeries';
@@ -64,6 +64,18 @@ const LedContainer: React.FC = () => {
                   />
                 </div>
               </FormControl>
+              <FormControl>
+                <Typography>Interpolation</Typography>
+                <ModeSelect
+                  modes={FadeInterpolation}
+                  selectedMode={localData.fade.interpolation}
+                  onChange={i => {
+                    modifyData({
+                      fade: { interpolation: i as FadeInterpolation },
+                    });
+                  }}
+                />
+              </FormControl>
               <FormControl>
                 <Typography>Color Series</Typography>
                 <ColorSeries
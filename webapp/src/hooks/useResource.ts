@@ -1,16 +1,18 @@
 import { get, isArray, isEmpty, mergeWith, noop } from 'lodash-es';
-import { useEffect, useReducer } from 'react';
+import { useCallback, useEffect, useReducer } from 'react';
 import { RecursivePartial } from 'types/core';
 import {
   defaultResourceState,
   Resource,
   ResourceAction,
   ResourceActionType,
+  ResourceEvent,
   ResourceState,
   Status,
   Statuses,
 } from 'types/resource';
 import useApi from './useApi';
+import useResourceEvents from './useResourceEvents';
 
 const mergeObjects = (obj: any, ...other: any): any => {
   return mergeWith(obj, ...other, (_: any, srcVal: any) => {
@@ -44,6 +46,13 @@ const reducer = <T>(
         // Whenever we set all data, we should wipe out any modifications
         modifiedData: {},
       };
+    case ResourceActionType.RemoteLoad:
+      return {
+        ...state,
+        // Keep any modifications, so that someone else's change doesn't wipe
+        // out what the user is in the middle of
+        data: { ...state.data, ...action.data },
+      };
     case ResourceActionType.ModifyData:
       return {
         ...state,
@@ -96,6 +105,25 @@ function useResource<T>(resource: Resource): ReturnVal<T> {
       .catch(noop);
   }, [fetchRequest, resource]);
 
+  // After that, the API pushes changes to us instead of us polling for them
+  const onUpdate = useCallback((event: ResourceEvent<T>) => {
+    dispatch({
+      type: ResourceActionType.RemoteLoad,
+      data: { [event.status]: event.settings },
+    });
+  }, []);
+  const onReconnect = useCallback(() => {
+    fetchRequest({ url: `/api/${resource}`, method: 'GET' })
+      .then(fetchData => {
+        dispatch({
+          type: ResourceActionType.RemoteLoad,
+          data: fetchData,
+        });
+      })
+      .catch(noop);
+  }, [fetchRequest, resource]);
+  useResourceEvents(resource, onUpdate, onReconnect);
+
   // Memoize these to prevent unnecessary re-renders
   const { status, data, modifiedData } = state;
   const modifiedForStatus = modifiedData && modifiedData[status];
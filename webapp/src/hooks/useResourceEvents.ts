@@ -0,0 +1,62 @@
+import { useEffect } from 'react';
+import { Resource, ResourceEvent } from 'types/resource';
+
+interface Listener {
+  resource: Resource;
+  onUpdate: (event: ResourceEvent<any>) => void;
+  onReconnect: () => void;
+}
+
+// One event stream is shared by every hook on the page, and only kept open
+// while something is listening
+const listeners = new Set<Listener>();
+let source: EventSource | undefined;
+
+const openSource = (): EventSource => {
+  const newSource = new EventSource('/api/events');
+  let opened = false;
+  newSource.addEventListener('open', () => {
+    // We may have missed events while disconnected, so refetch everything
+    if (opened) {
+      listeners.forEach(listener => listener.onReconnect());
+    }
+    opened = true;
+  });
+  newSource.addEventListener('update', e => {
+    const event: ResourceEvent<any> = JSON.parse((e as MessageEvent).data);
+    listeners.forEach(listener => {
+      if (listener.resource === event.resource) {
+        listener.onUpdate(event);
+      }
+    });
+  });
+  return newSource;
+};
+
+/**
+ * Hook to get pushed updates for the given resource, made by anyone. Callbacks
+ * should be memoized, to prevent resubscribing on every render.
+ */
+function useResourceEvents<T>(
+  resource: Resource,
+  onUpdate: (event: ResourceEvent<T>) => void,
+  onReconnect: () => void
+): void {
+  useEffect(() => {
+    const listener = { resource, onUpdate, onReconnect };
+    listeners.add(listener);
+    if (!source) {
+      source = openSource();
+    }
+
+    return () => {
+      listeners.delete(listener);
+      if (source && listeners.size === 0) {
+        source.close();
+        source = undefined;
+      }
+    };
+  }, [resource, onUpdate, onReconnect]);
+}
+
+export default useResourceEvents;
@@ -6,6 +6,11 @@ export enum LedMode {
   Fade = 'fade',
 }
 
+export enum FadeInterpolation {
+  Linear = 'linear',
+  Gamma = 'gamma',
+}
+
 export interface LedSettings {
   mode: LedMode;
   static: {
@@ -13,10 +18,7 @@ export interface LedSettings {
   };
   fade: {
     colors: Color[];
-    saved: {
-      name: string;
-      colors: Color[];
-    };
     fade_time: number;
+    interpolation: FadeInterpolation;
   };
 }
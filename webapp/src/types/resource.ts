@@ -14,6 +14,14 @@ export interface Statuses<T> {
   [status: string]: T;
 }
 
+// Pushed from the API whenever anyone changes a resource's settings
+export interface ResourceEvent<T> {
+  resource: Resource;
+  status: Status;
+  version: number;
+  settings: T;
+}
+
 export interface ResourceState<T> {
   status: Status;
   data?: Statuses<T>;
@@ -28,6 +36,7 @@ export enum ResourceActionType {
   SetStatus,
   FetchLoad, // When a GET response comes in, for all statuses
   PostLoad, // When a POST response comes in, for just one status
+  RemoteLoad, // When someone else changes data, for any statuses
   ModifyData,
 }
 
@@ -35,6 +44,7 @@ export type ResourceAction<T> =
   | { type: ResourceActionType.SetStatus; status: Status }
   | { type: ResourceActionType.FetchLoad; data: Statuses<T> }
   | { type: ResourceActionType.PostLoad; status: Status; data: T }
+  | { type: ResourceActionType.RemoteLoad; data: Statuses<T> }
   | {
       type: ResourceActionType.ModifyData;
       status: Status;